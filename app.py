@@ -1,15 +1,92 @@
+"""
+Application factory.
+
+    python app.py
+    flask --app app run
+    FLASK_SECRET_KEY=... gunicorn "app:create_app()"
+
+Every worker must sign sessions with the same SECRET_KEY, so the app
+refuses to start without one unless DEBUG or TESTING is set.
+Importing this module builds nothing: create_app() creates the Flask app,
+applies pending schema migrations and builds the catalog snapshot.
+Workers starting together migrate safely (each migration is applied by
+one of them); to migrate once before starting them instead, run
+`python -m models.setup_db` and set FLASK_INITIALIZE_DATABASE=false.
+`from app import app` still works and builds an app with the default
+configuration on first access.
+"""
+
+import secrets
+
 from flask import Flask
-from routes.auth_routes import auth_routes
+
+from models import database, fragments, passwords
+from models.catalog import get_catalog
 from models.setup_db import initialize_database
+from routes.api_routes import api_routes
+from routes.auth_routes import auth_routes
+
+DEFAULT_CONFIG = {
+    # Create missing tables and apply pending schema migrations at startup
+    "INITIALIZE_DATABASE": True,
+    # Build the shared catalog snapshot before the first request (with
+    # `gunicorn --preload` forked workers share it copy-on-write)
+    "PRELOAD_CATALOG": True,
+}
+
+
+def create_app(config=None):
+    """
+    Build and configure the Flask app.
+    Settings come from DEFAULT_CONFIG, then FLASK_* environment variables
+    (e.g. FLASK_SECRET_KEY, FLASK_DATABASE), then config.
+    :param config: A mapping of settings, e.g. {"DATABASE": path, "PRELOAD_CATALOG": False}.
+    :return: The Flask app.
+    """
+    app = Flask(__name__, static_folder="static")
+    app.config.from_mapping(DEFAULT_CONFIG)
+    app.config.from_prefixed_env()
+    if config:
+        app.config.from_mapping(config)
+
+    # Secret key for session management
+    if not app.config.get("SECRET_KEY"):
+        if not (app.config.get("DEBUG") or app.config.get("TESTING")):
+            # A random key per worker would reject sessions signed by the others
+            raise RuntimeError("Set FLASK_SECRET_KEY to sign sessions.")
+        print("FLASK_SECRET_KEY is not set; signing sessions with a random key.")
+        app.config["SECRET_KEY"] = secrets.token_hex(32)
+
+    # Register Blueprints
+    app.register_blueprint(auth_routes)
+    app.register_blueprint(api_routes)
+
+    # Return pooled database connections at the end of every request
+    database.init_app(app)
+
+    # Hash passwords on a bounded pool sized by the PASSWORD_HASH_* settings
+    passwords.init_app(app)
+
+    if app.config["INITIALIZE_DATABASE"]:
+        initialize_database()
+
+    # Tag fragment ETags with a digest of the templates and the database's id
+    fragments.init_app(app)
+
+    if app.config["PRELOAD_CATALOG"]:
+        get_catalog()
 
-app = Flask(__name__, static_folder="static")
+    return app
 
 
-# Secret key for session management
-app.secret_key = "123"  # Replace with a strong, random secret key
+def __getattr__(name):
+    # `from app import app` and `gunicorn app:app` get a default app, built once
+    global app
+    if name == "app":
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Register Blueprints
-app.register_blueprint(auth_routes)
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app({"DEBUG": True}).run(debug=True)
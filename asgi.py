@@ -0,0 +1,212 @@
+"""
+ASGI entry point.
+
+Serves the same Flask app (every blueprint endpoint) under an ASGI server:
+
+    uvicorn asgi:application
+
+Flask requests run on a pool of ASGI_THREADS threads; further requests
+wait on the event loop, holding no thread, until one finishes. Long-polls
+of background jobs (GET /jobs/<id>?wait=N) wait on the event loop itself
+until the job stops running, so clients waiting for a plan search or a
+cohort export to finish hold no thread; the Flask route then answers as
+usual. The Flask handlers themselves are unchanged and synchronous: each
+request's SQLite work runs on the pool thread serving it. Only the
+database work done on the event loop (startup and long-polls) goes
+through models.async_db.
+"""
+
+import asyncio
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from urllib.parse import parse_qs
+
+from flask import session
+
+from app import create_app
+from models import async_db, jobs
+from models.access import job_owner
+from models.catalog import get_catalog
+
+# The lifespan startup below builds the catalog snapshot off the event loop
+app = create_app({"PRELOAD_CATALOG": False})
+
+# Flask requests handled at once; the rest wait without holding a thread
+ASGI_THREADS = app.config.get("ASGI_THREADS", 32)
+
+# How often a long-poll checks its job, in seconds
+JOB_POLL_INTERVAL = 0.25
+
+# Request bodies larger than this are spooled to a temporary file
+MAX_MEMORY_BODY = 64 * 1024
+
+JOB_STATUS_PATH = re.compile(r"^/jobs/(?!stats$)([^/]+)$")
+
+# Threads running Flask requests; requests beyond this wait on the event loop
+_request_threads = ThreadPoolExecutor(ASGI_THREADS, thread_name_prefix="asgi-request")
+
+
+def build_environ(scope, body):
+    """
+    Translate an ASGI HTTP scope and its request body into a WSGI environ.
+    :param body: A file object holding the whole request body.
+    """
+    script_name = scope.get("root_path", "").encode("utf8").decode("latin1")
+    path_info = scope["path"].encode("utf8").decode("latin1")
+    if path_info.startswith(script_name):
+        path_info = path_info[len(script_name) :]
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name,
+        "PATH_INFO": path_info,
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        value = value.decode("latin1")
+        if name in environ:
+            # Repeated headers are joined; cookies with their own separator
+            value = environ[name] + ("; " if name == "HTTP_COOKIE" else ",") + value
+        environ[name] = value
+    return environ
+
+
+def run_wsgi(wsgi_app, environ, send):
+    """
+    Run a WSGI app to completion on the calling thread, passing its response
+    to send(message) as ASGI messages.
+    """
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        if exc_info and response.get("started"):
+            raise exc_info[1].with_traceback(exc_info[2])
+        response["start"] = {
+            "type": "http.response.start",
+            "status": int(status.split(" ", 1)[0]),
+            "headers": [
+                (name.lower().encode("latin1"), value.encode("latin1"))
+                for name, value in headers
+            ],
+        }
+
+    output = wsgi_app(environ, start_response)
+    try:
+        for chunk in output:
+            if not response.get("started"):
+                response["started"] = True
+                send(response["start"])
+            if chunk:
+                send({"type": "http.response.body", "body": chunk, "more_body": True})
+    finally:
+        if hasattr(output, "close"):
+            output.close()
+    if not response.get("started"):
+        send(response["start"])
+    send({"type": "http.response.body"})
+
+
+class Application:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        with SpooledTemporaryFile(max_size=MAX_MEMORY_BODY) as body:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                body.write(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+            environ = build_environ(scope, body)
+
+            match = JOB_STATUS_PATH.match(scope["path"])
+            if match and scope["method"] == "GET":
+                wait = self._query_float(scope, "wait")
+                if wait:
+                    await self.wait_for_job(environ, match.group(1), wait)
+
+            await self.call_flask(environ, send)
+
+    async def call_flask(self, environ, send):
+        """
+        Hand a request to the Flask app on the bounded request pool; the
+        response is sent from that thread through the event loop.
+        """
+        loop = asyncio.get_running_loop()
+
+        def send_from_thread(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        await loop.run_in_executor(
+            _request_threads, run_wsgi, self.flask_app, environ, send_from_thread
+        )
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Build the catalog snapshot before the first request arrives
+                await async_db.run_sync(get_catalog)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncio.get_running_loop().run_in_executor(None, async_db.shutdown)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def wait_for_job(self, environ, job_id, wait):
+        """
+        The long-poll part of GET /jobs/<id>?wait=N: return once the job stops
+        running, is unknown to the student or wait seconds have passed,
+        whichever comes first. Requests without a session don't wait. The
+        request then goes to the Flask route, which reports the status.
+        """
+        # Same session and owner rules as the route (no database access)
+        with self.flask_app.request_context(environ):
+            if not session.get("student_number"):
+                return
+            owner = job_owner()
+
+        deadline = time.monotonic() + min(wait, jobs.MAX_WAIT)
+        while time.monotonic() < deadline:
+            status = await async_db.run_sync(jobs.job_queue.status, job_id, owner=owner)
+            if status is None or status["status"] not in jobs.ACTIVE_STATES:
+                return
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    @staticmethod
+    def _query_float(scope, name):
+        values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(name)
+        try:
+            return max(float(values[0]), 0.0) if values else 0.0
+        except ValueError:
+            return 0.0
+
+
+application = Application(app)
@@ -0,0 +1,242 @@
+"""
+Load-test the sync (threaded WSGI) and ASGI serving modes side by side.
+
+Starts each server in turn on a scratch copy of data/university_courses.db
+and drives it with the same number of concurrent clients for the same
+time. Every client loops over a mix of dashboard, study plan, plan API and
+Excel export requests plus a background plan search it polls until done
+(long-polling under ASGI, every Retry-After seconds otherwise), and the
+report gives throughput and p50/p95/p99 latency per endpoint for both
+modes.
+
+    python -m benchmarks.asgi_load [--concurrency 32] [--duration 10]
+
+The ASGI mode needs uvicorn (pip install uvicorn).
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STUDENT_NUMBER = "320210601079"
+
+SERVERS = {
+    "sync": [
+        "-c",
+        "from werkzeug.serving import run_simple; from app import create_app; "
+        "run_simple('127.0.0.1', {port}, create_app(), threaded=True)",
+    ],
+    "asgi": ["-m", "uvicorn", "asgi:application", "--port", "{port}", "--log-level", "warning"],
+}
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(percent / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+class Client:
+    """One simulated student on a keep-alive connection."""
+
+    def __init__(self, port, cookie, index):
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        self.headers = {"Cookie": cookie}
+        self.index = index
+        self.retry_after = 0.0
+
+    def request(self, method, path, body=None, content_type=None):
+        headers = dict(self.headers)
+        if body is not None:
+            headers["Content-Type"] = content_type or "application/json"
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        self.retry_after = float(response.getheader("Retry-After") or 0)
+        if response.status >= 400:
+            raise RuntimeError(f"{method} {path} returned {response.status}")
+        return data
+
+    def json(self, method, path, payload=None):
+        body = None if payload is None else json.dumps(payload)
+        return json.loads(self.request(method, path, body))
+
+    def scenario(self, round_number):
+        """The request mix, as (name, callable) pairs."""
+        # Odd credit hours per client and round miss the plan cache, so the job really runs
+        credit_hours = 9 + (self.index * 7 + round_number) % 10
+        return [
+            ("dashboard", lambda: self.request("GET", "/dashboard")),
+            ("study_plan", lambda: self.request("GET", "/load-partial/study_plan")),
+            ("api_plan", lambda: self.json("POST", "/api/v1/plan", {"credit_hours": 15})),
+            (
+                "export_excel",
+                lambda: self.request(
+                    "POST",
+                    "/export-plan/excel",
+                    json.dumps(
+                        {
+                            "plan": [["0601241", "DB", 3, "10:00 AM-11:30 AM", "ن ر"]] * 6,
+                            "plan_type": "generated_plan",
+                        }
+                    ),
+                ),
+            ),
+            ("background_plan", lambda: self.background_plan(credit_hours)),
+        ]
+
+    def background_plan(self, credit_hours):
+        submitted = self.json(
+            "POST",
+            "/api/v1/plan",
+            {"credit_hours": credit_hours, "alternatives": 3, "background": True},
+        )
+        job_id = submitted.get("job_id")
+        while job_id:
+            status = self.json("GET", f"/jobs/{job_id}?wait=10")
+            if status["status"] not in ("queued", "running"):
+                self.json("GET", f"/api/v1/plan/{job_id}")
+                return
+            # The sync server answers at once and says when to ask again
+            time.sleep(self.retry_after)
+
+
+def run_mode(mode, args, workdir, cookie):
+    """Start one server, load it for args.duration seconds and stop it."""
+    port = free_port()
+    command = [sys.executable] + [part.format(port=port) for part in SERVERS[mode]]
+    environment = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    server = subprocess.Popen(
+        command,
+        cwd=workdir,
+        env=environment,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(port)
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+        deadline = time.monotonic() + args.duration
+
+        def worker(index):
+            client = Client(port, cookie, index)
+            round_number = 0
+            while time.monotonic() < deadline:
+                for name, send in client.scenario(round_number):
+                    started = time.perf_counter()
+                    try:
+                        send()
+                    except Exception:
+                        with lock:
+                            errors[name] += 1
+                        client = Client(port, cookie, index)
+                        continue
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies[name].append(elapsed)
+                round_number += 1
+
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=worker, args=(index,)) for index in range(args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, errors, time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument("--modes", nargs="+", choices=sorted(SERVERS), default=["sync", "asgi"])
+    args = parser.parse_args()
+
+    # Work on a copy so the benchmark never writes to the real database
+    workdir = tempfile.mkdtemp()
+    os.makedirs(os.path.join(workdir, "data"))
+    shutil.copy(
+        os.path.join(REPO_ROOT, "data", "university_courses.db"),
+        os.path.join(workdir, "data", "university_courses.db"),
+    )
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    # Sign a session cookie the servers accept (they inherit the same secret key)
+    os.environ.setdefault("FLASK_SECRET_KEY", secrets.token_hex(32))
+    # Give searches a budget the server considers worth a background job
+    os.environ.setdefault("FLASK_PLANNER_TIME_BUDGET", "1.0")
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        from app import create_app
+
+        app = create_app()
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    serializer = app.session_interface.get_signing_serializer(app)
+    cookie = (
+        f"{app.config['SESSION_COOKIE_NAME']}="
+        f"{serializer.dumps({'student_number': STUDENT_NUMBER})}"
+    )
+
+    print(f"{args.concurrency} concurrent clients, {args.duration:.0f}s per mode")
+    print(
+        f"{'mode':<6}{'endpoint':<17}{'requests':>9}{'errors':>8}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+    for mode in args.modes:
+        latencies, errors, elapsed = run_mode(mode, args, workdir, cookie)
+        total = 0
+        for name in sorted(set(latencies) | set(errors)):
+            timings = sorted(latencies[name])
+            total += len(timings)
+            print(
+                f"{mode:<6}{name:<17}{len(timings):>9}{errors[name]:>8}"
+                f"{percentile(timings, 50) * 1000:>9.1f}{percentile(timings, 95) * 1000:>9.1f}"
+                f"{percentile(timings, 99) * 1000:>9.1f}"
+            )
+        print(f"{mode:<6}{'throughput':<17}{total / elapsed:>9.1f} requests/s")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Measure cold start: how long a fresh process takes to serve its first request.
+
+Each run starts a new interpreter on a scratch copy of
+data/university_courses.db and times, separately, importing the app
+module, create_app() (migrations and the catalog snapshot) and the first
+request; the whole process, interpreter start-up included, is timed from
+outside. This is what a gunicorn worker spawn or a test session pays
+before doing any work.
+
+    python -m benchmarks.cold_start [--runs 10] [--target 0.5] [--imports 15]
+
+Exits with status 1 when the median time to the first response exceeds
+--target seconds.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Median seconds from process start to the first response
+TARGET_SECONDS = 0.5
+
+PHASES = ("import", "create_app", "first_request", "process")
+
+CHILD = """
+import json, os, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+application = app.create_app({"SECRET_KEY": "cold-start"})
+created = time.perf_counter()
+application.test_client().get("/login")
+answered = time.perf_counter()
+sys.stdout = stdout
+print(json.dumps({
+    "import": imported - started,
+    "create_app": created - imported,
+    "first_request": answered - created,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def run_once(workdir, environment):
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=workdir,
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings["process"] = time.perf_counter() - started
+    return timings
+
+
+def slowest_imports(workdir, environment, top):
+    """
+    Import the app module once under -X importtime.
+    :return: The top (cumulative microseconds, module) pairs of the top-level imports.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=workdir,
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nesting is shown by indentation; keep direct imports of app.py and app itself
+        if cumulative.strip().isdigit() and len(name) - len(name.lstrip()) <= 3:
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--target", type=float, default=TARGET_SECONDS, help="Seconds to the first response"
+    )
+    parser.add_argument("--imports", type=int, default=0, help="List the N slowest imports")
+    args = parser.parse_args()
+
+    # Work on a copy so the benchmark never writes to the real database
+    workdir = tempfile.mkdtemp()
+    os.makedirs(os.path.join(workdir, "data"))
+    shutil.copy(
+        os.path.join(REPO_ROOT, "data", "university_courses.db"),
+        os.path.join(workdir, "data", "university_courses.db"),
+    )
+    environment = dict(os.environ, PYTHONPATH=REPO_ROOT)
+
+    # The first run also compiles bytecode; leave it out like a deployed worker would
+    run_once(workdir, environment)
+    runs = [run_once(workdir, environment) for _ in range(args.runs)]
+
+    print(f"{args.runs} cold starts, {runs[0]['modules']} modules loaded")
+    print(f"{'phase':<15}{'median ms':>11}{'max ms':>9}")
+    for phase in PHASES:
+        values = [run[phase] for run in runs]
+        print(
+            f"{phase:<15}{statistics.median(values) * 1000:>11.1f}{max(values) * 1000:>9.1f}"
+        )
+
+    if args.imports:
+        print(f"\n{'import':<40}{'cumulative ms':>14}")
+        for cumulative, name in slowest_imports(workdir, environment, args.imports):
+            print(f"{name:<40}{cumulative / 1000:>14.1f}")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    median = statistics.median(run["process"] for run in runs)
+    if median > args.target:
+        print(f"\nCold start {median:.3f}s exceeds the {args.target:.3f}s target")
+        sys.exit(1)
+    print(f"\nCold start {median:.3f}s is within the {args.target:.3f}s target")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Count SQLite connections opened per request.
+
+Runs a mix of dashboard requests through the Flask test client against a
+scratch copy of data/university_courses.db and reports, per endpoint, how
+many times sqlite3.connect was called and the mean latency.
+
+    python -m benchmarks.connections [--rounds 200]
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STUDENT_NUMBER = "320210601079"
+
+
+def count_connections():
+    """Wrap sqlite3.connect so every new connection is counted."""
+    counter = {"connections": 0}
+    original_connect = sqlite3.connect
+
+    def counting_connect(*args, **kwargs):
+        counter["connections"] += 1
+        return original_connect(*args, **kwargs)
+
+    sqlite3.connect = counting_connect
+    return counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    # Work on a copy so the benchmark never writes to the real database
+    workdir = tempfile.mkdtemp()
+    os.makedirs(os.path.join(workdir, "data"))
+    shutil.copy(
+        os.path.join(REPO_ROOT, "data", "university_courses.db"),
+        os.path.join(workdir, "data", "university_courses.db"),
+    )
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    counter = count_connections()
+    from app import create_app
+
+    client = create_app({"SECRET_KEY": "benchmark"}).test_client()
+    with client.session_transaction() as session:
+        session["student_number"] = STUDENT_NUMBER
+
+    connection = sqlite3.connect(os.path.join("data", "university_courses.db"))
+    completed = [
+        row[0]
+        for row in connection.execute(
+            "SELECT course_code FROM completed_courses WHERE student_number = ?",
+            (STUDENT_NUMBER,),
+        )
+    ]
+    connection.close()
+
+    requests = [
+        ("login", lambda: client.post(
+            "/login", data={"student_number": STUDENT_NUMBER, "password": "wrong"}
+        )),
+        ("dashboard", lambda: client.get("/dashboard")),
+        ("student_info", lambda: client.get("/load-partial/student_info")),
+        ("study_plan", lambda: client.get("/load-partial/study_plan")),
+        ("save_study_plan", lambda: client.post(
+            "/save-study-plan", json={"completed_courses": completed}
+        )),
+        ("generate_plan", lambda: client.post(
+            "/generate-plan", data={"credit_hours": "15"}
+        )),
+        ("forgot_password", lambda: client.post(
+            "/forgot-password",
+            data={"student_number": STUDENT_NUMBER, "password": "Benchmark#1"},
+        )),
+    ]
+
+    connections = defaultdict(int)
+    elapsed = defaultdict(float)
+    # Keep the planner's debug output out of the report
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        for _ in range(args.rounds):
+            for name, send in requests:
+                before = counter["connections"]
+                started = time.perf_counter()
+                send()
+                elapsed[name] += time.perf_counter() - started
+                connections[name] += counter["connections"] - before
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    print(f"{'endpoint':<18}{'connections/request':>22}{'mean ms':>10}")
+    for name, _ in requests:
+        print(
+            f"{name:<18}{connections[name] / args.rounds:>22.3f}"
+            f"{elapsed[name] / args.rounds * 1000:>10.2f}"
+        )
+    total_requests = args.rounds * len(requests)
+    print(
+        f"{'all':<18}{sum(connections.values()) / total_requests:>22.3f}"
+        f"{sum(elapsed.values()) / total_requests * 1000:>10.2f}"
+    )
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compare ways of counting eligible students per course for a whole cohort.
+
+Builds a synthetic cohort from the real catalog (each student has completed
+a random prerequisite-closed set of courses) and times the per-student
+subset-check loop, the bitset eligibility index and the NumPy matrix report.
+
+    python -m benchmarks.eligibility_matrix [--students 10000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_cohort(catalog, students, seed=0):
+    """Give each student a random number of courses taken in prerequisite order."""
+    rng = random.Random(seed)
+    eligibility = catalog.eligibility
+    cohort = {}
+    for index in range(students):
+        completed = set()
+        for _ in range(rng.randint(0, len(catalog.courses) // 2)):
+            options = eligibility.eligible_codes(completed, offered_only=False)
+            if not options:
+                break
+            completed.add(rng.choice(options))
+        cohort[f"S{index:06d}"] = completed
+    return cohort
+
+
+def best_of(repeat, function, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Work on a copy so the benchmark never touches the real database
+    workdir = tempfile.mkdtemp()
+    os.makedirs(os.path.join(workdir, "data"))
+    shutil.copy(
+        os.path.join(REPO_ROOT, "data", "university_courses.db"),
+        os.path.join(workdir, "data", "university_courses.db"),
+    )
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+    from models.catalog import get_catalog
+    from models.setup_db import initialize_database
+    from models import reports
+
+    initialize_database()
+    catalog = get_catalog()
+    cohort = synthetic_cohort(catalog, args.students)
+
+    def bitset_counts():
+        counts = dict.fromkeys(catalog.courses, 0)
+        for codes in catalog.eligibility.eligible_for_students(
+            cohort, offered_only=False
+        ).values():
+            for code in codes:
+                counts[code] += 1
+        return counts
+
+    loop_time, expected = best_of(args.repeat, reports.eligibility_report_loop, catalog, cohort)
+    bitset_time, bitset = best_of(args.repeat, bitset_counts)
+    rows = [
+        ("per-student loop", loop_time, True),
+        ("bitset index", bitset_time, bitset == expected),
+    ]
+    if reports.np is not None:
+        matrix_time, report = best_of(args.repeat, reports.eligibility_report, catalog, cohort)
+        matrix = {
+            code: report["courses"][code]["eligible_students"] for code in catalog.courses
+        }
+        label = "numpy (sparse)" if reports.sparse is not None else "numpy (dense)"
+        rows.append((label, matrix_time, matrix == expected))
+    else:
+        print("NumPy is not installed; skipping the matrix report.")
+
+    print(f"{args.students} students, {len(catalog.courses)} courses (best of {args.repeat})")
+    print(f"{'method':<18}{'seconds':>10}{'speedup':>9}{'matches':>9}")
+    for label, seconds, matches in rows:
+        print(f"{label:<18}{seconds:>10.3f}{loop_time / seconds:>8.1f}x{str(matches):>9}")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
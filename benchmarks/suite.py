@@ -0,0 +1,366 @@
+"""
+Repeatable benchmark suite on a synthetic catalog and student population.
+
+Builds a scratch database from scratch (schema, a generated catalog loaded
+through models.db_operations, a generated cohort), then runs:
+
+* end-to-end requests through the Flask test client (dashboard, study
+  plan, saving the study plan, plan generation, the JSON plan API and the
+  Excel export), each as a different student;
+* micro-benchmarks of the catalog snapshot build, the schedule search and
+  cohort-wide eligibility.
+
+Every benchmark reports p50/p95/p99 latency; requests also report SQL
+statements executed per request and the peak memory allocated while
+handling one. Results are written as JSON and can be compared with an
+earlier run, exiting with status 1 when a p95 regressed past the threshold.
+
+    python -m benchmarks.suite [--courses 500] [--students 2000] [--requests 200]
+                               [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Requests per scenario that are also measured with tracemalloc
+MEMORY_SAMPLES = 20
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(percent / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def summarize(timings):
+    """Latency summary in milliseconds."""
+    timings = sorted(timings)
+    return {
+        "samples": len(timings),
+        "mean_ms": sum(timings) / len(timings) * 1000 if timings else 0.0,
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p95_ms": percentile(timings, 95) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+    }
+
+
+def count_statements(database):
+    """Trace every pooled connection so executed SQL statements are counted."""
+    counter = {"statements": 0}
+    original_connect = database.ConnectionPool._connect
+
+    def traced_connect(pool):
+        connection = original_connect(pool)
+
+        def trace(statement):
+            counter["statements"] += 1
+
+        connection.set_trace_callback(trace)
+        return connection
+
+    database.ConnectionPool._connect = traced_connect
+    return counter
+
+
+def build_database(args):
+    """Create the schema, load a synthetic catalog and register a synthetic cohort."""
+    from benchmarks.synthetic import (
+        store_population,
+        synthetic_catalog,
+        synthetic_population,
+        write_catalog_module,
+    )
+    from models import database
+    from models.catalog import reload_catalog
+    from models.db_operations import load_catalog
+    from models.demand import rebuild_course_demand
+    from models.setup_db import initialize_database
+    from models.student_stats import rebuild_all
+
+    initialize_database()
+    courses_data, course_of_study = synthetic_catalog(
+        args.courses, args.depth, args.max_sections, seed=args.seed
+    )
+    write_catalog_module("synthetic_catalog.py", courses_data, course_of_study)
+    load_catalog("synthetic_catalog", prune=True)
+    catalog = reload_catalog()
+
+    population = synthetic_population(catalog, args.students, seed=args.seed)
+    with database.connection() as connection:
+        cursor = connection.cursor()
+        store_population(cursor, population)
+        rebuild_all(cursor, catalog)
+        rebuild_course_demand(cursor, catalog)
+        connection.commit()
+    return catalog, population
+
+
+def run_requests(client, name, send, students, requests, counter):
+    """
+    Time one scenario, each request as the next student in turn.
+    :param send: Callable (client, student number) issuing the request.
+    :return: The scenario's summary.
+    """
+    timings = []
+    statements = 0
+    for index in range(requests):
+        student_number = students[index % len(students)]
+        with client.session_transaction() as session:
+            session["student_number"] = student_number
+        before = counter["statements"]
+        started = time.perf_counter()
+        response = send(client, student_number)
+        timings.append(time.perf_counter() - started)
+        statements += counter["statements"] - before
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name} returned {response.status_code}")
+
+    # Memory is sampled in a separate pass; tracing would skew the timings
+    peaks = []
+    tracemalloc.start()
+    try:
+        for index in range(min(MEMORY_SAMPLES, requests)):
+            student_number = students[index % len(students)]
+            with client.session_transaction() as session:
+                session["student_number"] = student_number
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            send(client, student_number)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    summary = summarize(timings)
+    summary["statements_per_request"] = statements / requests
+    summary["peak_kib"] = max(peaks) / 1024 if peaks else 0.0
+    return summary
+
+
+def time_calls(function, arguments):
+    """Time function(*args) for every args tuple in arguments."""
+    timings = []
+    for args in arguments:
+        started = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - started)
+    return summarize(timings)
+
+
+def request_scenarios(catalog, population, seed):
+    """The end-to-end scenarios, as (name, send) pairs."""
+    rng = random.Random(seed)
+    course_codes = list(catalog.courses)
+    completed = {student: set(codes) for student, codes in population.items()}
+
+    def toggle_course(client, student_number):
+        # Tick or untick one course, as a student does in the study plan page
+        code = rng.choice(course_codes)
+        if code in completed[student_number]:
+            completed[student_number].discard(code)
+            changes = {"remove": [code]}
+        else:
+            completed[student_number].add(code)
+            changes = {"add": [code]}
+        return client.patch("/save-study-plan", json=changes)
+
+    def export_excel(client, student_number):
+        rows = []
+        for code in rng.sample(course_codes, 5):
+            course = catalog.courses[code]
+            section = catalog.sections.get(code, (None,))[0]
+            rows.append(
+                [
+                    code,
+                    course.name,
+                    course.credit_hours,
+                    section.time if section else "",
+                    section.days if section else "",
+                ]
+            )
+        return client.post(
+            "/export-plan/excel", json={"plan": rows, "plan_type": "generated_plan"}
+        )
+
+    return [
+        ("dashboard", lambda client, student: client.get("/dashboard")),
+        ("study_plan", lambda client, student: client.get("/load-partial/study_plan")),
+        ("save_study_plan", toggle_course),
+        (
+            "generate_plan",
+            lambda client, student: client.post(
+                "/generate-plan", data={"credit_hours": "15", "alternatives": "3"}
+            ),
+        ),
+        (
+            "api_plan",
+            lambda client, student: client.post(
+                "/api/v1/plan", json={"credit_hours": 15, "alternatives": 3}
+            ),
+        ),
+        ("export_plan_excel", export_excel),
+    ]
+
+
+def compare(results, baseline, threshold):
+    """
+    Print p95 changes against an earlier run.
+    :return: Names of benchmarks whose p95 grew by more than threshold percent.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<22}{'base p95':>10}{'p95':>10}{'change':>9}")
+    for name, summary in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            print(f"{name:<22}{'-':>10}{summary['p95_ms']:>10.2f}{'new':>9}")
+            continue
+        change = (
+            (summary["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+            if before["p95_ms"]
+            else 0.0
+        )
+        flag = " !" if change > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(
+            f"{name:<22}{before['p95_ms']:>10.2f}{summary['p95_ms']:>10.2f}"
+            f"{change:>+8.1f}%{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--depth", type=int, default=6, help="Prerequisite levels")
+    parser.add_argument("--max-sections", type=int, default=3)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Earlier results JSON file to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="p95 regression threshold in percent"
+    )
+    args = parser.parse_args()
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    output = os.path.abspath(args.output) if args.output else None
+
+    # Build everything in a scratch directory so the real database is never touched
+    workdir = tempfile.mkdtemp()
+    os.makedirs(os.path.join(workdir, "data"))
+    os.chdir(workdir)
+    sys.path.insert(0, workdir)
+    sys.path.insert(1, REPO_ROOT)
+
+    from models import database
+
+    counter = count_statements(database)
+    # Keep setup and the planner's debug output out of the report
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        catalog, population = build_database(args)
+
+        from app import create_app
+        from models.catalog import reload_catalog
+        from models.plan_cache import plan_cache
+        from models.planner import generate_schedules
+
+        client = create_app({"SECRET_KEY": "benchmark"}).test_client()
+        students = list(population)
+        random.Random(args.seed).shuffle(students)
+
+        results = {}
+        for name, send in request_scenarios(catalog, population, args.seed):
+            # Plans cached by an earlier scenario would turn this one into cache hits
+            plan_cache.clear()
+            results[name] = run_requests(
+                client, name, send, students, args.requests, counter
+            )
+
+        catalog = reload_catalog()
+        results["build_snapshot"] = time_calls(
+            lambda: reload_catalog(), [()] * min(args.requests, 20)
+        )
+        results["generate_schedules"] = time_calls(
+            lambda completed: generate_schedules(catalog, completed, 15, top_k=3),
+            [(set(population[student]),) for student in students[: args.requests]],
+        )
+        results["cohort_eligibility"] = time_calls(
+            lambda: catalog.eligibility.eligible_for_students(population), [()] * 5
+        )
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    report = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "courses": args.courses,
+            "depth": args.depth,
+            "max_sections": args.max_sections,
+            "students": args.students,
+            "requests": args.requests,
+            "seed": args.seed,
+        },
+        "catalog": {
+            "courses": len(catalog.courses),
+            "sections": sum(len(sections) for sections in catalog.sections.values()),
+            "prerequisites": sum(len(codes) for codes in catalog.prerequisites.values()),
+            "completed_courses": sum(len(codes) for codes in population.values()),
+        },
+        # ru_maxrss is KiB on Linux
+        "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "results": results,
+    }
+
+    print(
+        f"{report['catalog']['courses']} courses, {report['catalog']['sections']} sections, "
+        f"{args.students} students, {args.requests} requests per scenario"
+    )
+    print(
+        f"{'benchmark':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'stmts/req':>11}{'peak KiB':>10}"
+    )
+    for name, summary in results.items():
+        statements = summary.get("statements_per_request")
+        peak = summary.get("peak_kib")
+        print(
+            f"{name:<22}{summary['p50_ms']:>9.2f}{summary['p95_ms']:>9.2f}"
+            f"{summary['p99_ms']:>9.2f}"
+            f"{'-' if statements is None else f'{statements:.1f}':>11}"
+            f"{'-' if peak is None else f'{peak:.0f}':>10}"
+        )
+    print(f"max RSS {report['max_rss_kib'] / 1024:.1f} MiB")
+
+    if output:
+        with open(output, "w", encoding="utf-8") as results_file:
+            json.dump(report, results_file, indent=2)
+        print(f"Results written to {output}")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    if baseline is not None and compare(results, baseline, args.threshold):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
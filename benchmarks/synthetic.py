@@ -0,0 +1,190 @@
+"""
+Synthetic catalogs and student populations for benchmarks.
+
+A synthetic catalog has the same shape as a major's catalog module
+(data/courses_cis.py): courses_data rows with comma-separated prerequisite
+codes and course_of_study rows with "HH:MM AM-HH:MM PM" times and Arabic
+day letters, so it is loaded through models.db_operations like a real one.
+Courses are spread over levels; each course above the first requires at
+least one course of the level below it, which gives the prerequisite graph
+a realistic depth.
+
+A synthetic population is a cohort of students at different points of
+their degree. Each student is simulated semester by semester, taking a
+full load of courses whose prerequisites were completed in earlier
+semesters, so completed sets are always prerequisite-closed.
+
+Everything is driven by a seed, so the same arguments always produce the
+same catalog and population.
+"""
+
+import random
+
+from werkzeug.security import generate_password_hash
+
+# Password of every synthetic student
+PASSWORD = "Benchmark#1"
+
+CATEGORY_WEIGHTS = {
+    "mandatory_university": 0.10,
+    "elective_university": 0.10,
+    "mandatory_college": 0.15,
+    "mandatory_specialization": 0.50,
+    "elective_specialization": 0.15,
+}
+
+# Day-letter patterns and the length of each meeting in minutes
+MEETING_PATTERNS = (
+    ("ن ر", 90),
+    ("ح ث خ", 60),
+    ("ح ث", 90),
+    ("ن ر س", 60),
+    ("س", 90),
+)
+LAB_PATTERNS = (("ح", 180), ("ث", 180), ("ن", 180), ("ر", 180))
+
+# Sections start on the half hour between 08:00 AM and 05:00 PM
+FIRST_START = 8 * 60
+LAST_START = 17 * 60
+
+
+def format_time(minutes):
+    """Format minutes after midnight as a zero-padded 12-hour time, e.g. "02:30 PM"."""
+    hours, minutes = divmod(minutes, 60)
+    meridiem = "AM" if hours < 12 else "PM"
+    return f"{(hours - 1) % 12 + 1:02d}:{minutes:02d} {meridiem}"
+
+
+def synthetic_catalog(
+    courses=500, depth=6, max_sections=3, offered=0.7, lab_share=0.1, seed=0
+):
+    """
+    Generate a catalog.
+    :param courses: Number of courses.
+    :param depth: Number of course levels (the longest prerequisite chain).
+    :param max_sections: Most sections an offered course gets.
+    :param offered: Share of courses with at least one section this term.
+    :param lab_share: Share of one-hour lab courses (three-hour weekly meeting).
+    :return: A tuple (courses_data, course_of_study) in catalog module format.
+    """
+    rng = random.Random(seed)
+    categories = list(CATEGORY_WEIGHTS)
+    weights = list(CATEGORY_WEIGHTS.values())
+
+    levels = [[] for _ in range(depth)]
+    courses_data = []
+    course_of_study = []
+    for index in range(courses):
+        level = index * depth // courses
+        code = f"9{level + 1}{index:05d}"
+        lab = rng.random() < lab_share
+        name = f"Synthetic {'Lab' if lab else 'Course'} {index}"
+        credit_hours = 1 if lab else 3
+        category = rng.choices(categories, weights)[0]
+
+        prerequisites = []
+        if level:
+            # At least one course from the level below, sometimes more from any lower level
+            prerequisites.append(rng.choice(levels[level - 1]))
+            lower = [code for codes in levels[:level] for code in codes]
+            for _ in range(rng.choices((0, 1, 2), (0.5, 0.35, 0.15))[0]):
+                candidate = rng.choice(lower)
+                if candidate not in prerequisites:
+                    prerequisites.append(candidate)
+        levels[level].append(code)
+        courses_data.append(
+            (code, name, category, credit_hours, ",".join(prerequisites) or None)
+        )
+
+        if rng.random() >= offered:
+            continue
+        for _ in range(rng.randint(1, max_sections)):
+            days, length = rng.choice(LAB_PATTERNS if lab else MEETING_PATTERNS)
+            start = rng.randrange(FIRST_START, LAST_START + 1, 30)
+            time = f"{format_time(start)}-{format_time(start + length)}"
+            course_of_study.append((code, name, credit_hours, time, days))
+
+    return courses_data, course_of_study
+
+
+def write_catalog_module(path, courses_data, course_of_study):
+    """Write a catalog as an importable module for models.db_operations.load_catalog."""
+    with open(path, "w", encoding="utf-8") as module:
+        module.write("courses_data = [\n")
+        for row in courses_data:
+            module.write(f"    {row!r},\n")
+        module.write("]\n\ncourse_of_study = [\n")
+        for row in course_of_study:
+            module.write(f"    {row!r},\n")
+        module.write("]\n")
+
+
+def synthetic_population(catalog, students=1000, semesters=8, hours_per_semester=15, seed=0):
+    """
+    Generate students with realistic completion histories.
+    :param catalog: The CatalogSnapshot the students study under.
+    :param semesters: Semesters in a degree; each student has finished between
+                      none and all of them, first-years being the most common.
+    :return: A dict mapping student number to {course code: grade}.
+    """
+    rng = random.Random(seed)
+    eligibility = catalog.eligibility
+    # Cohorts shrink over the degree as students graduate or drop out
+    year_weights = [semesters - semester + 2 for semester in range(semesters + 1)]
+
+    population = {}
+    for index in range(students):
+        semesters_done = rng.choices(range(semesters + 1), year_weights)[0]
+        completed = {}
+        for _ in range(semesters_done):
+            # Courses taken together in a semester can't depend on each other
+            options = eligibility.eligible_codes(completed, offered_only=False)
+            rng.shuffle(options)
+            load = rng.randint(hours_per_semester - 3, hours_per_semester + 3)
+            for code in options:
+                credit_hours = catalog.courses[code].credit_hours
+                if credit_hours > load:
+                    continue
+                load -= credit_hours
+                completed[code] = round(rng.triangular(50, 100, 78), 1)
+                if load <= 0:
+                    break
+        population[f"9{index:011d}"] = completed
+    return population
+
+
+def store_population(cursor, population, password=PASSWORD):
+    """
+    Register a synthetic population and its completed courses. The caller commits.
+    Every student shares one password hash, computed once.
+    """
+    password_hash = generate_password_hash(password)
+    cursor.executemany(
+        "INSERT INTO users (student_number, password) VALUES (?, ?)",
+        [(student_number, password_hash) for student_number in population],
+    )
+    cursor.executemany(
+        """
+        INSERT INTO student_info (student_number, name, major, email, phone_number, address)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                student_number,
+                f"Student {student_number}",
+                "Synthetic",
+                f"{student_number}@example.edu",
+                None,
+                None,
+            )
+            for student_number in population
+        ],
+    )
+    cursor.executemany(
+        "INSERT INTO completed_courses (student_number, course_code, grade) VALUES (?, ?, ?)",
+        [
+            (student_number, code, grade)
+            for student_number, completed in population.items()
+            for code, grade in completed.items()
+        ],
+    )
@@ -0,0 +1,18 @@
+"""
+Who may see what: admin checks and job ownership for the current request.
+
+Admins are the student numbers listed in the ADMIN_USERS setting.
+"""
+
+from flask import current_app, session
+
+
+def is_admin(student_number):
+    """Return True if the user may run cohort-wide operations."""
+    return student_number in current_app.config.get("ADMIN_USERS", ())
+
+
+def job_owner():
+    """Return the owner to check jobs against (None lets admins see every job)."""
+    student_number = session.get("student_number")
+    return None if is_admin(student_number) else student_number
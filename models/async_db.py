@@ -0,0 +1,60 @@
+"""
+Blocking database work from coroutines.
+
+sqlite3 calls block, so the coroutines of the ASGI entry point (asgi.py:
+the startup catalog load and job long-polls) run them on a dedicated
+executor with one thread per pooled connection: the event loop never
+waits on SQLite, and no more statements run at once than the pool has
+connections. Flask handlers stay synchronous and query SQLite on the
+thread running their request.
+
+    status = await async_db.run_sync(jobs.job_queue.status, job_id)
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from models import database
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                database.pool.max_connections, thread_name_prefix="sqlite"
+            )
+        return _executor
+
+
+async def run_sync(function, *args, **kwargs):
+    """Run a blocking function that uses the database on the SQLite executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(function, *args, **kwargs)
+    )
+
+
+def shutdown():
+    """Stop the executor's threads once pending calls finish."""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def _reset_after_fork():
+    # Executor threads don't survive a fork; the child starts its own on first use
+    global _executor, _lock
+    _executor = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,217 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
+from models.catalog_validation import GraphReport, validate_prerequisites
+from models.database import connection
+from models.eligibility import EligibilityIndex
+from models.schedule import make_section
+from models.unlocks import UnlockIndex
+
+# Credit hours required in each course category to graduate
+DEFAULT_CATEGORY_LIMITS = {
+    "mandatory_university": 21,
+    "elective_university": 6,
+    "mandatory_college": 24,
+    "mandatory_specialization": 74,
+    "elective_specialization": 9,
+}
+
+# How often (in seconds) a worker checks the database for a newer catalog version
+REFRESH_INTERVAL = 5.0
+
+
+class Course(NamedTuple):
+    code: str
+    name: str
+    category: str
+    credit_hours: int
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Read-only view of the course catalog shared by every request.
+
+    A snapshot is never mutated after it is built; reloading the catalog
+    builds a new snapshot and swaps the module-level reference to it.
+    """
+
+    version: int
+    courses: Mapping[str, Course]
+    sections: Mapping[str, tuple]
+    prerequisites: Mapping[str, frozenset]
+    category_limits: Mapping[str, int]
+    eligibility: EligibilityIndex
+    unlocks: UnlockIndex
+    validation: GraphReport
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def ensure_catalog_meta(cursor):
+    """Create the table holding the catalog version if it does not exist."""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS catalog_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        """
+    )
+
+
+def read_catalog_version(cursor):
+    """
+    Return the catalog version stored in the database.
+    :param cursor: An open cursor on the catalog database.
+    :return: The stored version, or 0 if the catalog was never versioned.
+    """
+    try:
+        cursor.execute("SELECT value FROM catalog_meta WHERE key = 'catalog_version'")
+    except sqlite3.OperationalError:
+        return 0
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def bump_catalog_version(cursor):
+    """
+    Increment the stored catalog version so every worker rebuilds its snapshot.
+    The caller is responsible for committing the transaction.
+    :return: The new catalog version.
+    """
+    ensure_catalog_meta(cursor)
+    cursor.execute(
+        """
+        INSERT INTO catalog_meta (key, value) VALUES ('catalog_version', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+        """
+    )
+    return read_catalog_version(cursor)
+
+
+def build_snapshot(cursor):
+    """
+    Read the catalog tables once and build an immutable snapshot from them.
+    :param cursor: An open cursor on the catalog database.
+    :return: A CatalogSnapshot.
+    """
+    version = read_catalog_version(cursor)
+
+    cursor.execute(
+        "SELECT course_code, course_name, category, credit_hours FROM courses"
+    )
+    courses = {row[0]: Course(*row) for row in cursor.fetchall()}
+
+    # Times are parsed here, once per catalog version, never per request
+    cursor.execute(
+        """
+        SELECT course_code, section_number, time, days, capacity
+        FROM course_of_study
+        ORDER BY course_code, section_number
+        """
+    )
+    sections = {}
+    for course_code, section_number, time_range, days, capacity in cursor.fetchall():
+        course_sections = sections.setdefault(course_code, [])
+        try:
+            section = make_section(
+                course_code, section_number, time_range, days, capacity
+            )
+        except ValueError as e:
+            print(f"Skipping section of {course_code}: {e}")
+            continue
+        course_sections.append(section)
+    sections = {code: rows for code, rows in sections.items() if rows}
+
+    cursor.execute("SELECT course_code, prerequisite_code FROM course_prerequisites")
+    prerequisites = {}
+    for course_code, prerequisite_code in cursor.fetchall():
+        prerequisites.setdefault(course_code, set()).add(prerequisite_code)
+
+    # Older databases have no category_limits table yet
+    category_limits = dict(DEFAULT_CATEGORY_LIMITS)
+    try:
+        cursor.execute("SELECT category, required_hours FROM category_limits")
+        category_limits.update(cursor.fetchall())
+    except sqlite3.OperationalError:
+        pass
+
+    # Courses requiring a code that is not a course can never be taken, so
+    # they are left out of every eligibility check. Courses merely depending
+    # on them stay in: a student's record may already include the blocked one.
+    validation = validate_prerequisites(courses, prerequisites)
+    if not validation.ok:
+        print(
+            f"Catalog version {version}: {len(validation.unreachable)} course(s) "
+            "cannot be reached from an empty record; see /catalog/validation"
+        )
+
+    return CatalogSnapshot(
+        version=version,
+        courses=MappingProxyType(courses),
+        sections=MappingProxyType(
+            {code: tuple(rows) for code, rows in sections.items()}
+        ),
+        prerequisites=MappingProxyType(
+            {code: frozenset(codes) for code, codes in prerequisites.items()}
+        ),
+        category_limits=MappingProxyType(category_limits),
+        eligibility=EligibilityIndex(
+            courses, prerequisites, sections, validation.dangling
+        ),
+        unlocks=UnlockIndex(courses, prerequisites),
+        validation=validation,
+    )
+
+
+def reload_catalog():
+    """
+    Rebuild the snapshot from the database and atomically swap it in.
+    :return: The new CatalogSnapshot.
+    """
+    global _snapshot, _last_check
+
+    with _lock:
+        with connection() as conn:
+            snapshot = build_snapshot(conn.cursor())
+        _snapshot = snapshot
+        _last_check = time.monotonic()
+    return snapshot
+
+
+def _refresh_if_stale():
+    """Rebuild the snapshot if another process bumped the stored catalog version."""
+    global _last_check
+
+    with _lock:
+        if time.monotonic() - _last_check < REFRESH_INTERVAL and _snapshot:
+            return _snapshot
+        with connection() as conn:
+            stored_version = read_catalog_version(conn.cursor())
+        _last_check = time.monotonic()
+        current = _snapshot
+    if current is None or current.version != stored_version:
+        return reload_catalog()
+    return current
+
+
+def get_catalog():
+    """
+    Return the current catalog snapshot, building it on first use.
+
+    The stored catalog version is checked at most once every REFRESH_INTERVAL
+    seconds, so reloads done by other workers are picked up without scanning
+    the catalog tables on every request.
+    """
+    snapshot = _snapshot
+    if snapshot is None or time.monotonic() - _last_check >= REFRESH_INTERVAL:
+        snapshot = _refresh_if_stale()
+    return snapshot
@@ -0,0 +1,142 @@
+"""
+Prerequisite graph validation.
+
+Checks a catalog's prerequisite graph in linear time for the three ways a
+course can end up impossible to take: a prerequisite code that is not a
+course (dangling reference), a prerequisite cycle, or depending directly or
+transitively on either (unreachable). The loader runs it before writing a
+catalog, and the snapshot uses it to skip courses with dangling references
+in every eligibility check.
+"""
+
+from typing import NamedTuple
+
+
+class GraphReport(NamedTuple):
+    cycles: list  # Each cycle's course codes (a strongly connected component)
+    dangling: dict  # Course code -> prerequisite codes that are not courses
+    unreachable: list  # Courses no student starting from scratch can reach, in catalog order
+
+    @property
+    def ok(self):
+        return not (self.cycles or self.dangling or self.unreachable)
+
+    def summary(self):
+        """Return the report as printable lines."""
+        lines = []
+        for course_code, missing in self.dangling.items():
+            lines.append(f"{course_code} requires unknown course(s) {', '.join(missing)}")
+        for cycle in self.cycles:
+            lines.append(f"prerequisite cycle: {' -> '.join(cycle + [cycle[0]])}")
+        if self.unreachable:
+            lines.append(
+                f"{len(self.unreachable)} course(s) cannot be reached from an empty record: "
+                f"{', '.join(self.unreachable)}"
+            )
+        return lines
+
+
+class CatalogValidationError(ValueError):
+    """Raised when a catalog is rejected because its prerequisite graph is invalid."""
+
+    def __init__(self, report):
+        super().__init__("; ".join(report.summary()))
+        self.report = report
+
+
+def _strongly_connected(codes, edges):
+    """
+    Tarjan's algorithm without recursion.
+    :param edges: Mapping of code -> list of codes it points to.
+    :return: The components, each a list of codes.
+    """
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in codes:
+        if root in index:
+            continue
+        work = [(root, iter(edges.get(root, ())))]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, neighbours = work[-1]
+            advanced = False
+            for neighbour in neighbours:
+                if neighbour not in index:
+                    index[neighbour] = lowlink[neighbour] = counter
+                    counter += 1
+                    stack.append(neighbour)
+                    on_stack.add(neighbour)
+                    work.append((neighbour, iter(edges.get(neighbour, ()))))
+                    advanced = True
+                    break
+                if neighbour in on_stack:
+                    lowlink[node] = min(lowlink[node], index[neighbour])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def validate_prerequisites(course_codes, prerequisites):
+    """
+    Validate a prerequisite graph.
+    :param course_codes: Course codes in catalog order.
+    :param prerequisites: Mapping of course code to its prerequisite codes.
+    :return: A GraphReport.
+    """
+    codes = list(course_codes)
+    known = set(codes)
+    order = {code: position for position, code in enumerate(codes)}
+
+    edges = {}  # course -> its prerequisites that are courses
+    dependents = {}  # prerequisite -> courses requiring it
+    dangling = {}
+    for code in codes:
+        for prerequisite_code in sorted(prerequisites.get(code, ())):
+            if prerequisite_code in known:
+                edges.setdefault(code, []).append(prerequisite_code)
+                dependents.setdefault(prerequisite_code, []).append(code)
+            else:
+                dangling.setdefault(code, []).append(prerequisite_code)
+
+    cycles = []
+    for component in _strongly_connected(codes, edges):
+        if len(component) > 1 or component[0] in edges.get(component[0], ()):
+            cycles.append(sorted(component, key=order.get))
+
+    # Everything depending on a dangling reference or a cycle is unreachable too
+    unreachable = set(dangling)
+    for cycle in cycles:
+        unreachable.update(cycle)
+    pending = list(unreachable)
+    while pending:
+        for dependent in dependents.get(pending.pop(), ()):
+            if dependent not in unreachable:
+                unreachable.add(dependent)
+                pending.append(dependent)
+
+    return GraphReport(
+        sorted(cycles, key=lambda cycle: order[cycle[0]]),
+        dangling,
+        sorted(unreachable, key=order.get),
+    )
@@ -0,0 +1,194 @@
+"""
+Cohort-wide batch planning.
+
+Plans the next semester for every registered student ahead of registration:
+the catalog is loaded once, every student's completed courses come from a
+single query, students with the same history are planned once, and the
+distinct histories are sharded across a process pool. Results are written
+to student_plans in one bulk transaction.
+
+    python -m models.cohort_plans [--credit-hours 15] [--processes N]
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+
+from models import database
+from models.catalog import get_catalog
+from models.eligibility import fetch_cohort
+from models.planner import DEFAULT_TIME_BUDGET, generate_schedules
+
+DEFAULT_CREDIT_HOURS = 15
+
+# Distinct histories handed to a worker at a time
+DEFAULT_CHUNK_SIZE = 64
+
+# Catalog snapshot used by pool workers; forked workers inherit the parent's
+_catalog = None
+
+
+def _init_worker():
+    global _catalog
+    if _catalog is None:
+        _catalog = get_catalog()
+
+
+def _plan_chunk(chunk, credit_hours, time_budget):
+    """
+    Plan a chunk of distinct completed-course histories.
+    :param chunk: List of sorted completed-code tuples.
+    :return: List of (history, total hours, [(course code, section number)], complete).
+    """
+    planned = []
+    for history in chunk:
+        _, result = generate_schedules(_catalog, set(history), credit_hours, 1, time_budget)
+        if result.schedules:
+            best = result.schedules[0]
+            sections = [
+                (course.code, section.section_number) for course, section in best.sections
+            ]
+            planned.append((history, best.total_hours, sections, result.complete))
+        else:
+            planned.append((history, 0, [], result.complete))
+    return planned
+
+
+def plan_cohort_schedules(
+    cohort,
+    credit_hours=DEFAULT_CREDIT_HOURS,
+    processes=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    time_budget=DEFAULT_TIME_BUDGET,
+):
+    """
+    Plan the next semester for many students.
+    :param cohort: A dict mapping student number to completed course codes.
+    :param processes: Pool size (defaults to the CPU count; 1 plans in-process).
+    :return: A dict mapping student number to (total hours, sections, complete).
+    """
+    global _catalog
+    _catalog = get_catalog()
+
+    # Students with identical histories get identical plans
+    histories = {}
+    for student_number, completed in cohort.items():
+        history = tuple(sorted(code for code in completed if code in _catalog.courses))
+        histories.setdefault(history, []).append(student_number)
+
+    distinct = sorted(histories)
+    chunks = [distinct[i : i + chunk_size] for i in range(0, len(distinct), chunk_size)]
+    processes = processes or os.cpu_count() or 1
+
+    if processes == 1 or len(chunks) <= 1:
+        results = [_plan_chunk(chunk, credit_hours, time_budget) for chunk in chunks]
+    else:
+        with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+            results = pool.starmap(
+                _plan_chunk,
+                [(chunk, credit_hours, time_budget) for chunk in chunks],
+                chunksize=1,
+            )
+
+    plans = {}
+    for planned in results:
+        for history, total_hours, sections, complete in planned:
+            for student_number in histories[history]:
+                plans[student_number] = (total_hours, sections, complete)
+    return plans
+
+
+def store_plans(cursor, plans, credit_hours, catalog_version):
+    """Write the planned schedules to student_plans with one executemany."""
+    generated_at = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+    cursor.executemany(
+        """
+        INSERT INTO student_plans
+            (student_number, credit_hours, total_hours, sections, complete,
+             catalog_version, generated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(student_number) DO UPDATE SET
+            credit_hours = excluded.credit_hours,
+            total_hours = excluded.total_hours,
+            sections = excluded.sections,
+            complete = excluded.complete,
+            catalog_version = excluded.catalog_version,
+            generated_at = excluded.generated_at
+        """,
+        [
+            (
+                student_number,
+                credit_hours,
+                total_hours,
+                json.dumps(sections),
+                int(complete),
+                catalog_version,
+                generated_at,
+            )
+            for student_number, (total_hours, sections, complete) in plans.items()
+        ],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Plan the next semester for every registered student."
+    )
+    parser.add_argument("--credit-hours", type=int, default=DEFAULT_CREDIT_HOURS)
+    parser.add_argument(
+        "--processes", type=int, default=None, help="Worker processes (default: CPU count)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=DEFAULT_TIME_BUDGET,
+        help="Seconds the schedule search may spend per distinct history",
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    catalog = get_catalog()
+    with database.connection() as connection:
+        cohort = fetch_cohort(connection.cursor())
+
+    plans = plan_cohort_schedules(
+        cohort, args.credit_hours, args.processes, args.chunk_size, args.time_budget
+    )
+    planned = time.perf_counter()
+
+    with database.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            store_plans(cursor, plans, args.credit_hours, catalog.version)
+            connection.commit()
+        except sqlite3.Error as e:
+            connection.rollback()
+            print(f"Error storing cohort plans: {e}")
+            raise SystemExit(1)
+    finished = time.perf_counter()
+
+    distinct = len(
+        {
+            tuple(sorted(code for code in completed if code in catalog.courses))
+            for completed in cohort.values()
+        }
+    )
+    elapsed = finished - started
+    print(
+        f"Planned {len(plans)} students ({distinct} distinct histories) "
+        f"with {args.processes or os.cpu_count() or 1} processes."
+    )
+    print(
+        f"Planning {planned - started:.2f}s, storing {finished - planned:.2f}s, "
+        f"{len(plans) / elapsed if elapsed else 0:.1f} students/sec."
+    )
+
+
+if __name__ == "__main__":
+    main()
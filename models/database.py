@@ -0,0 +1,181 @@
+"""
+Shared SQLite data-access layer.
+
+Connections are opened once, tuned with WAL journaling and cache pragmas,
+and kept in a bounded pool. A Flask request checks out one connection on
+first use (get_db) and returns it at teardown, so every query of a request
+runs on the same connection and each connection's prepared-statement cache
+is reused across requests. Scripts use the `connection()` context manager.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from flask import g, has_app_context
+
+from models.metrics import InstrumentedConnection
+
+DATABASE_PATH = os.path.abspath("data/university_courses.db")
+
+# Maximum number of connections open at once (one per busy worker thread)
+POOL_SIZE = 8
+
+# Seconds a request waits for a free connection before giving up
+POOL_TIMEOUT = 10.0
+
+# Prepared statements kept per connection (sqlite3's statement LRU cache)
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = (
+    ("journal_mode", "WAL"),  # Readers don't block the writer
+    ("synchronous", "NORMAL"),  # Safe with WAL, far fewer fsyncs
+    ("cache_size", -16000),  # Page cache in KiB (negative) per connection
+    ("mmap_size", 64 * 1024 * 1024),
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000),
+)
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no connection becomes free within POOL_TIMEOUT seconds."""
+
+
+class ConnectionPool:
+    def __init__(self, path, max_connections=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.path = path
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.checkouts = 0
+
+    def _connect(self):
+        connection = sqlite3.connect(
+            self.path,
+            check_same_thread=False,  # Only one thread uses it at a time
+            cached_statements=STATEMENT_CACHE_SIZE,
+            factory=InstrumentedConnection,  # Times every statement for /metrics
+        )
+        for name, value in PRAGMAS:
+            connection.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            self.connections_opened += 1
+        return connection
+
+    def acquire(self):
+        """Check out a connection, opening one if none is idle."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout("Timed out waiting for a database connection.")
+        with self._lock:
+            self.checkouts += 1
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, connection):
+        """Return a connection to the pool, rolling back anything left uncommitted."""
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close when returned)."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self):
+        return {
+            "connections_opened": self.connections_opened,
+            "checkouts": self.checkouts,
+            "idle": self._idle.qsize(),
+            "max_connections": self.max_connections,
+        }
+
+
+pool = ConnectionPool(DATABASE_PATH)
+
+
+def _reset_after_fork():
+    # SQLite connections must not be shared with a forked child (gunicorn
+    # --preload, multiprocessing); the child starts with an empty pool
+    global pool
+    pool = ConnectionPool(pool.path, pool.max_connections, pool.timeout)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def configure(path=None, max_connections=None):
+    """
+    Point the shared pool at another database file or change its size.
+    Existing idle connections are closed.
+    """
+    global pool, DATABASE_PATH
+
+    pool.close_all()
+    if path:
+        DATABASE_PATH = os.path.abspath(path)
+    pool = ConnectionPool(DATABASE_PATH, max_connections or pool.max_connections)
+    return pool
+
+
+@contextmanager
+def connection():
+    """
+    Borrow a pooled connection. Inside a request that already holds one, that
+    connection is reused so a request never waits on a second pool slot.
+    """
+    if has_app_context() and "db" in g:
+        yield g.db
+        return
+    with pool.connection() as pooled:
+        yield pooled
+
+
+def get_db():
+    """
+    Return the connection of the current request, checking one out on first use.
+    """
+    if "db" not in g:
+        g.db = pool.acquire()
+        g.db_pool = pool
+    return g.db
+
+
+def close_db(exception=None):
+    """Return the request's connection to the pool at teardown."""
+    connection = g.pop("db", None)
+    if connection is not None:
+        g.pop("db_pool").release(connection)
+
+
+def init_app(app):
+    """Register the per-request connection teardown with a Flask app."""
+    if app.config.get("DATABASE"):
+        configure(app.config["DATABASE"])
+    app.teardown_appcontext(close_db)
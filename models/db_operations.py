@@ -1,47 +1,213 @@
+import argparse
+import importlib
 import sqlite3
-from data.courses_cis import courses_data, course_of_study
+from models import database
+from models.catalog import bump_catalog_version
+from models.catalog_validation import CatalogValidationError, validate_prerequisites
 
-DATABASE_PATH = "data/university_courses.db"
+# Default catalog module loaded by the CLI
+DEFAULT_CATALOG_MODULE = "data.courses_cis"
 
 
-def insert_courses_and_prerequisites():
-    """Insert courses and their prerequisites into the database."""
-    connection = sqlite3.connect(DATABASE_PATH)
-    cursor = connection.cursor()
+def read_catalog_module(module_name):
+    """
+    Import a major's catalog module and normalise its rows.
+    :param module_name: Dotted module name, e.g. "data.courses_cis".
+    :return: A tuple (courses, prerequisites, sections) where courses maps
+             code -> (name, category, credit_hours), prerequisites is a set of
+             (course_code, prerequisite_code) and sections maps
+             (course_code, section_number) -> (name, credit_hours, time, days).
+    """
+    module = importlib.import_module(module_name)
 
-    try:
-        for course in courses_data:
-            course_code, course_name, category, credit_hours, prerequisites = course
+    courses = {}
+    prerequisites = set()
+    for course_code, course_name, category, credit_hours, prereqs in module.courses_data:
+        courses[course_code] = (course_name, category, credit_hours)
+        if prereqs:
+            for prereq in prereqs.split(","):  # Split multiple prerequisites
+                prerequisites.add((course_code, prereq.strip()))
+
+    # Sections are numbered in the order they are listed
+    sections = {}
+    section_numbers = {}
+    for course in module.course_of_study:
+        course_code, course_name, credit_hours, time, days = course[:5]
+        section_numbers[course_code] = section_numbers.get(course_code, 0) + 1
+        sections[(course_code, section_numbers[course_code])] = (
+            course_name,
+            credit_hours,
+            time,
+            days,
+        )
+
+    return courses, prerequisites, sections
+
+
+def _diff(current, desired, in_scope):
+    """
+    Compare two {key: value} mappings.
+    :param in_scope: Predicate telling whether a key missing from desired may be removed.
+    :return: A tuple (added, changed, removed) of key lists.
+    """
+    added = [key for key in desired if key not in current]
+    changed = [key for key in desired if key in current and current[key] != desired[key]]
+    removed = [key for key in current if key not in desired and in_scope(key)]
+    return added, changed, removed
 
-            # Insert course
+
+def load_catalog(
+    module_name=DEFAULT_CATALOG_MODULE, prune=False, dry_run=False, strict=False, keep=()
+):
+    """
+    Bulk-load a major's catalog module, applying only the differences.
+
+    Everything runs in one transaction with executemany. Prerequisites and
+    sections of the courses defined by the module are replaced by the
+    module's rows; courses that are not in the module are only removed when
+    prune is set, so several majors can share the database. The catalog
+    version is bumped whenever anything changed.
+
+    The prerequisite graph of the resulting catalog is validated first;
+    cycles, references to unknown courses and courses that can therefore
+    never be taken are reported, and with strict the load is rejected.
+
+    :param module_name: Dotted module name of the catalog, e.g. "data.courses_cis".
+    :param prune: Also remove courses (and their rows) missing from the module.
+    :param keep: Course codes prune leaves in place, e.g. those of the other
+                 modules loaded in the same run.
+    :param dry_run: Compute the report without writing anything.
+    :param strict: Reject a catalog whose prerequisite graph has problems.
+    :return: A dict mapping each table to {"added", "changed", "removed"} counts,
+             plus "validation" holding the GraphReport.
+    :raises CatalogValidationError: If strict and the graph has problems.
+    """
+    courses, prerequisites, sections = read_catalog_module(module_name)
+
+    with database.connection() as connection:
+        cursor = connection.cursor()
+        # Take the write lock up front so the diff can't go stale
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute(
+                "SELECT course_code, course_name, category, credit_hours FROM courses"
+            )
+            current_courses = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+            cursor.execute(
+                "SELECT course_code, prerequisite_code FROM course_prerequisites"
+            )
+            current_prerequisites = {row: None for row in cursor.fetchall()}
             cursor.execute(
                 """
-                INSERT OR IGNORE INTO courses (course_code, course_name, category, credit_hours)
-                VALUES (?, ?, ?, ?)
-            """,
-                (course_code, course_name, category, credit_hours),
+                SELECT course_code, section_number, course_name, credit_hours, time, days
+                FROM course_of_study
+                """
             )
+            current_sections = {
+                (row[0], row[1]): tuple(row[2:]) for row in cursor.fetchall()
+            }
+
+            def prunable(course_code):
+                return prune and course_code not in keep
 
-            # Insert prerequisites
-            if prerequisites:
-                prerequisite_codes = prerequisites.split(
-                    ","
-                )  # Split multiple prerequisites
-                for prereq in prerequisite_codes:
-                    cursor.execute(
-                        """
-                        INSERT OR IGNORE INTO course_prerequisites (course_code, prerequisite_code)
-                        VALUES (?, ?)
+            def owned(course_code):
+                return course_code in courses or prunable(course_code)
+
+            course_diff = _diff(current_courses, courses, prunable)
+            prerequisite_diff = _diff(
+                current_prerequisites,
+                dict.fromkeys(prerequisites),
+                lambda key: owned(key[0]),
+            )
+            section_diff = _diff(
+                current_sections, sections, lambda key: owned(key[0])
+            )
+
+            # Validate the catalog as it will be after this load
+            final_courses = [
+                code for code in current_courses if code not in course_diff[2]
+            ] + course_diff[0]
+            final_prerequisites = {}
+            for course_code, prerequisite_code in (
+                set(current_prerequisites) - set(prerequisite_diff[2])
+            ) | prerequisites:
+                final_prerequisites.setdefault(course_code, set()).add(prerequisite_code)
+            validation = validate_prerequisites(final_courses, final_prerequisites)
+            if strict and not validation.ok:
+                raise CatalogValidationError(validation)
+
+            if not dry_run:
+                added, changed, removed = prerequisite_diff
+                cursor.executemany(
+                    """
+                    DELETE FROM course_prerequisites
+                    WHERE course_code = ? AND prerequisite_code = ?
+                    """,
+                    removed,
+                )
+                added, changed, removed = section_diff
+                cursor.executemany(
+                    "DELETE FROM course_of_study WHERE course_code = ? AND section_number = ?",
+                    removed,
+                )
+                added, changed, removed = course_diff
+                cursor.executemany(
+                    "DELETE FROM courses WHERE course_code = ?",
+                    [(code,) for code in removed],
+                )
+                cursor.executemany(
+                    """
+                    INSERT INTO courses (course_code, course_name, category, credit_hours)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(course_code) DO UPDATE SET
+                        course_name = excluded.course_name,
+                        category = excluded.category,
+                        credit_hours = excluded.credit_hours
+                    """,
+                    [(code, *courses[code]) for code in added + changed],
+                )
+                added, changed, removed = prerequisite_diff
+                cursor.executemany(
+                    """
+                    INSERT INTO course_prerequisites (course_code, prerequisite_code)
+                    VALUES (?, ?)
+                    """,
+                    added,
+                )
+                added, changed, removed = section_diff
+                cursor.executemany(
+                    """
+                    INSERT INTO course_of_study
+                        (course_code, section_number, course_name, credit_hours, time, days)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(course_code, section_number) DO UPDATE SET
+                        course_name = excluded.course_name,
+                        credit_hours = excluded.credit_hours,
+                        time = excluded.time,
+                        days = excluded.days
                     """,
-                        (course_code, prereq.strip()),
-                    )
+                    [(*key, *sections[key]) for key in added + changed],
+                )
 
-        connection.commit()
-        print("Courses and prerequisites inserted successfully.")
-    except sqlite3.Error as e:
-        print(f"Error inserting data: {e}")
-    finally:
-        connection.close()
+            report = {
+                table: dict(zip(("added", "changed", "removed"), map(len, diff)))
+                for table, diff in (
+                    ("courses", course_diff),
+                    ("course_prerequisites", prerequisite_diff),
+                    ("course_of_study", section_diff),
+                )
+            }
+            has_changes = any(any(counts.values()) for counts in report.values())
+            report["validation"] = validation
+            if has_changes and not dry_run:
+                # Let running workers know their catalog snapshot is out of date
+                report["catalog_version"] = bump_catalog_version(cursor)
+            connection.commit()
+        except (sqlite3.Error, CatalogValidationError):
+            connection.rollback()
+            raise
+
+    return report
 
 
 def fetch_prerequisites(course_code):
@@ -50,7 +216,7 @@ def fetch_prerequisites(course_code):
     :param course_code: The code of the course whose prerequisites you want to retrieve.
     :return: A list of prerequisite course codes.
     """
-    connection = sqlite3.connect(DATABASE_PATH)
+    connection = database.pool.acquire()
     cursor = connection.cursor()
 
     try:
@@ -70,39 +236,71 @@ def fetch_prerequisites(course_code):
         print(f"Error fetching prerequisites: {e}")
         return []
     finally:
-        connection.close()
+        database.pool.release(connection)
 
 
-def insert_course_of_study():
-    """Insert data into the course_of_study table."""
-    connection = sqlite3.connect(DATABASE_PATH)
-    cursor = connection.cursor()
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load a major's catalog module into the course database."
+    )
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        default=[DEFAULT_CATALOG_MODULE],
+        help="Catalog modules to load, e.g. data.courses_cis",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Remove courses that are not defined by any of the loaded modules",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report the changes without applying them"
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Reject a catalog with prerequisite cycles or unknown prerequisite codes",
+    )
+    args = parser.parse_args()
 
-    try:
-        for course in course_of_study:
-            course_code, course_name, credit_hours, time, days = course[
-                :5
-            ]  # Only take relevant fields
+    # Prune against every module of the run, or each load would remove the
+    # courses of the modules loaded before it
+    keep = set()
+    if args.prune:
+        for module_name in args.modules:
+            keep.update(read_catalog_module(module_name)[0])
 
-            # Insert course into course_of_study table
-            cursor.execute(
-                """
-                INSERT OR IGNORE INTO course_of_study (course_code, course_name, credit_hours, time, days)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (course_code, course_name, credit_hours, time, days),
+    for module_name in args.modules:
+        try:
+            report = load_catalog(
+                module_name,
+                prune=args.prune,
+                dry_run=args.dry_run,
+                strict=args.strict,
+                keep=keep,
             )
+        except CatalogValidationError as e:
+            print(f"Rejected {module_name}:")
+            for line in e.report.summary():
+                print(f"  {line}")
+            raise SystemExit(1)
+        except sqlite3.Error as e:
+            print(f"Error loading {module_name}: {e}")
+            raise SystemExit(1)
 
-        connection.commit()
-        print("Course of study inserted successfully.")
-    except sqlite3.Error as e:
-        print(f"Error inserting course of study: {e}")
-    finally:
-        connection.close()
+        print(f"{module_name}{' (dry run)' if args.dry_run else ''}:")
+        for table in ("courses", "course_prerequisites", "course_of_study"):
+            counts = report[table]
+            print(
+                f"  {table}: {counts['added']} added, {counts['changed']} changed, "
+                f"{counts['removed']} removed"
+            )
+        if "catalog_version" in report:
+            print(f"  catalog version is now {report['catalog_version']}")
+        for line in report["validation"].summary():
+            print(f"  warning: {line}")
 
 
-insert_courses_and_prerequisites()
-insert_course_of_study()
-# course_code = "0601222"  # Example course code
-# prerequisites = fetch_prerequisites(course_code)
-# print(f"Prerequisites for course {course_code}: {prerequisites}")
+if __name__ == "__main__":
+    main()
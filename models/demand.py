@@ -0,0 +1,244 @@
+"""
+Section demand forecasting.
+
+The course_demand table counts, for every course, how many students are
+eligible to take it next term. It is kept up to date incrementally: when a
+student's completed courses change only the courses that enter or leave
+their eligible set are adjusted, and the table is rebuilt in bulk (one
+query plus the shared eligibility index) when the catalog version changes.
+
+A course's predicted demand is spread over its sections in proportion to
+their capacity. The balanced planner mode uses the same proportions to
+give each student a deterministic, capacity-weighted section preference,
+so students spread across sections instead of all landing in the first.
+
+    python -m models.demand --report [--top 20]
+    python -m models.demand --set-capacity 0601241 1 40
+    python -m models.demand --rebuild
+"""
+
+import argparse
+import hashlib
+import math
+import sqlite3
+from typing import NamedTuple
+
+from models import database
+from models.catalog import bump_catalog_version, get_catalog, reload_catalog
+from models.eligibility import fetch_cohort
+
+DEMAND_VERSION_KEY = "course_demand_version"
+
+
+class SectionDemand(NamedTuple):
+    course_code: str
+    section_number: int
+    capacity: int  # None if unlimited
+    predicted: float
+    load: float  # predicted / capacity, None if unlimited
+
+
+def _stored_version(cursor):
+    cursor.execute("SELECT value FROM catalog_meta WHERE key = ?", (DEMAND_VERSION_KEY,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def rebuild_course_demand(cursor, catalog=None):
+    """
+    Recount eligible students per course from completed_courses. The caller commits.
+    :return: A dict mapping course code to eligible students.
+    """
+    catalog = catalog or get_catalog()
+    cohort = fetch_cohort(cursor)
+    counts = {}
+    for codes in catalog.eligibility.eligible_for_students(cohort).values():
+        for code in codes:
+            counts[code] = counts.get(code, 0) + 1
+
+    cursor.execute("DELETE FROM course_demand")
+    cursor.executemany(
+        "INSERT INTO course_demand (course_code, eligible_students) VALUES (?, ?)",
+        counts.items(),
+    )
+    cursor.execute(
+        """
+        INSERT INTO catalog_meta (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """,
+        (DEMAND_VERSION_KEY, catalog.version),
+    )
+    return counts
+
+
+def update_course_demand(cursor, catalog, before, after):
+    """
+    Adjust the demand counts for one student whose completed courses changed.
+    Must run in the same transaction as the change; the caller commits.
+    :param before: The student's previous completed codes, or None for a new student.
+    :param after: The student's new completed codes.
+    """
+    if _stored_version(cursor) != catalog.version:
+        # Counts were built from another catalog; completed_courses already holds the change
+        rebuild_course_demand(cursor, catalog)
+        return
+
+    eligibility = catalog.eligibility
+    old_mask = 0 if before is None else eligibility.eligible_mask(eligibility.to_mask(before))
+    new_mask = eligibility.eligible_mask(eligibility.to_mask(after))
+    gained = eligibility.to_codes(new_mask & ~old_mask)
+    lost = eligibility.to_codes(old_mask & ~new_mask)
+
+    cursor.executemany(
+        """
+        INSERT INTO course_demand (course_code, eligible_students) VALUES (?, 1)
+        ON CONFLICT(course_code) DO UPDATE SET eligible_students = eligible_students + 1
+        """,
+        [(code,) for code in gained],
+    )
+    cursor.executemany(
+        """
+        UPDATE course_demand SET eligible_students = eligible_students - 1
+        WHERE course_code = ?
+        """,
+        [(code,) for code in lost],
+    )
+
+
+def get_course_demand(cursor, catalog=None):
+    """
+    Return eligible students per course, rebuilding the counts if they are stale.
+    The caller commits.
+    """
+    catalog = catalog or get_catalog()
+    if _stored_version(cursor) != catalog.version:
+        return rebuild_course_demand(cursor, catalog)
+    cursor.execute("SELECT course_code, eligible_students FROM course_demand")
+    return dict(cursor.fetchall())
+
+
+def _section_weights(sections):
+    # Capacities only compare meaningfully when every section has one
+    if sections and all(section.capacity for section in sections):
+        return [section.capacity for section in sections]
+    return [1] * len(sections)
+
+
+def section_demand(catalog, course_demand):
+    """
+    Spread each course's predicted demand over its sections by capacity.
+    :param course_demand: A dict mapping course code to eligible students.
+    :return: A list of SectionDemand, most loaded first.
+    """
+    rows = []
+    for code, sections in catalog.sections.items():
+        demand = course_demand.get(code, 0)
+        weights = _section_weights(sections)
+        total = sum(weights)
+        for section, weight in zip(sections, weights):
+            predicted = demand * weight / total
+            load = predicted / section.capacity if section.capacity else None
+            rows.append(
+                SectionDemand(code, section.section_number, section.capacity, predicted, load)
+            )
+    rows.sort(key=lambda row: (row.load is None, -(row.load or 0), -row.predicted))
+    return rows
+
+
+def balanced_section_order(student_number):
+    """
+    Return a section_order function for the planner that ranks each course's
+    sections with capacity-weighted rendezvous hashing. Every student gets a
+    stable order, and across students each section comes first with a
+    probability proportional to its capacity.
+    """
+
+    def score(section, weight):
+        digest = hashlib.blake2b(
+            f"{student_number}:{section.course_code}:{section.section_number}".encode(),
+            digest_size=8,
+        ).digest()
+        # Uniform in (0, 1); -ln(u) / weight is exponential with rate `weight`
+        uniform = (int.from_bytes(digest, "big") + 1) / (2**64 + 1)
+        return -math.log(uniform) / weight
+
+    def order(course_code, sections):
+        weights = _section_weights(sections)
+        ranked = sorted(zip(sections, weights), key=lambda pair: score(*pair))
+        return tuple(section for section, _ in ranked)
+
+    return order
+
+
+def set_capacity(cursor, course_code, section_number, capacity):
+    """
+    Set a section's seat capacity (None for unlimited) and bump the catalog
+    version so workers pick it up. The caller commits.
+    :return: True if the section exists.
+    """
+    cursor.execute(
+        "UPDATE course_of_study SET capacity = ? WHERE course_code = ? AND section_number = ?",
+        (capacity, course_code, section_number),
+    )
+    if not cursor.rowcount:
+        return False
+    bump_catalog_version(cursor)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast and inspect section demand.")
+    parser.add_argument(
+        "--report", action="store_true", help="List sections by predicted load"
+    )
+    parser.add_argument("--top", type=int, default=20, help="Sections to list in the report")
+    parser.add_argument(
+        "--set-capacity",
+        nargs=3,
+        metavar=("COURSE", "SECTION", "SEATS"),
+        help="Set a section's capacity (SEATS 0 means unlimited)",
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Recount demand from completed_courses"
+    )
+    args = parser.parse_args()
+    if not (args.report or args.set_capacity or args.rebuild):
+        parser.print_help()
+        return
+
+    with database.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            if args.set_capacity:
+                course_code, section_number, seats = args.set_capacity
+                if not set_capacity(cursor, course_code, int(section_number), int(seats) or None):
+                    print(f"No section {section_number} of {course_code}.")
+                    raise SystemExit(1)
+                connection.commit()
+                print(f"Capacity of {course_code} section {section_number} set to {seats}.")
+
+            catalog = reload_catalog() if args.set_capacity else get_catalog()
+            if args.rebuild:
+                counts = rebuild_course_demand(cursor, catalog)
+                connection.commit()
+                print(f"Rebuilt demand for {len(counts)} courses.")
+
+            if args.report:
+                demand = get_course_demand(cursor, catalog)
+                connection.commit()
+                print(f"{'course':<10}{'section':>8}{'capacity':>10}{'predicted':>11}{'load':>7}")
+                for row in section_demand(catalog, demand)[: args.top]:
+                    capacity = "-" if row.capacity is None else row.capacity
+                    load = "-" if row.load is None else f"{row.load:.2f}"
+                    print(
+                        f"{row.course_code:<10}{row.section_number:>8}{capacity:>10}"
+                        f"{row.predicted:>11.1f}{load:>7}"
+                    )
+        except sqlite3.Error as e:
+            connection.rollback()
+            print(f"Error updating section demand: {e}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Bitset-based prerequisite checks.
+
+Every course code in the catalog is mapped to a dense integer ID, so a set of
+courses becomes a single Python integer with one bit per course. Checking
+whether a student may take a course is then a single AND/compare against the
+course's prerequisite mask.
+"""
+
+
+class EligibilityIndex:
+    """
+    Precomputed prerequisite masks for one catalog snapshot.
+
+    Courses are numbered in catalog order; prerequisite codes that are not
+    part of the catalog get IDs after the last course so they can never be
+    satisfied, which matches the behaviour of the original subset check.
+    """
+
+    def __init__(self, course_codes, prerequisites, offered_codes, blocked_codes=()):
+        """
+        :param course_codes: Course codes in catalog order.
+        :param prerequisites: Mapping of course code to its prerequisite codes.
+        :param offered_codes: Codes of courses that have at least one section.
+        :param blocked_codes: Courses that can never become eligible (see
+                              models.catalog_validation); they are never checked.
+        """
+        codes = list(course_codes)
+        self.course_count = len(codes)
+        known = set(codes)
+        for course_code in codes:
+            for prerequisite_code in sorted(prerequisites.get(course_code, ())):
+                if prerequisite_code not in known:
+                    known.add(prerequisite_code)
+                    codes.append(prerequisite_code)
+
+        self.codes = tuple(codes)
+        self.ids = {code: course_id for course_id, code in enumerate(codes)}
+        self.all_courses_mask = (1 << self.course_count) - 1
+        self.offered_mask = self.to_mask(
+            code for code in offered_codes if code in self.ids
+        )
+
+        # Courses sharing the same prerequisite mask are checked together
+        groups = {}
+        blocked_codes = set(blocked_codes)
+        self.prerequisite_masks = []
+        for course_id in range(self.course_count):
+            mask = self.to_mask(prerequisites.get(self.codes[course_id], ()))
+            self.prerequisite_masks.append(mask)
+            if self.codes[course_id] in blocked_codes:
+                continue
+            groups[mask] = groups.get(mask, 0) | (1 << course_id)
+        self.groups = tuple(groups.items())
+
+    def to_mask(self, course_codes):
+        """Convert an iterable of course codes into a bitmask, ignoring unknown codes."""
+        mask = 0
+        ids = self.ids
+        for code in course_codes:
+            course_id = ids.get(code)
+            if course_id is not None:
+                mask |= 1 << course_id
+        return mask
+
+    def to_codes(self, mask):
+        """Convert a bitmask back into course codes, in catalog order."""
+        codes = []
+        while mask:
+            lowest = mask & -mask
+            codes.append(self.codes[lowest.bit_length() - 1])
+            mask ^= lowest
+        return codes
+
+    def eligible_mask(self, completed_mask, offered_only=True):
+        """
+        Return the mask of courses a student can take next.
+        :param completed_mask: Bitmask of the student's completed courses.
+        :param offered_only: Only include courses that have a section this term.
+        :return: Bitmask of uncompleted courses whose prerequisites are all completed.
+        """
+        eligible = 0
+        for prerequisite_mask, course_mask in self.groups:
+            if prerequisite_mask & completed_mask == prerequisite_mask:
+                eligible |= course_mask
+        eligible &= ~completed_mask
+        if offered_only:
+            eligible &= self.offered_mask
+        return eligible
+
+    def eligible_codes(self, completed_codes, offered_only=True):
+        """Return the codes of the courses a student can take, in catalog order."""
+        return self.to_codes(
+            self.eligible_mask(self.to_mask(completed_codes), offered_only)
+        )
+
+    def eligible_for_students(self, completed_by_student, offered_only=True):
+        """
+        Compute eligibility for many students at once.
+        :param completed_by_student: Mapping of student number to completed course codes.
+        :param offered_only: Only include courses that have a section this term.
+        :return: A dict mapping each student number to their eligible course codes.
+        """
+        results = {}
+        # Students with identical histories share the same answer
+        by_mask = {}
+        for student_number, completed_codes in completed_by_student.items():
+            completed_mask = self.to_mask(completed_codes)
+            if completed_mask not in by_mask:
+                by_mask[completed_mask] = self.to_codes(
+                    self.eligible_mask(completed_mask, offered_only)
+                )
+            results[student_number] = by_mask[completed_mask]
+        return results
+
+
+def fetch_completed_by_student(cursor, student_numbers=None):
+    """
+    Load completed courses for many students with a single query.
+    :param cursor: An open cursor on the catalog database.
+    :param student_numbers: Optional list of students to restrict the query to.
+    :return: A dict mapping student number to a set of completed course codes.
+    """
+    if student_numbers is None:
+        cursor.execute("SELECT student_number, course_code FROM completed_courses")
+        completed = {}
+    else:
+        student_numbers = list(student_numbers)
+        placeholders = ",".join("?" * len(student_numbers))
+        cursor.execute(
+            f"""
+            SELECT student_number, course_code
+            FROM completed_courses
+            WHERE student_number IN ({placeholders})
+            """,
+            student_numbers,
+        )
+        completed = {student_number: set() for student_number in student_numbers}
+
+    for student_number, course_code in cursor.fetchall():
+        completed.setdefault(student_number, set()).add(course_code)
+    return completed
+
+
+def fetch_cohort(cursor):
+    """Return every registered student's completed courses, using two queries."""
+    cursor.execute("SELECT student_number FROM student_info")
+    cohort = {row[0]: set() for row in cursor.fetchall()}
+    for student_number, completed in fetch_completed_by_student(cursor).items():
+        if student_number in cohort:
+            cohort[student_number] = completed
+    return cohort
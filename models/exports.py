@@ -0,0 +1,200 @@
+"""
+Plan exports.
+
+Plans are exported as Excel, CSV or iCalendar files built entirely in
+memory, so concurrent exports never share a file on disk. A whole cohort's
+generated plans can be exported into one zip archive (run as a background
+job, see models.jobs).
+"""
+
+import csv
+import datetime
+import io
+import math
+import uuid
+import zipfile
+from typing import NamedTuple
+
+from models.planner import generate_schedules
+from models.schedule import parse_meetings
+
+# Column headers of the rows sent by each page
+PLAN_COLUMNS = {
+    "study_plan": ("Course Code", "Course Name", "Category", "Credit Hours"),
+    "generated_plan": ("Course Code", "Course Name", "Credit Hours", "Time", "Days"),
+}
+
+# iCalendar weekday codes, indexed like DAY_INDEX (Sunday = 0)
+ICAL_DAYS = ("SU", "MO", "TU", "WE", "TH", "FR", "SA")
+
+
+def write_xlsx(headers, rows):
+    """Build an Excel workbook in memory and return its bytes."""
+    import xlsxwriter  # Only needed for Excel exports
+
+    buffer = io.BytesIO()
+    workbook = xlsxwriter.Workbook(buffer, {"in_memory": True})
+    worksheet = workbook.add_worksheet()
+
+    # Write headers
+    for col_num, header in enumerate(headers):
+        worksheet.write(0, col_num, header)
+
+    # Write data
+    for row_num, row in enumerate(rows, 1):
+        for col_num, value in enumerate(row):
+            worksheet.write(row_num, col_num, value)
+
+    workbook.close()
+    return buffer.getvalue()
+
+
+def write_csv(headers, rows):
+    """Build a CSV file and return its bytes (UTF-8 with a BOM so Excel reads Arabic day letters)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8-sig")
+
+
+def _ical_escape(text):
+    return (
+        str(text)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def write_ical(headers, rows, term_start=None):
+    """
+    Build an iCalendar file with one weekly recurring event per meeting.
+    Rows must carry "Time" and "Days" columns; rows whose times can't be
+    parsed are skipped.
+    :param term_start: First date of the term (defaults to today); each event
+                       starts on the first matching weekday on or after it.
+    """
+    term_start = term_start or datetime.date.today()
+    code_col = headers.index("Course Code")
+    name_col = headers.index("Course Name")
+    time_col = headers.index("Time")
+    days_col = headers.index("Days")
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//UniRoute//Study Plan//EN",
+        "CALSCALE:GREGORIAN",
+    ]
+    for row in rows:
+        try:
+            meetings = parse_meetings(row[time_col], row[days_col])
+        except (TypeError, ValueError, IndexError):
+            continue
+        for number, (day_mask, start, end) in enumerate(meetings):
+            days = [day for day in range(len(ICAL_DAYS)) if day_mask & (1 << day)]
+            # term_start.weekday() counts from Monday; day indexes count from Sunday
+            first_day = (term_start.weekday() + 1) % 7
+            offset = min((day - first_day) % 7 for day in days)
+            date = term_start + datetime.timedelta(days=offset)
+            lines += [
+                "BEGIN:VEVENT",
+                f"UID:{row[code_col]}-{number}-{uuid.uuid4().hex}@uniroute",
+                f"DTSTAMP:{stamp}",
+                f"DTSTART:{date:%Y%m%d}T{start // 60:02d}{start % 60:02d}00",
+                f"DTEND:{date:%Y%m%d}T{end // 60:02d}{end % 60:02d}00",
+                f"RRULE:FREQ=WEEKLY;BYDAY={','.join(ICAL_DAYS[day] for day in days)}",
+                f"SUMMARY:{_ical_escape(row[code_col])} {_ical_escape(row[name_col])}",
+                "END:VEVENT",
+            ]
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(lines) + "\r\n").encode("utf-8")
+
+
+class ExportFormat(NamedTuple):
+    extension: str
+    mimetype: str
+    write: object  # write(headers, rows) -> bytes
+
+
+EXPORT_FORMATS = {
+    "excel": ExportFormat(
+        "xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        write_xlsx,
+    ),
+    "csv": ExportFormat("csv", "text/csv", write_csv),
+    "ical": ExportFormat("ics", "text/calendar", write_ical),
+}
+
+
+def is_plan_rows(value):
+    """Return True if value is a list of rows of plain cells (text, numbers or null)."""
+    return isinstance(value, list) and all(
+        isinstance(row, list)
+        and all(
+            cell is None
+            or isinstance(cell, (str, int))
+            # Spreadsheets can't store NaN or infinity, which JSON parsing lets through
+            or isinstance(cell, float) and math.isfinite(cell)
+            for cell in row
+        )
+        for row in value
+    )
+
+
+def export_plan(format_name, plan_type, rows):
+    """
+    Export plan rows in the given format.
+    :return: A tuple (file bytes, ExportFormat).
+    :raises ValueError: For an unknown format or plan type, or an iCalendar
+                        export of a plan without meeting times.
+    """
+    if format_name not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {format_name}")
+    if plan_type not in PLAN_COLUMNS:
+        raise ValueError(f"Unknown plan type: {plan_type}")
+    headers = PLAN_COLUMNS[plan_type]
+    if format_name == "ical" and "Time" not in headers:
+        raise ValueError("Only plans with meeting times can be exported as a calendar")
+
+    export_format = EXPORT_FORMATS[format_name]
+    # Drop trailing cells the table shows but the export has no column for
+    rows = [list(row)[: len(headers)] for row in rows]
+    return export_format.write(headers, rows), export_format
+
+
+def schedule_rows(schedule):
+    """Turn a planner Schedule into generated-plan export rows."""
+    return [
+        (course.code, course.name, course.credit_hours, section.time, section.days)
+        for course, section in schedule.sections
+    ]
+
+
+def export_cohort(catalog, cohort, credit_hours, format_name, progress=None):
+    """
+    Generate a plan for every student and pack the exports into one zip archive.
+    :param cohort: A dict mapping student number to completed course codes.
+    :param progress: Optional callable progress(done, total).
+    :return: The zip archive's bytes.
+    """
+    export_format = EXPORT_FORMATS[format_name]
+    headers = PLAN_COLUMNS["generated_plan"]
+    buffer = io.BytesIO()
+    total = len(cohort)
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for done, (student_number, completed) in enumerate(sorted(cohort.items()), 1):
+            completed = {code for code in completed if code in catalog.courses}
+            _, result = generate_schedules(catalog, completed, credit_hours)
+            rows = schedule_rows(result.schedules[0]) if result.schedules else []
+            archive.writestr(
+                f"{student_number}.{export_format.extension}",
+                export_format.write(headers, rows),
+            )
+            if progress:
+                progress(done, total)
+    return buffer.getvalue()
@@ -0,0 +1,155 @@
+"""
+Versioning for cached dashboard fragments.
+
+Every dashboard fragment depends on the catalog version, the student's data
+version, or both. The student's version is a counter bumped in the same
+transaction as any change to their record, so a fragment's ETag can be
+derived from the two numbers without re-running the fragment's queries.
+Fragments that only depend on the catalog are rendered once per catalog
+version and kept in memory.
+
+Versions alone don't identify what a browser holds: a deploy can change a
+template without touching any version, and a recreated database starts
+counting again at 0. Every ETag therefore also carries the app's build, a
+digest of its templates, its BUILD_ID setting and the database's random id.
+"""
+
+import hashlib
+import secrets
+import sqlite3
+import threading
+
+from flask import make_response, request
+
+from models import database
+
+# catalog_meta key of the random id telling this database from a recreated one
+DATABASE_ID_KEY = "database_id"
+
+# Set by init_app; part of every ETag
+_build = ""
+
+
+def read_student_version(cursor, student_number):
+    """Return a student's data version (0 if their record never changed)."""
+    cursor.execute(
+        "SELECT version FROM student_versions WHERE student_number = ?",
+        (student_number,),
+    )
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def bump_student_version(cursor, student_number):
+    """
+    Mark a student's record as changed. Must run in the same transaction as
+    the change; the caller commits.
+    """
+    cursor.execute(
+        """
+        INSERT INTO student_versions (student_number, version) VALUES (?, 1)
+        ON CONFLICT(student_number) DO UPDATE SET version = version + 1
+        """,
+        (student_number,),
+    )
+
+
+def read_database_id(cursor):
+    """
+    Return the database's random id, creating it on first use. The caller commits.
+    """
+    cursor.execute(
+        "INSERT OR IGNORE INTO catalog_meta (key, value) VALUES (?, ?)",
+        (DATABASE_ID_KEY, secrets.randbits(62)),
+    )
+    cursor.execute("SELECT value FROM catalog_meta WHERE key = ?", (DATABASE_ID_KEY,))
+    return cursor.fetchone()[0]
+
+
+def init_app(app):
+    """Compute the build that tags every fragment ETag served by a Flask app."""
+    global _build
+
+    digest = hashlib.sha256(str(app.config.get("BUILD_ID", "")).encode())
+    environment = app.jinja_env
+    for name in sorted(environment.list_templates()):
+        source, _, _ = environment.loader.get_source(environment, name)
+        digest.update(name.encode())
+        digest.update(source.encode())
+    try:
+        with database.connection() as connection:
+            digest.update(str(read_database_id(connection.cursor())).encode())
+            connection.commit()
+    except sqlite3.Error as e:
+        print(f"Error reading the database id: {e}")
+    _build = digest.hexdigest()
+
+
+def fragment_etag(*parts):
+    """Build a strong ETag value from the fragment name and the versions it depends on."""
+    return hashlib.sha256(repr((_build, parts)).encode()).hexdigest()[:32]
+
+
+def tag_catalog_version(version):
+    """
+    Qualify a catalog version with the build for clients that cache the
+    catalog by version: the bare number restarts when the database is recreated.
+    """
+    return f"{_build[:16]}-{version}"
+
+
+def conditional_fragment(etag, render, mimetype=None):
+    """
+    Answer a fragment request with 304 Not Modified when the client already
+    holds this version of it, otherwise render it and tag the response.
+    :param etag: Strong ETag of the fragment's current version.
+    :param render: Callable returning the fragment's HTML (or other body).
+    :param mimetype: Content type of the body, if not HTML.
+    """
+    if etag in request.if_none_match:
+        response = make_response("", 304)
+    else:
+        response = make_response(render())
+        if mimetype:
+            response.mimetype = mimetype
+    response.set_etag(etag)
+    # The browser may keep the fragment but must revalidate it every time
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+class FragmentCache:
+    """
+    Rendered catalog-only fragments, keyed by fragment name and catalog version.
+    Entries of older catalog versions are dropped when a newer one is stored.
+    """
+
+    def __init__(self):
+        self._fragments = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, name, catalog_version, render):
+        """
+        Return the cached HTML of a fragment, rendering it with render() on a miss.
+        """
+        key = (name, catalog_version)
+        html = self._fragments.get(key)
+        if html is not None:
+            self.hits += 1
+            return html
+        self.misses += 1
+        html = render()
+        with self._lock:
+            self._fragments = {
+                cached_key: cached_html
+                for cached_key, cached_html in self._fragments.items()
+                if cached_key[1] >= catalog_version
+            }
+            self._fragments[key] = html
+        return html
+
+
+# Shared by every request handled by this worker
+fragment_cache = FragmentCache()
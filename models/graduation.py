@@ -0,0 +1,211 @@
+"""
+Multi-semester graduation path planner.
+
+Given a student's completed courses, the planner picks the courses still
+needed to meet every category limit, then lays them out semester by semester
+over the prerequisite DAG. Within a semester, courses at the head of the
+longest remaining prerequisite chain (the critical path) go first, since
+delaying them delays graduation. Timetables of future terms are not known, so
+section times are not considered here; generate_plan handles the next term.
+"""
+
+from typing import NamedTuple
+
+# Default credit hours per semester
+DEFAULT_CREDIT_CAP = 18
+
+# Highest credit cap a student may ask for (no semester load comes close)
+MAX_CREDIT_CAP = 30
+
+
+class GraduationPlan(NamedTuple):
+    semesters: list  # One list of Course per semester
+    total_hours: int
+    unschedulable: list  # Codes of needed courses whose prerequisites can never be met
+    unmet_hours: dict  # Category -> credit hours no schedulable course can cover
+
+
+def _blocked_courses(catalog, completed_codes):
+    """
+    Return the codes of courses that can never become eligible: those with a
+    prerequisite missing from the catalog, on a cycle, or depending on either.
+    """
+    courses = catalog.courses
+    prerequisites = catalog.prerequisites
+    blocked = set()
+    state = {}  # code -> True while being visited, False once resolved
+
+    def visit(code):
+        if code in completed_codes:
+            return False
+        if code not in courses:
+            return True
+        if code in state:
+            # A course seen again while still being visited is on a cycle
+            return state[code] is True or code in blocked
+        state[code] = True
+        is_blocked = False
+        for prerequisite_code in prerequisites.get(code, ()):
+            if visit(prerequisite_code):
+                is_blocked = True
+        if is_blocked:
+            blocked.add(code)
+        state[code] = False
+        return is_blocked
+
+    for code in courses:
+        visit(code)
+    return blocked
+
+
+def select_needed_courses(catalog, completed_codes):
+    """
+    Choose the courses a student still has to take.
+
+    Each category is filled up to its remaining credit hours, preferring
+    courses with the fewest unmet prerequisites so electives don't drag in
+    long chains. Uncompleted prerequisites of a chosen course are added too.
+
+    :return: A tuple (needed_codes, unschedulable, unmet_hours).
+    """
+    courses = catalog.courses
+    prerequisites = catalog.prerequisites
+    blocked = _blocked_courses(catalog, completed_codes)
+
+    remaining_hours = dict(catalog.category_limits)
+    for code in completed_codes:
+        if code in courses:
+            remaining_hours[courses[code].category] -= courses[code].credit_hours
+
+    def missing_prerequisites(code, seen):
+        for prerequisite_code in prerequisites.get(code, ()):
+            if prerequisite_code not in completed_codes and prerequisite_code not in seen:
+                seen.add(prerequisite_code)
+                missing_prerequisites(prerequisite_code, seen)
+        return seen
+
+    by_category = {}
+    for code, course in courses.items():
+        if code not in completed_codes:
+            by_category.setdefault(course.category, []).append(code)
+
+    needed = set()
+    unschedulable = []
+    unmet_hours = {}
+    for category, codes in by_category.items():
+        # Credit hours already covered by courses pulled in for other categories
+        hours_left = remaining_hours.get(category, 0) - sum(
+            courses[code].credit_hours for code in needed if courses[code].category == category
+        )
+        ranked = sorted(
+            codes, key=lambda code: (len(missing_prerequisites(code, set())), code)
+        )
+        for code in ranked:
+            if hours_left <= 0 and courses[code].credit_hours > 0:
+                break
+            if code in needed:
+                continue
+            if code in blocked:
+                if category.startswith("mandatory"):
+                    unschedulable.append(code)
+                continue
+            needed.add(code)
+            needed |= missing_prerequisites(code, set())
+            hours_left -= courses[code].credit_hours
+        if hours_left > 0:
+            unmet_hours[category] = hours_left
+
+    return needed, sorted(unschedulable), unmet_hours
+
+
+def critical_path_lengths(catalog, needed_codes):
+    """
+    Length (in courses) of the longest chain of needed courses that starts at
+    each needed course, found by walking the needed sub-graph in reverse
+    topological order.
+    """
+    dependents = {code: [] for code in needed_codes}
+    indegree = {code: 0 for code in needed_codes}
+    for code in needed_codes:
+        for prerequisite_code in catalog.prerequisites.get(code, ()):
+            if prerequisite_code in needed_codes:
+                dependents[prerequisite_code].append(code)
+                indegree[code] += 1
+
+    # Kahn's algorithm for a topological order
+    order = [code for code in sorted(needed_codes) if indegree[code] == 0]
+    for code in order:
+        for dependent in dependents[code]:
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                order.append(dependent)
+
+    lengths = {}
+    for code in reversed(order):
+        lengths[code] = 1 + max(
+            (lengths[dependent] for dependent in dependents[code]), default=0
+        )
+    return lengths
+
+
+def plan_graduation(catalog, completed_codes, credit_cap=DEFAULT_CREDIT_CAP):
+    """
+    Lay out the remaining courses semester by semester.
+    :param catalog: The current CatalogSnapshot.
+    :param completed_codes: Codes of the student's completed courses.
+    :param credit_cap: Maximum credit hours per semester.
+    :return: A GraduationPlan.
+    """
+    completed_codes = set(completed_codes)
+    courses = catalog.courses
+    needed, unschedulable, unmet_hours = select_needed_courses(catalog, completed_codes)
+    lengths = critical_path_lengths(catalog, needed)
+
+    # Courses that are part of a cycle never get a critical path length
+    unschedulable += sorted(code for code in needed if code not in lengths)
+    pending = sorted(
+        lengths, key=lambda code: (-lengths[code], -courses[code].credit_hours, code)
+    )
+
+    done = set(completed_codes)
+    semesters = []
+    total_hours = 0
+    while pending:
+        semester = []
+        semester_hours = 0
+        for code in pending:
+            course = courses[code]
+            if semester_hours + course.credit_hours > credit_cap:
+                continue
+            if catalog.prerequisites.get(code, frozenset()) <= done:
+                semester.append(course)
+                semester_hours += course.credit_hours
+        if not semester:
+            # A course heavier than the cap can never be placed
+            unschedulable += pending
+            break
+
+        taken = {course.code for course in semester}
+        pending = [code for code in pending if code not in taken]
+        done |= taken
+        semesters.append(semester)
+        total_hours += semester_hours
+
+    return GraduationPlan(semesters, total_hours, sorted(unschedulable), unmet_hours)
+
+
+def plan_cohort(catalog, completed_by_student, credit_cap=DEFAULT_CREDIT_CAP):
+    """
+    Run plan_graduation for every student of a cohort.
+    :param completed_by_student: Mapping of student number to completed course codes.
+    :return: A dict mapping each student number to a GraduationPlan.
+    """
+    plans = {}
+    # Students with identical histories get the same plan
+    by_history = {}
+    for student_number, completed_codes in completed_by_student.items():
+        history = frozenset(completed_codes)
+        if history not in by_history:
+            by_history[history] = plan_graduation(catalog, history, credit_cap)
+        plans[student_number] = by_history[history]
+    return plans
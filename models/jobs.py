@@ -0,0 +1,476 @@
+"""
+Background job queue for heavy planner work.
+
+Jobs run in child processes, so CPU-bound searches use every core and
+never block a Flask worker thread. Job state lives in the `jobs` table of
+the app's SQLite database, so every web worker can report on, hand out
+the result of and cancel any job, whichever worker runs it; no external
+broker is needed. The worker that receives a job runs it: a bounded set
+of dispatcher threads each start one process per job and wait for its
+result over a pipe, which also carries progress updates. Running jobs are
+killed when they exceed their time limit or are cancelled, and identical
+jobs that are still queued or running are shared instead of being started
+twice.
+
+Dispatchers refresh a heartbeat on the jobs of their worker; a job whose
+worker stopped (a restart, a crash) is reported as failed once its
+heartbeat goes stale.
+
+Clients submit a job, get its id back and poll its status.
+"""
+
+import json
+import multiprocessing
+import os
+import pickle
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+from models import database
+from models.catalog import get_catalog
+from models.demand import balanced_section_order
+from models.eligibility import fetch_cohort
+from models.exports import export_cohort
+from models.graduation import plan_graduation
+from models.planner import generate_schedules
+
+# Seconds a job may run before its process is killed
+DEFAULT_TIME_LIMIT = 60
+
+# Seconds finished jobs are kept for polling
+RESULT_TTL = 600
+
+# Longest a status request may wait for a job to finish (ASGI long-polls)
+MAX_WAIT = 30
+
+# Seconds between heartbeats of a worker's queued and running jobs
+HEARTBEAT_INTERVAL = 1.0
+
+# Seconds without a heartbeat after which a job's worker is presumed gone
+STALE_AFTER = 15.0
+
+ACTIVE_STATES = ("queued", "running")
+
+FINISHED_STATES = ("finished", "failed", "cancelled", "timed_out")
+
+STALE_ERROR = "The worker running the job stopped"
+
+
+def plan_schedules(
+    progress,
+    completed_codes,
+    credit_hours,
+    top_k,
+    time_budget,
+    balance_for=None,
+    catalog_version=None,
+):
+    """
+    Job task: search the next semester's schedules for a completed-course set,
+    optionally spreading sections by capacity for the given student.
+    catalog_version only records which catalog the job was submitted against.
+    """
+    section_order = balanced_section_order(balance_for) if balance_for else None
+    return generate_schedules(
+        get_catalog(), set(completed_codes), credit_hours, top_k, time_budget, section_order
+    )
+
+
+def plan_graduation_path(progress, completed_codes, credit_cap):
+    """Job task: lay out every remaining semester up to graduation."""
+    return plan_graduation(get_catalog(), set(completed_codes), credit_cap)
+
+
+def export_cohort_plans(progress, credit_hours, format_name):
+    """Job task: export a generated plan for every student into one zip archive."""
+    with database.connection() as connection:
+        cohort = fetch_cohort(connection.cursor())
+    return export_cohort(get_catalog(), cohort, credit_hours, format_name, progress)
+
+
+# Tasks a job may run, by name
+TASKS = {
+    "schedules": plan_schedules,
+    "graduation": plan_graduation_path,
+    "cohort_export": export_cohort_plans,
+}
+
+
+def _run_task(connection, task_name, params):
+    """Entry point of a job process: run the task and send its outcome to the parent."""
+
+    def progress(done, total):
+        connection.send(("progress", (done, total)))
+
+    try:
+        result = TASKS[task_name](progress, **params)
+    except Exception as e:
+        connection.send(("failed", f"{type(e).__name__}: {e}"))
+    else:
+        connection.send(("finished", result))
+    finally:
+        connection.close()
+
+
+class JobQueue:
+    """
+    Bounded queue of planner jobs run in child processes, tracked in SQLite.
+    """
+
+    def __init__(self, max_workers=None, time_limit=DEFAULT_TIME_LIMIT, ttl=RESULT_TTL):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.time_limit = time_limit
+        self.ttl = ttl
+        self._context = multiprocessing.get_context()
+        self._pending = queue.Queue()
+        self._local = {}  # job id -> jobs dispatched by this worker
+        self._lock = threading.Lock()
+        self._workers = []
+        self._last_heartbeat = 0.0
+
+    def submit(self, task_name, params, owner=None, time_limit=None, on_success=None):
+        """
+        Queue a job, or join an identical job that is still queued or running.
+        :param task_name: A key of TASKS.
+        :param params: JSON-serialisable keyword arguments of the task.
+        :param owner: Who may poll and cancel the job.
+        :param time_limit: Seconds before the job is killed (defaults to the queue's).
+        :param on_success: Optional callable receiving the result; it runs in the
+                           worker that runs the job, so it is skipped when the
+                           job is shared with one started by another worker.
+        :return: The job id.
+        """
+        if task_name not in TASKS:
+            raise ValueError(f"Unknown task: {task_name}")
+        key = json.dumps([task_name, params], sort_keys=True)
+        now = time.time()
+
+        with database.connection() as connection:
+            cursor = connection.cursor()
+            # Take the write lock first so two workers can't both start the job
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                self._expire(cursor, now)
+                cursor.execute(
+                    """
+                    SELECT job_id FROM jobs
+                    WHERE dedup_key = ? AND status IN ('queued', 'running')
+                    """,
+                    (key,),
+                )
+                row = cursor.fetchone()
+                job_id = row[0] if row else uuid.uuid4().hex
+                if row is None:
+                    cursor.execute(
+                        """
+                        INSERT INTO jobs (job_id, task, params, dedup_key, status,
+                                          time_limit, submitted_at, heartbeat_at)
+                        VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)
+                        """,
+                        (
+                            job_id,
+                            task_name,
+                            json.dumps(params),
+                            key,
+                            time_limit or self.time_limit,
+                            now,
+                            now,
+                        ),
+                    )
+                if owner is not None:
+                    cursor.execute(
+                        "INSERT OR IGNORE INTO job_owners (job_id, owner) VALUES (?, ?)",
+                        (job_id, owner),
+                    )
+                connection.commit()
+            except sqlite3.Error:
+                connection.rollback()
+                raise
+
+        with self._lock:
+            if row is not None:
+                job = self._local.get(job_id)
+                if job is not None and on_success:
+                    job["callbacks"].append(on_success)
+                return job_id
+            self._local[job_id] = {
+                "task": task_name,
+                "params": params,
+                "time_limit": time_limit or self.time_limit,
+                "callbacks": [on_success] if on_success else [],
+                "process": None,
+            }
+            self._start_workers()
+        self._pending.put(job_id)
+        return job_id
+
+    def _start_workers(self):
+        # Dispatcher threads are started lazily, up to max_workers
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        while len(self._workers) < min(self.max_workers, self._pending.qsize() + 1):
+            worker = threading.Thread(target=self._work, name="job-dispatcher", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _work(self):
+        while True:
+            job_id = self._pending.get()
+            job = self._local.get(job_id)
+            # A job cancelled while queued is left alone
+            if job is not None and self._update(
+                job_id, "queued", "status = 'running', heartbeat_at = ?", (time.time(),)
+            ):
+                self._execute(job_id, job)
+            with self._lock:
+                self._local.pop(job_id, None)
+
+    def _update(self, job_id, expected_status, assignments, values):
+        """
+        Update a job's row if it is still in expected_status.
+        :return: True if it was.
+        """
+        with database.connection() as connection:
+            cursor = connection.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ? AND status = ?",
+                (*values, job_id, expected_status),
+            )
+            connection.commit()
+            return cursor.rowcount == 1
+
+    def _heartbeat(self, job_id, progress):
+        """
+        Refresh the heartbeat of this worker's jobs and record a running job's progress.
+        :return: False if the job stopped running meanwhile (cancelled elsewhere).
+        """
+        now = time.time()
+        done, total = progress or (None, None)
+        running = self._update(
+            job_id, "running", "heartbeat_at = ?, done = ?, total = ?", (now, done, total)
+        )
+        with self._lock:
+            if now - self._last_heartbeat < HEARTBEAT_INTERVAL:
+                return running
+            self._last_heartbeat = now
+            queued = [queued_id for queued_id in self._local if queued_id != job_id]
+        if queued:
+            with database.connection() as connection:
+                connection.execute(
+                    f"""
+                    UPDATE jobs SET heartbeat_at = ?
+                    WHERE status = 'queued' AND job_id IN ({",".join("?" * len(queued))})
+                    """,
+                    (now, *queued),
+                )
+                connection.commit()
+        return running
+
+    def _execute(self, job_id, job):
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_run_task, args=(sender, job["task"], job["params"]), daemon=True
+        )
+        process.start()
+        sender.close()
+        job["process"] = process
+
+        deadline = time.monotonic() + job["time_limit"]
+        next_heartbeat = 0.0
+        progress = None
+        outcome = None
+        while outcome is None:
+            now = time.monotonic()
+            if now >= next_heartbeat:
+                if not self._heartbeat(job_id, progress):
+                    break  # Cancelled
+                next_heartbeat = now + HEARTBEAT_INTERVAL
+            remaining = deadline - now
+            if remaining <= 0:
+                outcome = ("timed_out", f"Job exceeded {job['time_limit']} seconds")
+                break
+            try:
+                if not receiver.poll(min(remaining, 0.1)):
+                    continue
+                kind, payload = receiver.recv()
+            except (EOFError, OSError):  # OSError: killed by a local cancel
+                outcome = ("failed", "Job process exited unexpectedly")
+                break
+            if kind == "progress":
+                progress = payload
+            else:
+                outcome = (kind, payload)
+
+        if process.is_alive():
+            process.kill()
+        process.join()
+        receiver.close()
+        job["process"] = None
+        if outcome is None:
+            return
+
+        status, payload = outcome
+        done, total = progress or (None, None)
+        finished = self._update(
+            job_id,
+            "running",
+            "status = ?, result = ?, error = ?, done = ?, total = ?, finished_at = ?",
+            (
+                status,
+                pickle.dumps(payload, pickle.HIGHEST_PROTOCOL) if status == "finished" else None,
+                None if status == "finished" else payload,
+                done,
+                total,
+                time.time(),
+            ),
+        )
+        if finished and status == "finished":
+            for callback in job["callbacks"]:
+                try:
+                    callback(payload)
+                except Exception as e:
+                    print(f"Error in job callback: {e}")
+
+    def _expire(self, cursor, now):
+        # Called inside a write transaction
+        cursor.execute(
+            """
+            UPDATE jobs SET status = 'failed', error = ?, finished_at = ?
+            WHERE status IN ('queued', 'running') AND heartbeat_at < ?
+            """,
+            (STALE_ERROR, now, now - STALE_AFTER),
+        )
+        cursor.execute(
+            """
+            DELETE FROM job_owners
+            WHERE job_id IN (SELECT job_id FROM jobs WHERE finished_at < ?)
+            """,
+            (now - self.ttl,),
+        )
+        cursor.execute("DELETE FROM jobs WHERE finished_at < ?", (now - self.ttl,))
+
+    def _visible(self, cursor, job_id, owner, columns):
+        # Only owners of a job may see it; owner None skips the check
+        if owner is None:
+            cursor.execute(f"SELECT {columns} FROM jobs WHERE job_id = ?", (job_id,))
+        else:
+            cursor.execute(
+                f"""
+                SELECT {columns} FROM jobs
+                JOIN job_owners USING (job_id)
+                WHERE job_id = ? AND owner = ?
+                """,
+                (job_id, owner),
+            )
+        return cursor.fetchone()
+
+    def _describe(self, cursor, job_id, owner):
+        row = self._visible(
+            cursor, job_id, owner, "task, status, error, done, total, heartbeat_at"
+        )
+        if row is None:
+            return None
+        task_name, status, error, done, total, heartbeat_at = row
+        if status in ACTIVE_STATES and time.time() - heartbeat_at > STALE_AFTER:
+            status, error = "failed", STALE_ERROR
+        description = {"job_id": job_id, "task": task_name, "status": status, "error": error}
+        if total is not None:
+            description["done"], description["total"] = done, total
+        return description
+
+    def status(self, job_id, owner=None):
+        """
+        Describe a job.
+        :param owner: Only owners of the job may see it (None skips the check).
+        :return: A dict with the job's id, task, status, error and progress,
+                 or None if the job is unknown to this owner.
+        """
+        with database.connection() as connection:
+            return self._describe(connection.cursor(), job_id, owner)
+
+    def result(self, job_id, owner=None):
+        """
+        Return (task name, params, result) of a finished job, or None.
+        """
+        with database.connection() as connection:
+            row = self._visible(
+                connection.cursor(), job_id, owner, "task, params, status, result"
+            )
+        if row is None or row[2] != "finished":
+            return None
+        return row[0], json.loads(row[1]), pickle.loads(row[3])
+
+    def cancel(self, job_id, owner=None):
+        """
+        Withdraw an owner's interest in a job; the job is cancelled (and its
+        process killed) once nobody else shares it.
+        :return: The job's description, or None if unknown.
+        """
+        with database.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._visible(cursor, job_id, owner, "status")
+                if row is None:
+                    connection.rollback()
+                    return None
+                if row[0] in ACTIVE_STATES:
+                    if owner is not None:
+                        cursor.execute(
+                            "DELETE FROM job_owners WHERE job_id = ? AND owner = ?",
+                            (job_id, owner),
+                        )
+                        cursor.execute(
+                            "SELECT COUNT(*) FROM job_owners WHERE job_id = ?", (job_id,)
+                        )
+                    if owner is None or cursor.fetchone()[0] == 0:
+                        # The worker running it notices at its next heartbeat
+                        cursor.execute(
+                            """
+                            UPDATE jobs SET status = 'cancelled', finished_at = ?
+                            WHERE job_id = ? AND status IN ('queued', 'running')
+                            """,
+                            (time.time(), job_id),
+                        )
+                description = self._describe(cursor, job_id, None)
+                connection.commit()
+            except sqlite3.Error:
+                connection.rollback()
+                raise
+
+        if description["status"] == "cancelled":
+            # Kill it right away when this worker runs it
+            with self._lock:
+                job = self._local.get(job_id)
+                process = job and job["process"]
+            if process is not None:
+                process.kill()
+        return description
+
+    def stats(self):
+        """Report how many jobs are in each state, and this worker's dispatchers."""
+        with database.connection() as connection:
+            counts = dict(
+                connection.execute(
+                    "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+                ).fetchall()
+            )
+        return {
+            "workers": self.max_workers,
+            "pending": self._pending.qsize(),
+            "jobs": counts,
+        }
+
+
+# Shared by every request handled by this worker
+job_queue = JobQueue()
+
+
+def _reset_after_fork():
+    # Dispatcher threads don't survive a fork; the child starts with an empty queue
+    global job_queue
+    job_queue = JobQueue(job_queue.max_workers, job_queue.time_limit, job_queue.ttl)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
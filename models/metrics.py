@@ -0,0 +1,259 @@
+"""
+Request instrumentation.
+
+Every request records its wall time, the number and total execute time of
+its SQLite statements, the time spent rendering each template and the size
+of its response. Observations are aggregated per endpoint into cumulative
+histograms and rendered in the Prometheus text format by /metrics.
+Requests can also be profiled one at a time with cProfile (see
+dump_profile).
+
+SQL statements are timed by the connection factory the pool opens every
+connection with, so no query needs to be wrapped by hand. Each worker
+process keeps its own registry.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+# Histogram bucket upper bounds
+DURATION_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+METRIC_PREFIX = "uniroute"
+
+# Metric name -> (type, help text)
+HELP = {
+    "request_duration_seconds": ("histogram", "Wall time of a request."),
+    "sql_statements_per_request": ("histogram", "SQLite statements executed by a request."),
+    "sql_duration_seconds": ("histogram", "Total SQLite execute time of a request."),
+    "template_render_seconds": ("histogram", "Time spent rendering a template."),
+    "response_size_bytes": ("histogram", "Size of a response body."),
+    "requests_total": ("counter", "Requests answered, by status code."),
+}
+
+# Statement counters of the request running on this thread, if any
+_active = threading.local()
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets. Not thread-safe on its own."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (metric, labels) -> Histogram
+        self._counters = {}  # (metric, labels) -> int
+
+    def observe(self, metric, labels, value, buckets):
+        """
+        Add an observation to a labelled histogram.
+        :param labels: Tuple of (label name, value) pairs.
+        """
+        with self._lock:
+            histogram = self._histograms.get((metric, labels))
+            if histogram is None:
+                histogram = self._histograms[(metric, labels)] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, metric, labels, amount=1):
+        with self._lock:
+            self._counters[(metric, labels)] = self._counters.get((metric, labels), 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self, gauges=()):
+        """
+        Render every metric in the Prometheus text exposition format.
+        :param gauges: Extra (name, help, value) gauges to append, e.g. pool sizes.
+        """
+        with self._lock:
+            histograms = {
+                key: (tuple(histogram.counts), histogram.sum, histogram.count, histogram.buckets)
+                for key, histogram in self._histograms.items()
+            }
+            counters = dict(self._counters)
+
+        lines = []
+        for metric, (kind, description) in HELP.items():
+            name = f"{METRIC_PREFIX}_{metric}"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (counter_metric, labels), value in sorted(counters.items()):
+                    if counter_metric == metric:
+                        lines.append(f"{name}{_labels(labels)} {value}")
+                continue
+            for (histogram_metric, labels), (counts, total, count, buckets) in sorted(
+                histograms.items()
+            ):
+                if histogram_metric != metric:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    bucket_labels = _labels(labels + (("le", _number(bound)),))
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        for gauge, description, value in gauges:
+            name = f"{METRIC_PREFIX}_{gauge}"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+registry = MetricsRegistry()
+
+
+class RequestStats:
+    """What one request has done so far."""
+
+    __slots__ = ("started", "statements", "sql_seconds", "templates")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.templates = []  # Start times of templates being rendered
+
+
+def start_request():
+    """Begin recording a request on this thread and return its RequestStats."""
+    stats = _active.stats = RequestStats()
+    return stats
+
+
+def finish_request(endpoint, status_code, response_size):
+    """
+    Record the request running on this thread into the registry.
+    :param response_size: Body size in bytes, or None if unknown (streamed).
+    """
+    stats = getattr(_active, "stats", None)
+    if stats is None:
+        return
+    _active.stats = None
+    labels = (("endpoint", endpoint),)
+    elapsed = time.perf_counter() - stats.started
+    registry.observe("request_duration_seconds", labels, elapsed, DURATION_BUCKETS)
+    registry.observe("sql_statements_per_request", labels, stats.statements, STATEMENT_BUCKETS)
+    registry.observe("sql_duration_seconds", labels, stats.sql_seconds, DURATION_BUCKETS)
+    if response_size is not None:
+        registry.observe("response_size_bytes", labels, response_size, SIZE_BUCKETS)
+    registry.increment("requests_total", labels + (("status", str(status_code)),))
+
+
+def template_started():
+    stats = getattr(_active, "stats", None)
+    if stats is not None:
+        stats.templates.append(time.perf_counter())
+
+
+def template_finished(template_name):
+    stats = getattr(_active, "stats", None)
+    if stats is not None and stats.templates:
+        registry.observe(
+            "template_render_seconds",
+            (("template", template_name),),
+            time.perf_counter() - stats.templates.pop(),
+            DURATION_BUCKETS,
+        )
+
+
+def _record_statement(seconds):
+    stats = getattr(_active, "stats", None)
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += seconds
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports the execute time of every statement to the running request."""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_statement(time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_statement(time.perf_counter() - started)
+
+    def executescript(self, sql_script):
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            _record_statement(time.perf_counter() - started)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection factory whose cursors (and shortcut execute methods) are timed."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def dump_profile(profiler, directory, endpoint):
+    """
+    Write a finished cProfile run to directory for `python -m pstats` or snakeviz.
+    :return: The path of the .prof file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{endpoint or 'unmatched'}-{time.time_ns()}.prof")
+    profiler.dump_stats(path)
+    return path
@@ -0,0 +1,185 @@
+"""
+Password hashing off the request threads.
+
+Hashing and checking passwords runs a deliberately slow key-derivation
+function. Doing it inline lets a login storm at the start of a semester
+occupy every worker thread, so the KDF runs on a small dedicated thread
+pool instead (hashlib's scrypt and PBKDF2 release the GIL, so the pool
+really runs in parallel). The pool admits a bounded number of jobs: once
+max_workers are hashing and max_queue more are waiting, further requests
+fail fast with HashingBusy, which the routes answer with 503.
+
+The hash method (e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000") is
+configurable. A successful login whose stored hash was made with another
+method, or which is still stored in plain text, gets a fresh hash, so the
+cost can be tuned without forcing password resets.
+"""
+
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
+
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+# Hashes computed at once; each scrypt hash holds 32 MiB while it runs
+DEFAULT_MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+# Hashes allowed to wait for a free worker before requests are turned away
+DEFAULT_MAX_QUEUE = 32
+
+
+class HashingBusy(RuntimeError):
+    """Raised when the hashing pool is saturated and its queue is full."""
+
+
+# Hash methods Werkzeug writes, as the first field of "method$salt$hash"
+HASH_METHODS = ("scrypt", "pbkdf2")
+
+
+def _canonical_method(method):
+    """
+    Spell out the default parameters Werkzeug fills in for a hash method,
+    e.g. "scrypt" -> "scrypt:32768:8:1", without hashing anything.
+    """
+    name, *args = method.split(":")
+    if name == "scrypt" and not args:
+        return "scrypt:32768:8:1"
+    if name == "pbkdf2" and len(args) < 2:
+        hash_name = args[0] if args else "sha256"
+        return f"pbkdf2:{hash_name}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+def is_password_hash(stored):
+    """Return True if a stored password is a Werkzeug hash rather than plain text."""
+    fields = stored.split("$")
+    return len(fields) == 3 and fields[0].split(":", 1)[0] in HASH_METHODS
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        max_workers=DEFAULT_MAX_WORKERS,
+        max_queue=DEFAULT_MAX_QUEUE,
+        method=DEFAULT_METHOD,
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.method = method
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._executor = None  # Started on first use, so forked children start their own
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _run(self, function, *args):
+        """Run function(*args) on the pool and wait for its result."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy("Too many password checks in progress.")
+        try:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        self.max_workers, thread_name_prefix="password-hash"
+                    )
+                self.queued += 1
+            future = self._executor.submit(self._call, function, args)
+        except BaseException:
+            with self._lock:
+                self.queued -= 1
+            self._slots.release()
+            raise
+        return future.result()
+
+    def _call(self, function, args):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+            self._slots.release()
+
+    def hash(self, password):
+        """Hash a password with the configured method."""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        """
+        Check a password against its stored hash.
+        :return: A tuple (matches, new hash or None). A new hash is returned when
+                 the password matched but was stored with another method or in
+                 plain text; the caller should store it.
+        """
+        if not is_password_hash(stored_hash):
+            # Stored in plain text by an old version of the student info form
+            matches = hmac.compare_digest(stored_hash.encode(), password.encode())
+            return matches, self.hash(password) if matches else None
+
+        matches = self._run(check_password_hash, stored_hash, password)
+        if matches and self.needs_rehash(stored_hash):
+            return True, self.hash(password)
+        return matches, None
+
+    def needs_rehash(self, stored_hash):
+        """Return True if a hash was not made with the configured method."""
+        return stored_hash.split("$", 1)[0] != _canonical_method(self.method)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "method": self.method,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+# Shared by every request handled by this worker
+hasher = PasswordHasher()
+
+
+def configure(max_workers=None, max_queue=None, method=None):
+    """Replace the shared hasher with one using other limits or another method."""
+    global hasher
+    hasher = PasswordHasher(
+        max_workers or hasher.max_workers,
+        hasher.max_queue if max_queue is None else max_queue,
+        method or hasher.method,
+    )
+    return hasher
+
+
+def init_app(app):
+    """Configure the shared hasher from PASSWORD_HASH_* settings of a Flask app."""
+    configure(
+        app.config.get("PASSWORD_HASH_WORKERS"),
+        app.config.get("PASSWORD_HASH_QUEUE"),
+        app.config.get("PASSWORD_HASH_METHOD"),
+    )
+
+
+def _reset_after_fork():
+    # Pool threads don't survive a fork; the child starts its own on first use
+    global hasher
+    hasher = PasswordHasher(hasher.max_workers, hasher.max_queue, hasher.method)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
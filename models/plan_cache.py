@@ -0,0 +1,140 @@
+"""
+In-process cache for planner results.
+
+Many students share the same completed-course set, so planner output is
+cached under (catalog version, completed-course bitmask, credit hours,
+options). Entries are evicted least-recently-used first once the cache
+exceeds its byte budget, and expire after a TTL. Searches cut short by
+their time budget are kept only briefly, so one slow request under load
+doesn't hand its partial plan to every student with the same history.
+Every entry is dropped as soon as a request arrives with a newer catalog
+version. Lookups and results for an older version (a request or a
+background job that started before a catalog reload) are ignored rather
+than rolling the cache back.
+"""
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_TTL = 15 * 60  # Seconds
+DEFAULT_INCOMPLETE_TTL = 30  # Seconds, for searches that ran out of time
+
+
+class PlanCache:
+    def __init__(
+        self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL, incomplete_ttl=DEFAULT_INCOMPLETE_TTL
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.incomplete_ttl = incomplete_ttl
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+        self._catalog_version = None
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(catalog, completed_codes, credit_hours, options=()):
+        """
+        Build a cache key for a planner request.
+        :param catalog: The CatalogSnapshot the plan is computed from.
+        :param completed_codes: Codes of the student's completed courses.
+        :param credit_hours: Requested credit hours (or credit cap).
+        :param options: Hashable tuple of any other planner options.
+        """
+        completed_mask = catalog.eligibility.to_mask(completed_codes)
+        return catalog.version, completed_mask, credit_hours, tuple(options)
+
+    def _check_version(self, catalog_version):
+        """
+        Move the cache to a newer catalog version, dropping every entry.
+        :return: False if catalog_version is older than the cache's.
+        """
+        if self._catalog_version is not None and catalog_version < self._catalog_version:
+            return False
+        # Plans computed from an older catalog are never valid again
+        if catalog_version != self._catalog_version:
+            if self._entries:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                self.current_bytes = 0
+            self._catalog_version = catalog_version
+        return True
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key) if self._check_version(key[0]) else None
+            if entry is None:
+                self.misses += 1
+                return None
+            value, _, expires_at = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, complete=True):
+        """
+        Store value under key, evicting least recently used entries to stay within budget.
+        :param complete: False if the search behind value ran out of time; such
+                         entries expire after incomplete_ttl instead of ttl.
+        """
+        size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if not self._check_version(key[0]):
+                return
+            if key in self._entries:
+                self._remove(key)
+            ttl = self.ttl if complete else self.incomplete_ttl
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Return the cache counters, for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "incomplete_ttl": self.incomplete_ttl,
+                "catalog_version": self._catalog_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared by every request handled by this worker
+plan_cache = PlanCache()
@@ -0,0 +1,88 @@
+"""
+Next-semester schedule searches on behalf of a request.
+
+The HTML planner (routes/auth_routes.py) and the JSON API
+(routes/api_routes.py) both answer a plan request the same way: from the
+plan cache when a student with the same history already asked, otherwise
+by running the search, or by queueing it as a background job when the
+client allows that and the search may run long enough to be worth a job
+process.
+"""
+
+from flask import current_app
+
+from models import jobs
+from models.catalog import get_catalog
+from models.database import get_db
+from models.demand import balanced_section_order
+from models.plan_cache import plan_cache
+from models.planner import DEFAULT_TIME_BUDGET, generate_schedules
+
+# Upper bound on the alternative plans a single request may ask for
+MAX_PLAN_ALTERNATIVES = 5
+
+# Searches with a shorter time budget run inline even when background is
+# allowed: starting a job process and polling it costs more than they do
+BACKGROUND_MIN_TIME_BUDGET = 1.0
+
+
+def find_schedules(student_number, desired_credit_hours, alternatives, balanced, background):
+    """
+    Look up, run or queue the schedule search for a student.
+    :param background: Allow queueing the search as a job on a cache miss; only
+                       searches with a time budget of at least
+                       BACKGROUND_MIN_TIME_BUDGET seconds are queued.
+    :return: A tuple (the cached (candidates, SearchResult) or None, job id or None).
+    """
+    alternatives = max(1, min(alternatives, MAX_PLAN_ALTERNATIVES))
+    catalog = get_catalog()
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    # Fetch completed courses (the rest of the catalog comes from the shared snapshot)
+    cursor.execute(
+        "SELECT course_code FROM completed_courses WHERE student_number = ?",
+        (student_number,),
+    )
+    completed_codes = {
+        row[0] for row in cursor.fetchall() if row[0] in catalog.courses
+    }
+
+    # Search for the best conflict-free schedules within the time budget,
+    # unless a student with the same history already asked for the same plan
+    # Balanced section orders differ per student, so their plans are cached per student
+    options = ("schedules", alternatives) + (("balanced", student_number) if balanced else ())
+    cache_key = plan_cache.make_key(catalog, completed_codes, desired_credit_hours, options)
+    cached = plan_cache.get(cache_key)
+    if cached is None:
+        time_budget = current_app.config.get("PLANNER_TIME_BUDGET", DEFAULT_TIME_BUDGET)
+        if background and time_budget >= BACKGROUND_MIN_TIME_BUDGET:
+            # Run the search in a job process and let the client poll for it
+            job_id = jobs.job_queue.submit(
+                "schedules",
+                {
+                    "completed_codes": sorted(completed_codes),
+                    "credit_hours": desired_credit_hours,
+                    "top_k": alternatives,
+                    "time_budget": time_budget,
+                    "balance_for": student_number if balanced else None,
+                    "catalog_version": catalog.version,
+                },
+                owner=student_number,
+                time_limit=current_app.config.get("JOB_TIME_LIMIT"),
+                on_success=lambda result: plan_cache.put(
+                    cache_key, result, complete=result[1].complete
+                ),
+            )
+            return None, job_id
+        cached = generate_schedules(
+            catalog,
+            completed_codes,
+            desired_credit_hours,
+            top_k=alternatives,
+            time_budget=time_budget,
+            section_order=balanced_section_order(student_number) if balanced else None,
+        )
+        plan_cache.put(cache_key, cached, complete=cached[1].complete)
+    return cached, None
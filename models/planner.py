@@ -0,0 +1,196 @@
+"""
+Deterministic schedule search for a single semester.
+
+The search is a depth-first branch-and-bound over the eligible courses in
+priority order. At each course it tries every section that fits the credit
+budget, the category limits and the time slots already taken, then tries
+skipping the course. A branch is pruned as soon as it cannot reach more
+credit hours than the K-th best schedule found so far. Ties are broken by
+priority order, so identical requests always return identical plans.
+"""
+
+import time
+from typing import NamedTuple
+
+# Default wall-clock budget (in seconds) for one search
+DEFAULT_TIME_BUDGET = 0.25
+
+# Most credit hours a plan request may ask for in one semester
+MAX_CREDIT_HOURS = 30
+
+# How many search nodes are expanded between two clock checks
+_CLOCK_CHECK_INTERVAL = 256
+
+
+class Schedule(NamedTuple):
+    total_hours: int
+    sections: tuple  # (Course, Section) pairs, sorted by days and start time
+
+
+class SearchResult(NamedTuple):
+    schedules: list  # Best schedule first
+    complete: bool  # False if the time budget ran out before the search finished
+    nodes: int
+
+
+def eligible_candidates(catalog, completed_codes):
+    """
+    Collect the courses a student can take this term.
+    :param catalog: The current CatalogSnapshot.
+    :param completed_codes: Codes of the student's completed courses.
+    :return: A tuple (candidates, remaining_hours) where candidates is a list of
+             (Course, sections) in priority order (courses unlocking the most
+             downstream courses first, then catalog order) and remaining_hours
+             maps each category to the credit hours still needed in it.
+    """
+    remaining_hours = dict(catalog.category_limits)
+    for code in completed_codes:
+        course = catalog.courses.get(code)
+        if course:
+            remaining_hours[course.category] -= course.credit_hours
+
+    eligibility = catalog.eligibility
+    eligible_mask = eligibility.eligible_mask(eligibility.to_mask(completed_codes))
+    candidates = []
+    for code in eligibility.to_codes(eligible_mask):
+        course = catalog.courses[code]
+        if remaining_hours.get(course.category, 0) < course.credit_hours:
+            continue
+        candidates.append((course, catalog.sections[code]))
+    # Stable sort, so courses with equal scores keep their catalog order
+    candidates.sort(key=lambda candidate: -catalog.unlocks.score(candidate[0].code))
+    return candidates, remaining_hours
+
+
+def search_schedules(
+    candidates, desired_hours, remaining_hours, top_k=1, time_budget=DEFAULT_TIME_BUDGET
+):
+    """
+    Find the best conflict-free schedules for the requested credit hours.
+    :param candidates: List of (Course, sections) in priority order.
+    :param desired_hours: Maximum total credit hours of a schedule.
+    :param remaining_hours: Credit hours still allowed in each category.
+    :param top_k: Number of alternative schedules (with distinct course sets) to return.
+    :param time_budget: Wall-clock budget in seconds; the best schedules found so far
+                        are returned when it runs out.
+    :return: A SearchResult.
+    """
+    candidates = [
+        (course, sections)
+        for course, sections in candidates
+        if sections and course.credit_hours <= desired_hours
+    ]
+    count = len(candidates)
+    remaining_hours = dict(remaining_hours)
+
+    # suffix_hours[i] = credit hours still obtainable from candidates[i:]
+    suffix_hours = [0] * (count + 1)
+    for index in range(count - 1, -1, -1):
+        suffix_hours[index] = suffix_hours[index + 1] + candidates[index][0].credit_hours
+
+    best = []  # (total_hours, found_order, chosen pairs), best first
+    seen_course_sets = set()
+    chosen = []
+    hours_stack = [0]
+    busy_stack = [0]  # Week occupancy mask of the chosen sections
+    # Each frame is [candidate index, next option, pushed by an include?]
+    stack = [[0, 0, False]]
+    deadline = time.perf_counter() + time_budget
+    nodes = 0
+    complete = True
+
+    def worst_kept_hours():
+        return best[-1][0] if len(best) == top_k else -1
+
+    def record(hours):
+        course_set = frozenset(course.code for course, _ in chosen)
+        if course_set in seen_course_sets or hours <= worst_kept_hours():
+            return
+        seen_course_sets.add(course_set)
+        best.append((hours, len(seen_course_sets), list(chosen)))
+        best.sort(key=lambda entry: (-entry[0], entry[1]))
+        del best[top_k:]
+
+    while stack:
+        frame = stack[-1]
+        index, option, _ = frame
+        hours = hours_stack[-1]
+
+        if option == 0:
+            nodes += 1
+            if nodes % _CLOCK_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+                complete = False
+                break
+            upper_bound = min(desired_hours, hours + suffix_hours[index])
+            if index == count or upper_bound <= worst_kept_hours():
+                option = -1  # Nothing left to explore below this node
+
+        if option >= 0:
+            course, sections = candidates[index]
+            if option < len(sections):
+                # Include the course using its next section
+                frame[1] += 1
+                section = sections[option]
+                fits = (
+                    hours + course.credit_hours <= desired_hours
+                    and remaining_hours.get(course.category, 0) >= course.credit_hours
+                    and not section.occupancy & busy_stack[-1]
+                )
+                if fits:
+                    chosen.append((course, section))
+                    hours_stack.append(hours + course.credit_hours)
+                    busy_stack.append(busy_stack[-1] | section.occupancy)
+                    remaining_hours[course.category] -= course.credit_hours
+                    record(hours_stack[-1])
+                    stack.append([index + 1, 0, True])
+                continue
+            if option == len(sections):
+                # Skip the course
+                frame[1] += 1
+                stack.append([index + 1, 0, False])
+                continue
+
+        # Every option of this node is done: undo its include and backtrack
+        stack.pop()
+        if frame[2]:
+            course, _ = chosen.pop()
+            hours_stack.pop()
+            busy_stack.pop()
+            remaining_hours[course.category] += course.credit_hours
+
+        # The best K schedules already hit the requested hours; nothing can beat them
+        if len(best) == top_k and best[-1][0] == desired_hours:
+            break
+
+    schedules = [
+        Schedule(hours, tuple(sorted(pairs, key=lambda pair: pair[1].sort_key)))
+        for hours, _, pairs in best
+    ]
+    return SearchResult(schedules, complete, nodes)
+
+
+def generate_schedules(
+    catalog,
+    completed_codes,
+    desired_hours,
+    top_k=1,
+    time_budget=DEFAULT_TIME_BUDGET,
+    section_order=None,
+):
+    """
+    Plan the next semester for a student.
+    :param section_order: Optional callable (course code, sections) -> sections
+                          giving the order sections are tried in; earlier
+                          sections win ties between equally good schedules.
+    :return: A tuple (candidates, SearchResult).
+    """
+    candidates, remaining_hours = eligible_candidates(catalog, completed_codes)
+    if section_order is not None:
+        candidates = [
+            (course, section_order(course.code, sections))
+            for course, sections in candidates
+        ]
+    result = search_schedules(
+        candidates, desired_hours, remaining_hours, top_k, time_budget
+    )
+    return candidates, result
@@ -0,0 +1,209 @@
+"""
+Department-level eligibility reports.
+
+The completed courses of every student are loaded into a dense boolean
+student x course matrix and the prerequisites into a course x course
+matrix (sparse when SciPy is installed), so the per-course questions
+advisors ask become a handful of matrix operations:
+
+* how many students are eligible for each course next term;
+* which courses block the most students, i.e. are the last missing
+  prerequisite standing between a student and another course.
+
+NumPy is only needed for these reports; the rest of the app runs without it.
+
+    python -m models.reports [--top 20]
+"""
+
+import argparse
+
+try:
+    import numpy as np
+except ImportError:  # Reports are unavailable without NumPy
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:  # Fall back to a dense prerequisite matrix
+    sparse = None
+
+from models import database
+from models.catalog import get_catalog
+from models.eligibility import fetch_cohort
+
+
+class ReportsUnavailable(RuntimeError):
+    """Raised when the reports are requested but NumPy is not installed."""
+
+
+def _require_numpy():
+    if np is None:
+        raise ReportsUnavailable("Eligibility reports require NumPy (pip install numpy)")
+
+
+def completion_matrix(catalog, cohort):
+    """
+    Build the student x course completion matrix.
+    :param cohort: A dict mapping student number to completed course codes.
+    :return: A tuple (student numbers, bool matrix) with columns in catalog order.
+    """
+    _require_numpy()
+    students = sorted(cohort)
+    ids = catalog.eligibility.ids
+    course_count = catalog.eligibility.course_count
+
+    rows = []
+    columns = []
+    for row, student_number in enumerate(students):
+        for code in cohort[student_number]:
+            column = ids.get(code)
+            if column is not None and column < course_count:
+                rows.append(row)
+                columns.append(column)
+
+    completed = np.zeros((len(students), course_count), dtype=bool)
+    completed[rows, columns] = True
+    return students, completed
+
+
+def prerequisite_matrix(catalog):
+    """
+    Build the course x course prerequisite matrix, P[p, c] = 1 if p is a
+    prerequisite of c (sparse CSR when SciPy is available).
+    :return: A tuple (matrix, prerequisite counts per course, unsatisfiable mask)
+             where unsatisfiable marks courses whose prerequisites are not in
+             the catalog and can never be met.
+    """
+    _require_numpy()
+    eligibility = catalog.eligibility
+    course_count = eligibility.course_count
+
+    rows = []
+    columns = []
+    unsatisfiable = np.zeros(course_count, dtype=bool)
+    for course_id in range(course_count):
+        for code in catalog.prerequisites.get(eligibility.codes[course_id], ()):
+            prerequisite_id = eligibility.ids[code]
+            if prerequisite_id >= course_count:
+                unsatisfiable[course_id] = True
+            else:
+                rows.append(prerequisite_id)
+                columns.append(course_id)
+
+    data = np.ones(len(rows), dtype=np.int32)
+    if sparse is not None:
+        matrix = sparse.csr_matrix(
+            (data, (rows, columns)), shape=(course_count, course_count)
+        )
+    else:
+        matrix = np.zeros((course_count, course_count), dtype=np.int32)
+        matrix[rows, columns] = 1
+    counts = np.bincount(np.asarray(columns, dtype=np.intp), minlength=course_count)
+    return matrix, counts, unsatisfiable
+
+
+def _times(completed, matrix):
+    # (students x courses) @ (courses x courses), with either matrix type
+    if sparse is not None and sparse.issparse(matrix):
+        return np.asarray((matrix.T @ completed.T.astype(np.int32)).T)
+    return completed.astype(np.int32) @ matrix
+
+
+def eligibility_report(catalog, cohort):
+    """
+    Compute per-course eligibility and blocking counts for a whole cohort.
+    :param cohort: A dict mapping student number to completed course codes.
+    :return: A dict with the student count and one entry per course holding
+             eligible_students (can take it next term, offered or not),
+             blocking_students (students for whom it is the last missing
+             prerequisite of another course) and blocked_unlocks (how many
+             student/course pairs it is the last missing prerequisite of).
+    """
+    students, completed = completion_matrix(catalog, cohort)
+    matrix, counts, unsatisfiable = prerequisite_matrix(catalog)
+
+    # missing[s, c] = prerequisites of c that student s has not completed
+    missing = counts - _times(completed, matrix)
+    open_courses = ~completed & ~unsatisfiable
+
+    eligible = (missing == 0) & open_courses
+    one_missing = ((missing == 1) & open_courses).astype(np.int32)
+
+    # For each prerequisite p: courses it is the last missing prerequisite of
+    if sparse is not None and sparse.issparse(matrix):
+        last_missing = np.asarray((matrix @ one_missing.T).T)
+    else:
+        last_missing = one_missing @ matrix.T
+    last_missing = np.where(completed, 0, last_missing)
+
+    eligible_students = eligible.sum(axis=0)
+    blocking_students = (last_missing > 0).sum(axis=0)
+    blocked_unlocks = last_missing.sum(axis=0)
+
+    codes = catalog.eligibility.codes
+    return {
+        "students": len(students),
+        "courses": {
+            codes[course_id]: {
+                "eligible_students": int(eligible_students[course_id]),
+                "blocking_students": int(blocking_students[course_id]),
+                "blocked_unlocks": int(blocked_unlocks[course_id]),
+            }
+            for course_id in range(completed.shape[1])
+        },
+    }
+
+
+def eligibility_report_loop(catalog, cohort):
+    """
+    The same eligible_students counts computed one student at a time with
+    prerequisite subset checks, as the planner did before the bitset index.
+    Kept as the baseline for benchmarks.
+    """
+    counts = {code: 0 for code in catalog.courses}
+    for completed_codes in cohort.values():
+        completed_codes = set(completed_codes) & catalog.courses.keys()
+        for code in catalog.courses:
+            if code in completed_codes:
+                continue
+            if catalog.prerequisites.get(code, frozenset()) <= completed_codes:
+                counts[code] += 1
+    return counts
+
+
+def load_report(catalog=None):
+    """Build the eligibility report for every registered student."""
+    _require_numpy()
+    catalog = catalog or get_catalog()
+    with database.connection() as connection:
+        cohort = fetch_cohort(connection.cursor())
+    return eligibility_report(catalog, cohort)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-course eligibility and blocking report.")
+    parser.add_argument("--top", type=int, default=20, help="Courses to list")
+    args = parser.parse_args()
+
+    try:
+        report = load_report()
+    except ReportsUnavailable as e:
+        print(e)
+        raise SystemExit(1)
+
+    courses = report["courses"]
+    print(f"{report['students']} students")
+    print(f"{'course':<10}{'eligible':>10}{'blocking':>10}{'unlocks':>9}")
+    ranked = sorted(
+        courses.items(),
+        key=lambda item: (-item[1]["blocking_students"], -item[1]["blocked_unlocks"]),
+    )
+    for code, counts in ranked[: args.top]:
+        print(
+            f"{code:<10}{counts['eligible_students']:>10}"
+            f"{counts['blocking_students']:>10}{counts['blocked_unlocks']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
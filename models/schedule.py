@@ -0,0 +1,135 @@
+"""
+Section time model.
+
+Section times are parsed once, when the catalog snapshot is built, into
+meeting tuples of (day bitmask, start minute, end minute). Each section also
+gets a week occupancy mask with one bit per minute of the week, so checking
+two sections (or a section against a whole planned schedule) for a clash is
+a single integer AND.
+"""
+
+import re
+from typing import NamedTuple
+
+MINUTES_PER_DAY = 24 * 60
+
+# Arabic day letters used in course_of_study, mapped to a day index (Sunday = 0)
+DAY_INDEX = {
+    "ح": 0,  # Sunday
+    "ن": 1,  # Monday
+    "ث": 2,  # Tuesday
+    "ر": 3,  # Wednesday
+    "خ": 4,  # Thursday
+    "ج": 5,  # Friday
+    "س": 6,  # Saturday
+}
+
+TIME_RANGE_PATTERN = re.compile(
+    r"(\d{1,2}):(\d{2})\s*([AP]M)\s*-\s*(\d{1,2}):(\d{2})\s*([AP]M)", re.IGNORECASE
+)
+
+
+class Meeting(NamedTuple):
+    day_mask: int
+    start: int
+    end: int
+
+
+class Section(NamedTuple):
+    course_code: str
+    section_number: int
+    time: str
+    days: str
+    meetings: tuple
+    occupancy: int
+    capacity: int = None  # Seats, or None if unlimited
+
+    def conflicts_with(self, other):
+        """Return True if the two sections meet at the same time on a shared day."""
+        return bool(self.occupancy & other.occupancy)
+
+    @property
+    def sort_key(self):
+        """Order sections by their day letters, then by the start of their first meeting."""
+        return self.days, self.meetings[0].start if self.meetings else 0
+
+
+def to_minutes(hours, minutes, meridiem):
+    """Convert a 12-hour clock time into minutes after midnight."""
+    hours = int(hours) % 12
+    if meridiem.upper() == "PM":
+        hours += 12
+    return hours * 60 + int(minutes)
+
+
+def days_to_mask(day_letters):
+    """Convert a sequence of Arabic day letters into a day bitmask."""
+    mask = 0
+    for letter in day_letters:
+        if letter not in DAY_INDEX:
+            raise ValueError(f"Unknown day letter: {letter!r}")
+        mask |= 1 << DAY_INDEX[letter]
+    return mask
+
+
+def parse_meetings(time_range, days):
+    """
+    Parse a course_of_study time/days pair into meeting tuples.
+
+    A single range applies to every listed day. When a section lists several
+    ranges (e.g. a lecture followed by a lab, "08:30 AM-09:30 AM 02:30 PM-05:30 PM"
+    with days "ح ث ح"), each extra range takes one day letter from the end
+    of the list and the first range keeps the rest.
+
+    :param time_range: Time string such as "10:00 AM-11:30 AM".
+    :param days: Space-separated day letters such as "ن ر".
+    :return: A tuple of Meeting(day_mask, start, end).
+    """
+    ranges = [
+        (to_minutes(*match[0:3]), to_minutes(*match[3:6]))
+        for match in TIME_RANGE_PATTERN.findall(time_range)
+    ]
+    if not ranges:
+        raise ValueError(f"Invalid time range: {time_range!r}")
+
+    letters = days.split()
+    extra = len(ranges) - 1
+    if extra == 0 or len(letters) <= extra:
+        # Every range meets on every listed day
+        day_groups = [letters] * len(ranges)
+    else:
+        day_groups = [letters[: len(letters) - extra]]
+        day_groups += [[letter] for letter in letters[len(letters) - extra :]]
+
+    return tuple(
+        Meeting(days_to_mask(group), start, end)
+        for (start, end), group in zip(ranges, day_groups)
+    )
+
+
+def occupancy_mask(meetings):
+    """Build the week occupancy mask (one bit per minute) for a set of meetings."""
+    mask = 0
+    for day_mask, start, end in meetings:
+        span = ((1 << (end - start)) - 1) << start
+        day = 0
+        while day_mask:
+            if day_mask & 1:
+                mask |= span << (day * MINUTES_PER_DAY)
+            day_mask >>= 1
+            day += 1
+    return mask
+
+
+def make_section(course_code, section_number, time_range, days, capacity=None):
+    """Parse a course_of_study row into a Section."""
+    meetings = parse_meetings(time_range, days)
+    return Section(
+        course_code,
+        section_number,
+        time_range,
+        days,
+        meetings,
+        occupancy_mask(meetings),
+        capacity,
+    )
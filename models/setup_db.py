@@ -1,8 +1,9 @@
-import sqlite3
+from models import database
+from models.catalog import DEFAULT_CATEGORY_LIMITS, ensure_catalog_meta
 
 def initialize_database():
     # Connect to SQLite database (creates the file if it doesn't exist)
-    connection = sqlite3.connect("data/university_courses.db")
+    connection = database.pool.acquire()
     cursor = connection.cursor()
 
     # Create users table (for login credentials)
@@ -81,11 +82,260 @@ def initialize_database():
     """
 )
 
-    # Commit changes and close the connection
+    # Create category_limits table (credit hours required per category)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS category_limits (
+            category TEXT PRIMARY KEY,
+            required_hours INTEGER NOT NULL
+        );
+        """
+    )
+    cursor.executemany(
+        "INSERT OR IGNORE INTO category_limits (category, required_hours) VALUES (?, ?)",
+        DEFAULT_CATEGORY_LIMITS.items(),
+    )
+
+    # Create catalog_meta table (catalog version used to invalidate snapshots)
+    ensure_catalog_meta(cursor)
+
+    # Commit changes, bring the schema up to date and return the connection to the pool
     connection.commit()
-    connection.close()
+    try:
+        migrate(connection)
+    finally:
+        database.pool.release(connection)
     print("Database and tables initialized successfully.")
 
+
+def _add_keys_and_indexes(cursor):
+    """
+    Give course_prerequisites and course_of_study primary keys and index the
+    reverse lookups used by the planner and the dashboard.
+    """
+    # course_prerequisites: drop duplicate rows left by INSERT OR IGNORE on a
+    # table without a key, then key it on (course, prerequisite)
+    cursor.execute(
+        """
+        CREATE TABLE course_prerequisites_new (
+            course_code TEXT NOT NULL,
+            prerequisite_code TEXT NOT NULL,
+            PRIMARY KEY (course_code, prerequisite_code),
+            FOREIGN KEY (course_code) REFERENCES courses(course_code),
+            FOREIGN KEY (prerequisite_code) REFERENCES courses(course_code)
+        ) WITHOUT ROWID;
+        """
+    )
+    cursor.execute(
+        """
+        INSERT OR IGNORE INTO course_prerequisites_new (course_code, prerequisite_code)
+        SELECT course_code, prerequisite_code FROM course_prerequisites
+        """
+    )
+    cursor.execute("DROP TABLE course_prerequisites")
+    cursor.execute(
+        "ALTER TABLE course_prerequisites_new RENAME TO course_prerequisites"
+    )
+    # "What does this course unlock?"
+    cursor.execute(
+        """
+        CREATE INDEX idx_course_prerequisites_prerequisite
+        ON course_prerequisites (prerequisite_code, course_code)
+        """
+    )
+
+    # course_of_study: number the sections of each course in their current order
+    cursor.execute(
+        """
+        CREATE TABLE course_of_study_new (
+            course_code TEXT NOT NULL,
+            section_number INTEGER NOT NULL,
+            course_name TEXT NOT NULL,
+            credit_hours INTEGER NOT NULL,
+            time TEXT NOT NULL,
+            days TEXT NOT NULL,
+            PRIMARY KEY (course_code, section_number),
+            FOREIGN KEY (course_code) REFERENCES courses(course_code)
+        );
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO course_of_study_new
+            (course_code, section_number, course_name, credit_hours, time, days)
+        SELECT course_code,
+               ROW_NUMBER() OVER (PARTITION BY course_code ORDER BY rowid),
+               course_name, credit_hours, time, days
+        FROM course_of_study
+        """
+    )
+    cursor.execute("DROP TABLE course_of_study")
+    cursor.execute("ALTER TABLE course_of_study_new RENAME TO course_of_study")
+
+    # completed_courses is keyed by student; course-centric reports need the reverse
+    cursor.execute(
+        """
+        CREATE INDEX idx_completed_courses_course
+        ON completed_courses (course_code, student_number)
+        """
+    )
+
+
+def _add_student_stats(cursor):
+    """
+    Add per-student dashboard aggregates and an optional grade per completed course.
+    """
+    cursor.execute("ALTER TABLE completed_courses ADD COLUMN grade REAL")
+    cursor.execute(
+        """
+        CREATE TABLE student_stats (
+            student_number TEXT PRIMARY KEY,
+            completed_count INTEGER NOT NULL,
+            completed_credits INTEGER NOT NULL,
+            remaining_credits INTEGER NOT NULL,
+            category_credits TEXT NOT NULL,
+            graded_credits INTEGER NOT NULL,
+            grade_points REAL NOT NULL,
+            gpa REAL,
+            catalog_version INTEGER NOT NULL,
+            FOREIGN KEY (student_number) REFERENCES student_info(student_number)
+        );
+        """
+    )
+
+
+def _add_student_plans(cursor):
+    """
+    Store the next-semester plan generated for each student by the cohort batch.
+    """
+    cursor.execute(
+        """
+        CREATE TABLE student_plans (
+            student_number TEXT PRIMARY KEY,
+            credit_hours INTEGER NOT NULL,
+            total_hours INTEGER NOT NULL,
+            sections TEXT NOT NULL,
+            complete INTEGER NOT NULL,
+            catalog_version INTEGER NOT NULL,
+            generated_at TEXT NOT NULL,
+            FOREIGN KEY (student_number) REFERENCES student_info(student_number)
+        );
+        """
+    )
+
+
+def _add_section_capacity(cursor):
+    """
+    Add seat capacity per section and the predicted demand per course.
+    """
+    cursor.execute("ALTER TABLE course_of_study ADD COLUMN capacity INTEGER")
+    cursor.execute(
+        """
+        CREATE TABLE course_demand (
+            course_code TEXT PRIMARY KEY,
+            eligible_students INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        """
+    )
+
+
+def _add_student_versions(cursor):
+    """
+    Add a per-student data version, bumped whenever a student's record changes.
+    """
+    cursor.execute(
+        """
+        CREATE TABLE student_versions (
+            student_number TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        """
+    )
+
+
+def _add_jobs(cursor):
+    """
+    Track background jobs in the database so every web worker sees every job.
+    """
+    cursor.execute(
+        """
+        CREATE TABLE jobs (
+            job_id TEXT PRIMARY KEY,
+            task TEXT NOT NULL,
+            params TEXT NOT NULL,
+            dedup_key TEXT NOT NULL,
+            status TEXT NOT NULL,
+            done INTEGER,
+            total INTEGER,
+            result BLOB,
+            error TEXT,
+            time_limit REAL NOT NULL,
+            submitted_at REAL NOT NULL,
+            heartbeat_at REAL NOT NULL,
+            finished_at REAL
+        );
+        """
+    )
+    cursor.execute("CREATE INDEX idx_jobs_dedup_key ON jobs (dedup_key, status)")
+    cursor.execute("CREATE INDEX idx_jobs_finished_at ON jobs (finished_at)")
+    cursor.execute(
+        """
+        CREATE TABLE job_owners (
+            job_id TEXT NOT NULL,
+            owner TEXT NOT NULL,
+            PRIMARY KEY (job_id, owner),
+            FOREIGN KEY (job_id) REFERENCES jobs(job_id)
+        ) WITHOUT ROWID;
+        """
+    )
+
+
+# Schema migrations, applied in order; a database at PRAGMA user_version N
+# has had the first N applied. Only ever append to this list.
+MIGRATIONS = [
+    _add_keys_and_indexes,
+    _add_student_stats,
+    _add_student_plans,
+    _add_section_capacity,
+    _add_student_versions,
+    _add_jobs,
+]
+
+
+def migrate(connection):
+    """
+    Upgrade an existing database in place to the latest schema version.
+    Each migration runs in its own transaction together with the version bump.
+    The transaction takes the write lock before reading the version, so when
+    several workers start at once each migration is applied by one of them.
+    :return: The schema version after migrating.
+    """
+    cursor = connection.cursor()
+    cursor.execute("PRAGMA user_version")
+    version = cursor.fetchone()[0]
+
+    for target_version, migration in enumerate(MIGRATIONS, start=1):
+        if target_version <= version:
+            continue
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have applied it since the version was read
+            cursor.execute("PRAGMA user_version")
+            version = cursor.fetchone()[0]
+            if target_version <= version:
+                connection.rollback()
+                continue
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {target_version}")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        print(f"Applied migration {target_version}: {migration.__name__}")
+        version = target_version
+    return version
+
+
 # Initialize the database
 if __name__ == "__main__":
     initialize_database()
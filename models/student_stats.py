@@ -0,0 +1,263 @@
+"""
+Per-student dashboard aggregates.
+
+The student_stats table keeps one row per student with their completed
+course count, credits per category, remaining credits and GPA, so the
+dashboard is a single primary-key lookup. Rows are updated incrementally
+from the added/removed courses whenever a study plan is saved, recomputed
+lazily when they were built from an older catalog version, and can be
+rebuilt in bulk with:
+
+    python -m models.student_stats --rebuild [--check]
+"""
+
+import argparse
+import json
+from typing import NamedTuple
+
+from models import database
+from models.catalog import get_catalog
+
+_COLUMNS = (
+    "student_number",
+    "completed_count",
+    "completed_credits",
+    "remaining_credits",
+    "category_credits",
+    "graded_credits",
+    "grade_points",
+    "gpa",
+    "catalog_version",
+)
+
+_UPSERT = f"""
+    INSERT INTO student_stats ({", ".join(_COLUMNS)})
+    VALUES ({", ".join("?" * len(_COLUMNS))})
+    ON CONFLICT(student_number) DO UPDATE SET
+    {", ".join(f"{column} = excluded.{column}" for column in _COLUMNS[1:])}
+"""
+
+
+class StudentStats(NamedTuple):
+    completed_count: int
+    completed_credits: int
+    remaining_credits: int
+    category_credits: dict  # category -> {"completed": hours, "remaining": hours}
+    graded_credits: int
+    grade_points: float
+
+    @property
+    def gpa(self):
+        if not self.graded_credits:
+            return None
+        return round(self.grade_points / self.graded_credits, 2)
+
+
+def compute_stats(catalog, completed_rows):
+    """
+    Compute a student's aggregates from scratch.
+    :param catalog: The current CatalogSnapshot.
+    :param completed_rows: Iterable of (course_code, grade) for the student's
+                           completed courses; grade may be None.
+    :return: A StudentStats.
+    """
+    category_credits = {}
+    remaining_credits = 0
+    for course in catalog.courses.values():
+        totals = category_credits.setdefault(
+            course.category, {"completed": 0, "remaining": 0}
+        )
+        totals["remaining"] += course.credit_hours
+        remaining_credits += course.credit_hours
+
+    stats = StudentStats(0, 0, remaining_credits, category_credits, 0, 0.0)
+    return apply_changes(catalog, stats, added=completed_rows)
+
+
+def apply_changes(catalog, stats, added=(), removed=()):
+    """
+    Return stats updated for courses added to or removed from a student's record.
+    :param added: Iterable of (course_code, grade) that became completed.
+    :param removed: Iterable of (course_code, grade) that are no longer completed.
+    """
+    completed_count = stats.completed_count
+    completed_credits = stats.completed_credits
+    remaining_credits = stats.remaining_credits
+    graded_credits = stats.graded_credits
+    grade_points = stats.grade_points
+    category_credits = {
+        category: dict(totals) for category, totals in stats.category_credits.items()
+    }
+
+    for rows, sign in ((added, 1), (removed, -1)):
+        for course_code, grade in rows:
+            completed_count += sign
+            course = catalog.courses.get(course_code)
+            if course is None:
+                continue
+            hours = course.credit_hours * sign
+            completed_credits += hours
+            remaining_credits -= hours
+            totals = category_credits.setdefault(
+                course.category, {"completed": 0, "remaining": 0}
+            )
+            totals["completed"] += hours
+            totals["remaining"] -= hours
+            if grade is not None:
+                graded_credits += hours
+                grade_points += grade * hours
+
+    return StudentStats(
+        completed_count,
+        completed_credits,
+        remaining_credits,
+        category_credits,
+        graded_credits,
+        grade_points,
+    )
+
+
+def _store(cursor, catalog, student_number, stats):
+    cursor.execute(_UPSERT, _row(catalog, student_number, stats))
+
+
+def _row(catalog, student_number, stats):
+    return (
+        student_number,
+        stats.completed_count,
+        stats.completed_credits,
+        stats.remaining_credits,
+        json.dumps(stats.category_credits, sort_keys=True),
+        stats.graded_credits,
+        stats.grade_points,
+        stats.gpa,
+        catalog.version,
+    )
+
+
+def _load(cursor, catalog, student_number):
+    """Return the stored stats, or None if missing or built from another catalog version."""
+    cursor.execute(
+        """
+        SELECT completed_count, completed_credits, remaining_credits,
+               category_credits, graded_credits, grade_points, catalog_version
+        FROM student_stats
+        WHERE student_number = ?
+        """,
+        (student_number,),
+    )
+    row = cursor.fetchone()
+    if row is None or row[6] != catalog.version:
+        return None
+    return StudentStats(row[0], row[1], row[2], json.loads(row[3]), row[4], row[5])
+
+
+def _recompute(cursor, catalog, student_number):
+    cursor.execute(
+        "SELECT course_code, grade FROM completed_courses WHERE student_number = ?",
+        (student_number,),
+    )
+    stats = compute_stats(catalog, cursor.fetchall())
+    _store(cursor, catalog, student_number, stats)
+    return stats
+
+
+def get_student_stats(cursor, student_number, catalog=None):
+    """
+    Return a student's aggregates with one primary-key lookup, recomputing
+    (and storing) them only if they are missing or stale. The caller commits.
+    """
+    catalog = catalog or get_catalog()
+    stats = _load(cursor, catalog, student_number)
+    if stats is None:
+        stats = _recompute(cursor, catalog, student_number)
+    return stats
+
+
+def update_student_stats(cursor, student_number, added=(), removed=(), catalog=None):
+    """
+    Apply a saved change to a student's aggregates. Must run in the same
+    transaction as the change to completed_courses; the caller commits.
+    :param added: Iterable of (course_code, grade) inserted into completed_courses.
+    :param removed: Iterable of (course_code, grade) deleted from completed_courses.
+    """
+    catalog = catalog or get_catalog()
+    stats = _load(cursor, catalog, student_number)
+    if stats is None:
+        # Nothing current to patch; completed_courses already holds the change
+        return _recompute(cursor, catalog, student_number)
+    stats = apply_changes(catalog, stats, added, removed)
+    _store(cursor, catalog, student_number, stats)
+    return stats
+
+
+def rebuild_all(cursor, catalog=None, check=False):
+    """
+    Recompute every student's aggregates in bulk from completed_courses.
+    :param check: Compare with the stored rows before replacing them.
+    :return: A tuple (students rebuilt, student numbers whose stored row differed,
+             student numbers that had no stored row).
+    """
+    catalog = catalog or get_catalog()
+    cursor.execute("SELECT student_number FROM student_info")
+    completed = {row[0]: [] for row in cursor.fetchall()}
+    cursor.execute("SELECT student_number, course_code, grade FROM completed_courses")
+    for student_number, course_code, grade in cursor.fetchall():
+        completed.setdefault(student_number, []).append((course_code, grade))
+
+    rows = [
+        _row(catalog, student_number, compute_stats(catalog, completed_rows))
+        for student_number, completed_rows in completed.items()
+    ]
+
+    mismatched = []
+    missing = []
+    if check:
+        cursor.execute("SELECT * FROM student_stats")
+        columns = [description[0] for description in cursor.description]
+        stored = {
+            row[0]: tuple(dict(zip(columns, row))[column] for column in _COLUMNS)
+            for row in cursor.fetchall()
+        }
+        missing = [row[0] for row in rows if row[0] not in stored]
+        mismatched = [
+            row[0] for row in rows if row[0] in stored and stored[row[0]] != row
+        ]
+
+    cursor.execute("DELETE FROM student_stats")
+    cursor.executemany(_UPSERT, rows)
+    return len(rows), mismatched, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain per-student dashboard aggregates.")
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Recompute the aggregates of every student from completed_courses",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Report students whose stored aggregates were out of date",
+    )
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    with database.connection() as connection:
+        cursor = connection.cursor()
+        count, mismatched, missing = rebuild_all(cursor, check=args.check)
+        connection.commit()
+
+    print(f"Rebuilt aggregates for {count} students.")
+    if args.check:
+        print(f"{len(missing)} students had no stored aggregates.")
+        print(f"{len(mismatched)} stored rows were inconsistent.")
+        for student_number in mismatched:
+            print(f"  {student_number}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import sqlite3
+
+from models.demand import update_course_demand
+from models.fragments import bump_student_version
+from models.student_stats import update_student_stats
+
+
+# Grades are course marks out of 100; a student's GPA is their credit-weighted mean
+MAX_GRADE = 100
+
+
+class InvalidCourseCodes(ValueError):
+    """Raised when a study plan change names courses that are not in the catalog."""
+
+    def __init__(self, codes):
+        super().__init__(f"Unknown course codes: {', '.join(map(str, codes))}")
+        self.codes = codes
+
+
+class UncompletedGrades(ValueError):
+    """Raised when a study plan change grades courses the student has not completed."""
+
+    def __init__(self, codes):
+        super().__init__(f"Grades for courses not completed: {', '.join(codes)}")
+        self.codes = codes
+
+
+def is_code_list(value):
+    """Return True if value is a list of course code strings, as study plan changes must be."""
+    return isinstance(value, list) and all(isinstance(code, str) for code in value)
+
+
+def is_grade_map(value):
+    """
+    Return True if value maps course code strings to grades from 0 to MAX_GRADE,
+    or to None to clear a grade.
+    """
+    return isinstance(value, dict) and all(
+        grade is None
+        or (
+            isinstance(grade, (int, float))
+            and not isinstance(grade, bool)
+            and 0 <= grade <= MAX_GRADE
+        )
+        for grade in value.values()
+    )
+
+
+def save_completed_courses(
+    connection, catalog, student_number, completed=None, add=(), remove=(), grades=None
+):
+    """
+    Apply a change to a student's completed courses, touching only the rows that change.
+
+    Either pass the full set of completed courses (`completed`) and the delta
+    against the stored set is computed, or pass just the courses to `add` and
+    `remove`. Codes are validated against the catalog before anything is
+    written; inserts and deletes then run with executemany in one short
+    transaction together with the dashboard aggregate and course demand
+    updates.
+
+    :param connection: An open database connection.
+    :param catalog: The current CatalogSnapshot.
+    :param student_number: The student whose record changes.
+    :param completed: Optional iterable with the complete new set of course codes.
+    :param add: Course codes to mark as completed.
+    :param remove: Course codes to mark as not completed.
+    :param grades: Optional dict of course code -> grade (None clears it) for
+                   courses that are completed once the change is applied.
+    :return: A tuple (added codes, removed codes).
+    :raises InvalidCourseCodes: If a code is not in the catalog.
+    :raises UncompletedGrades: If a graded course is not completed.
+    """
+    grades = dict(grades or {})
+    requested = set(add) | set(remove) | grades.keys()
+    if completed is not None:
+        completed = set(completed)
+        requested |= completed
+    unknown = sorted(code for code in requested if code not in catalog.courses)
+    if unknown:
+        raise InvalidCourseCodes(unknown)
+
+    cursor = connection.cursor()
+    # Take the write lock before reading so the delta can't go stale
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute(
+            "SELECT course_code, grade FROM completed_courses WHERE student_number = ?",
+            (student_number,),
+        )
+        stored = dict(cursor.fetchall())
+
+        if completed is not None:
+            to_add = completed - stored.keys()
+            to_remove = stored.keys() - completed
+        else:
+            to_add = set(add) - stored.keys()
+            to_remove = (set(remove) & stored.keys()) - set(add)
+        to_add = sorted(to_add)
+        to_remove = sorted(to_remove)
+        now_completed = (stored.keys() - set(to_remove)) | set(to_add)
+        uncompleted = sorted(grades.keys() - now_completed)
+        if uncompleted:
+            connection.rollback()
+            raise UncompletedGrades(uncompleted)
+        # Courses that stay completed and get another grade
+        regraded = sorted(
+            code
+            for code, grade in grades.items()
+            if code in stored and code in now_completed and stored[code] != grade
+        )
+
+        cursor.executemany(
+            "DELETE FROM completed_courses WHERE student_number = ? AND course_code = ?",
+            [(student_number, code) for code in to_remove],
+        )
+        cursor.executemany(
+            "INSERT INTO completed_courses (student_number, course_code, grade) "
+            "VALUES (?, ?, ?)",
+            [(student_number, code, grades.get(code)) for code in to_add],
+        )
+        cursor.executemany(
+            "UPDATE completed_courses SET grade = ? WHERE student_number = ? AND course_code = ?",
+            [(grades[code], student_number, code) for code in regraded],
+        )
+        if to_add or to_remove or regraded:
+            # A new grade is the course leaving with its old grade and coming back
+            update_student_stats(
+                cursor,
+                student_number,
+                added=[(code, grades.get(code)) for code in to_add]
+                + [(code, grades[code]) for code in regraded],
+                removed=[(code, stored[code]) for code in to_remove + regraded],
+                catalog=catalog,
+            )
+            bump_student_version(cursor, student_number)
+        if to_add or to_remove:
+            update_course_demand(cursor, catalog, stored.keys(), now_completed)
+        connection.commit()
+    except sqlite3.Error:
+        connection.rollback()
+        raise
+
+    return to_add, to_remove
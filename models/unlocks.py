@@ -0,0 +1,110 @@
+"""
+Reverse-prerequisite ("unlock") index.
+
+Built once per catalog snapshot: for every course it records the courses
+that list it as a direct prerequisite, every course downstream of it in the
+prerequisite graph (the transitive closure, computed with bitsets in
+reverse topological order), its depth (the longest prerequisite chain below
+it) and an impact score, the number of downstream courses it unlocks.
+"""
+
+from types import MappingProxyType
+from typing import NamedTuple
+
+
+class CourseUnlocks(NamedTuple):
+    code: str
+    depth: int  # Longest prerequisite chain leading to the course; None inside a cycle
+    direct: tuple  # Courses listing this one as a prerequisite, in catalog order
+    downstream: tuple  # Every course that transitively requires this one, in catalog order
+    score: int  # len(downstream)
+
+
+class UnlockIndex:
+    """
+    Precomputed reverse-prerequisite structure for one catalog snapshot.
+    Lookups are dictionary reads.
+    """
+
+    def __init__(self, course_codes, prerequisites):
+        """
+        :param course_codes: Course codes in catalog order.
+        :param prerequisites: Mapping of course code to its prerequisite codes.
+        """
+        codes = list(course_codes)
+        ids = {code: course_id for course_id, code in enumerate(codes)}
+
+        # Edges between catalog courses only; dangling codes unlock nothing
+        dependents = [[] for _ in codes]
+        indegree = [0] * len(codes)
+        for course_id, code in enumerate(codes):
+            for prerequisite_code in prerequisites.get(code, ()):
+                prerequisite_id = ids.get(prerequisite_code)
+                if prerequisite_id is not None:
+                    dependents[prerequisite_id].append(course_id)
+                    indegree[course_id] += 1
+
+        # Kahn's algorithm; courses on or behind a cycle are never released
+        order = [course_id for course_id in range(len(codes)) if indegree[course_id] == 0]
+        depth = [0] * len(codes)
+        for course_id in order:
+            for dependent in dependents[course_id]:
+                depth[dependent] = max(depth[dependent], depth[course_id] + 1)
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    order.append(dependent)
+        ordered = set(order)
+
+        # downstream[c] = bitmask of every course reachable from c
+        downstream = [0] * len(codes)
+        for course_id in reversed(order):
+            mask = 0
+            for dependent in dependents[course_id]:
+                mask |= (1 << dependent) | downstream[dependent]
+            downstream[course_id] = mask
+        for course_id in range(len(codes)):
+            if course_id not in ordered:
+                downstream[course_id] = self._reachable(course_id, dependents)
+
+        def to_codes(mask):
+            found = []
+            while mask:
+                lowest = mask & -mask
+                found.append(codes[lowest.bit_length() - 1])
+                mask ^= lowest
+            return tuple(found)
+
+        self._courses = MappingProxyType(
+            {
+                code: CourseUnlocks(
+                    code,
+                    depth[course_id] if course_id in ordered else None,
+                    tuple(codes[dependent] for dependent in sorted(dependents[course_id])),
+                    to_codes(downstream[course_id]),
+                    bin(downstream[course_id]).count("1"),
+                )
+                for course_id, code in enumerate(codes)
+            }
+        )
+
+    @staticmethod
+    def _reachable(start, dependents):
+        # Plain traversal for the few courses a topological order can't cover
+        mask = 0
+        stack = list(dependents[start])
+        while stack:
+            course_id = stack.pop()
+            if mask >> course_id & 1:
+                continue
+            mask |= 1 << course_id
+            stack.extend(dependents[course_id])
+        return mask
+
+    def get(self, code):
+        """Return the CourseUnlocks of a course, or None if it is not in the catalog."""
+        return self._courses.get(code)
+
+    def score(self, code):
+        """Return how many downstream courses a course unlocks (0 if unknown)."""
+        entry = self._courses.get(code)
+        return entry.score if entry else 0
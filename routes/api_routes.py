@@ -0,0 +1,250 @@
+"""
+Versioned JSON API.
+
+The dashboard and third-party tools call the planner here instead of
+fetching rendered HTML. Payloads are compact: plans and study data refer
+to courses by code and sections by number only, and the catalog itself
+(names, categories, hours, section times) is served once from
+/api/v1/catalog, tagged with the catalog version so clients can keep it
+until the version in a plan response changes. Versions sent to clients
+carry the build (see models.fragments), so a recreated database never
+reuses one.
+"""
+
+import json
+import sqlite3
+
+from flask import Blueprint, request, session
+
+from models import jobs
+from models.access import job_owner
+from models.catalog import get_catalog
+from models.database import get_db
+from models.fragments import (
+    conditional_fragment,
+    fragment_cache,
+    fragment_etag,
+    read_student_version,
+    tag_catalog_version,
+)
+from models.plan_search import find_schedules
+from models.planner import MAX_CREDIT_HOURS
+from models.study_plan import (
+    MAX_GRADE,
+    InvalidCourseCodes,
+    UncompletedGrades,
+    is_code_list,
+    is_grade_map,
+    save_completed_courses,
+)
+
+api_routes = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+def catalog_payload(catalog):
+    """
+    Serialize a catalog snapshot for clients.
+    Courses map to [name, category, credit hours], sections to
+    [section number, time, days, capacity] lists.
+    """
+    return {
+        "version": tag_catalog_version(catalog.version),
+        "courses": {
+            course.code: [course.name, course.category, course.credit_hours]
+            for course in catalog.courses.values()
+        },
+        "sections": {
+            code: [
+                [section.section_number, section.time, section.days, section.capacity]
+                for section in sections
+            ]
+            for code, sections in catalog.sections.items()
+        },
+        "prerequisites": {
+            code: sorted(prerequisite_codes)
+            for code, prerequisite_codes in catalog.prerequisites.items()
+            if prerequisite_codes
+        },
+    }
+
+
+def plan_payload(catalog_version, candidates, result):
+    """
+    Serialize a schedule search by reference to the catalog.
+    :return: A dict with the eligible course codes (in priority order), the
+             schedules as [course code, section number] pairs, best first,
+             and whether the search finished within its time budget.
+    """
+    return {
+        "catalog_version": tag_catalog_version(catalog_version),
+        "complete": result.complete,
+        "eligible": [course.code for course, _ in candidates],
+        "plans": [
+            {
+                "total_hours": schedule.total_hours,
+                "sections": [
+                    [course.code, section.section_number]
+                    for course, section in schedule.sections
+                ],
+            }
+            for schedule in result.schedules
+        ],
+    }
+
+
+@api_routes.route("/catalog", methods=["GET"])
+def catalog():
+    """
+    Return the whole catalog, serialized once per catalog version.
+    """
+    snapshot = get_catalog()
+    return conditional_fragment(
+        fragment_etag("api/catalog", snapshot.version),
+        lambda: fragment_cache.get_or_render(
+            "api/catalog",
+            snapshot.version,
+            lambda: json.dumps(catalog_payload(snapshot), separators=(",", ":")),
+        ),
+        mimetype="application/json",
+    )
+
+
+@api_routes.route("/plan", methods=["POST"])
+def plan():
+    """
+    Plan the logged-in student's next semester.
+
+    Expects {"credit_hours": N, "alternatives": N, "balanced": bool,
+    "background": bool}. With background set, a cache miss whose search may
+    run long (see models.plan_search) is queued as a job and answered with
+    202 {"job_id": ...}; fetch the plan from /api/v1/plan/<job_id> once the
+    job has finished.
+    """
+    student_number = session.get("student_number")
+    if not student_number:
+        return {"error": "Not authenticated"}, 403
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return {"error": "Expected a JSON object"}, 400
+    credit_hours = data.get("credit_hours")
+    alternatives = data.get("alternatives", 1)
+    if any(
+        isinstance(value, bool) or not isinstance(value, int)
+        for value in (credit_hours, alternatives)
+    ):
+        return {"error": "credit_hours and alternatives must be integers"}, 400
+    if not 1 <= credit_hours <= MAX_CREDIT_HOURS:
+        return {"error": f"credit_hours must be a whole number from 1 to {MAX_CREDIT_HOURS}"}, 400
+
+    cached, job_id = find_schedules(
+        student_number,
+        credit_hours,
+        alternatives,
+        bool(data.get("balanced")),
+        background=bool(data.get("background")),
+    )
+    if job_id is not None:
+        return {"job_id": job_id}, 202
+    return plan_payload(get_catalog().version, *cached)
+
+
+@api_routes.route("/plan/<job_id>", methods=["GET"])
+def plan_job_result(job_id):
+    """
+    Return the plan computed by a finished background job.
+    """
+    if not session.get("student_number"):
+        return {"error": "Not authenticated"}, 403
+
+    finished = jobs.job_queue.result(job_id, owner=job_owner())
+    if finished is None or finished[0] != "schedules":
+        return {"error": "No finished plan for this job"}, 404
+    # Its courses and sections may not exist in the catalog clients can fetch now
+    if finished[1]["catalog_version"] != get_catalog().version:
+        return {"error": "The catalog changed since this plan was made; plan again"}, 409
+    return plan_payload(finished[1]["catalog_version"], *finished[2])
+
+
+@api_routes.route("/study-plan", methods=["GET"])
+def study_plan():
+    """
+    Return the codes of the logged-in student's completed courses and the
+    grades recorded for them.
+    """
+    student_number = session.get("student_number")
+    if not student_number:
+        return {"error": "Not authenticated"}, 403
+
+    catalog_version = get_catalog().version
+    cursor = get_db().cursor()
+
+    def render():
+        cursor.execute(
+            "SELECT course_code, grade FROM completed_courses WHERE student_number = ? "
+            "ORDER BY course_code",
+            (student_number,),
+        )
+        rows = cursor.fetchall()
+        return json.dumps(
+            {
+                "catalog_version": tag_catalog_version(catalog_version),
+                "completed": [code for code, _ in rows],
+                "grades": {code: grade for code, grade in rows if grade is not None},
+            },
+            separators=(",", ":"),
+        )
+
+    return conditional_fragment(
+        fragment_etag(
+            "api/study-plan",
+            student_number,
+            catalog_version,
+            read_student_version(cursor, student_number),
+        ),
+        render,
+        mimetype="application/json",
+    )
+
+
+@api_routes.route("/study-plan", methods=["PUT", "PATCH"])
+def update_study_plan():
+    """
+    Change the logged-in student's completed courses.
+
+    PUT replaces the set with {"completed": [...]}; PATCH applies
+    {"add": [...], "remove": [...]}. Either may also send {"grades": {code:
+    grade}} with marks from 0 to MAX_GRADE (null clears one) for courses that are
+    completed after the change; they make up the dashboard's GPA.
+    """
+    student_number = session.get("student_number")
+    if not student_number:
+        return {"error": "Not authenticated"}, 403
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return {"error": "Expected a JSON object"}, 400
+
+    if request.method == "PATCH":
+        changes = {"add": data.get("add", []), "remove": data.get("remove", [])}
+    else:
+        changes = {"completed": data.get("completed", [])}
+    if not all(is_code_list(codes) for codes in changes.values()):
+        return {"error": "Course codes must be sent as lists of strings"}, 400
+    changes["grades"] = data.get("grades", {})
+    if not is_grade_map(changes["grades"]):
+        return {"error": f"Grades must map course codes to numbers from 0 to {MAX_GRADE}"}, 400
+
+    try:
+        added, removed = save_completed_courses(
+            get_db(), get_catalog(), student_number, **changes
+        )
+    except InvalidCourseCodes as e:
+        return {"error": "Unknown course codes", "invalid": e.codes}, 400
+    except UncompletedGrades as e:
+        return {"error": "Grades given for courses not completed", "invalid": e.codes}, 400
+    except sqlite3.Error as e:
+        print(f"Error saving study plan: {e}")
+        return {"error": "Could not save the study plan"}, 500
+
+    return {"added": added, "removed": removed}
@@ -1,14 +1,107 @@
-from flask import render_template, Blueprint, request, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import (
+    before_render_template,
+    g,
+    render_template,
+    Blueprint,
+    request,
+    redirect,
+    url_for,
+    session,
+    flash,
+    current_app,
+    make_response,
+    send_file,
+    template_rendered,
+)
+import cProfile
+import io
 import sqlite3
 import re
-import os
+from models.catalog import get_catalog
+from models.database import get_db
+from models.demand import (
+    get_course_demand,
+    section_demand,
+    update_course_demand,
+)
+from models import database, jobs, metrics, passwords
+from models.access import is_admin, job_owner
+from models.eligibility import fetch_cohort
+from models.exports import EXPORT_FORMATS, export_plan, is_plan_rows
+from models.fragments import (
+    bump_student_version,
+    conditional_fragment,
+    fragment_cache,
+    fragment_etag,
+    read_student_version,
+)
+from models.graduation import DEFAULT_CREDIT_CAP, MAX_CREDIT_CAP, plan_graduation
+from models.plan_cache import plan_cache
+from models.plan_search import find_schedules
+from models.planner import MAX_CREDIT_HOURS
+from models.student_stats import compute_stats, get_student_stats
+from models.study_plan import InvalidCourseCodes, is_code_list, save_completed_courses
 
 # Define a Blueprint for authentication-related routes
 auth_routes = Blueprint("auth", __name__)
 
-# Define the path to the SQLite database
-DATABASE_PATH = os.path.abspath("data/university_courses.db")
+# Request header that asks for a cProfile dump (honoured only with PROFILING_ENABLED)
+PROFILE_HEADER = "X-Profile"
+
+
+@auth_routes.before_app_request
+def start_request_metrics():
+    """
+    Start timing every request of the app, and profile it when asked to.
+    """
+    metrics.start_request()
+    if current_app.config.get("PROFILING_ENABLED") and request.headers.get(PROFILE_HEADER):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # Another request on this worker is being profiled
+            return
+        g.profiler = profiler
+
+
+@auth_routes.after_app_request
+def finish_request_metrics(response):
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        response.headers[PROFILE_HEADER] = metrics.dump_profile(
+            profiler, current_app.config.get("PROFILE_DIR", "profiles"), request.endpoint
+        )
+    metrics.finish_request(
+        request.endpoint or "unmatched", response.status_code, response.content_length
+    )
+    return response
+
+
+def _template_started(sender, template, context, **extra):
+    metrics.template_started()
+
+
+def _template_rendered(sender, template, context, **extra):
+    metrics.template_finished(template.name)
+
+
+@auth_routes.app_errorhandler(passwords.HashingBusy)
+def hashing_busy(error):
+    """
+    Turn requests away quickly while the password hashing pool is saturated.
+    """
+    return (
+        "<p>The server is busy. Please try again in a moment.</p>",
+        503,
+        {"Retry-After": "1"},
+    )
+
+
+@auth_routes.record_once
+def connect_template_metrics(state):
+    before_render_template.connect(_template_started, state.app)
+    template_rendered.connect(_template_rendered, state.app)
 
 
 # Login Route
@@ -22,8 +115,8 @@ def login():
         student_number = request.form["student_number"]
         password = request.form["password"]
 
-        # Connect to the database
-        connection = sqlite3.connect(DATABASE_PATH)
+        # Borrow this request's pooled database connection
+        connection = get_db()
         cursor = connection.cursor()
 
         # Retrieve the hashed password and student name
@@ -37,11 +130,19 @@ def login():
             (student_number,),
         )
         user = cursor.fetchone()
-        connection.close()
 
-        # Validate the user credentials
-        if user and check_password_hash(user[0], password):
-            # Password is correct
+        # Validate the user credentials (on the hashing pool, not this thread)
+        matches, new_hash = (
+            passwords.hasher.verify(user[0], password) if user else (False, None)
+        )
+        if matches:
+            # Password is correct; upgrade its hash if the hash settings changed
+            if new_hash:
+                cursor.execute(
+                    "UPDATE users SET password = ? WHERE student_number = ?",
+                    (new_hash, student_number),
+                )
+                connection.commit()
             session["student_number"] = student_number
             session["student_name"] = user[1]
             flash("Login successful!", "success")
@@ -56,40 +157,22 @@ def login():
 @auth_routes.route("/dashboard", methods=["GET", "POST"])
 def dashboard():
     student_number = session.get("student_number")
-    connection = sqlite3.connect(DATABASE_PATH)
+    connection = get_db()
     cursor = connection.cursor()
 
-    # Fetch completed courses count
-    cursor.execute(
-        "SELECT COUNT(*) FROM completed_courses WHERE student_number = ?",
-        (student_number,),
-    )
-    completed_courses = cursor.fetchone()[0]
-
-    # Fetch the remaining credits
-    cursor.execute(
-        """
-        SELECT SUM(c.credit_hours)
-        FROM courses c
-        WHERE c.course_code NOT IN (
-            SELECT cc.course_code FROM completed_courses cc WHERE cc.student_number = ?
-        )
-        """,
-        (student_number,),
-    )
-    remaining_credits = cursor.fetchone()[0] or 0
-
-    # Fetch GPA (example data; replace with actual GPA calculation)
-    gpa = 4.0
-
-    connection.close()
+    # Completed courses, remaining credits and GPA come from one aggregate row
+    if student_number:
+        stats = get_student_stats(cursor, student_number)
+        connection.commit()  # Persist the row if it had to be (re)computed
+    else:
+        stats = compute_stats(get_catalog(), [])
 
     return render_template(
         "dashboard.html",
         student_name=session.get("student_name", "Student"),
-        completed_courses=completed_courses,
-        remaining_credits=remaining_credits,
-        gpa=gpa,
+        completed_courses=stats.completed_count,
+        remaining_credits=stats.remaining_credits,
+        gpa=stats.gpa,
     )
 
 
@@ -153,7 +236,7 @@ def register():
             return render_template("register.html", errors=errors)
 
         # Check for duplicates
-        connection = sqlite3.connect(DATABASE_PATH)
+        connection = get_db()
         cursor = connection.cursor()
         try:
             cursor.execute(
@@ -171,7 +254,7 @@ def register():
                 return render_template("register.html", errors=errors)
 
             # Hash the password and save user data
-            hashed_password = generate_password_hash(password)
+            hashed_password = passwords.hasher.hash(password)
             cursor.execute(
                 "INSERT INTO users (student_number, password) VALUES (?, ?)",
                 (student_number, hashed_password),
@@ -183,6 +266,8 @@ def register():
             """,
                 (student_number, name, major, email, phone_number, address),
             )
+            # A new student is eligible for the courses without prerequisites
+            update_course_demand(cursor, get_catalog(), None, ())
             connection.commit()
             flash("Registration successful! Please log in.", "success")
             return redirect(url_for("auth.login"))
@@ -190,8 +275,6 @@ def register():
             flash("An error occurred during registration. Please try again.", "danger")
             print(f"Database error: {e}")
             return render_template("register.html", errors={})
-        finally:
-            connection.close()
 
     return render_template("register.html", errors={})
 
@@ -204,36 +287,29 @@ def forgot_password():
     """
     def update_password(student_number, hashed_password):
         """Update the user's password in the database."""
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute(
             "UPDATE users SET password = ? WHERE student_number = ?",
             (hashed_password, student_number),
         )
         conn.commit()
-        conn.close()
 
     if request.method == "POST":
         student_number = request.form["student_number"]
         new_password = request.form["password"]
 
-        # Hash the new password
-        from werkzeug.security import generate_password_hash
-
-        hashed_password = generate_password_hash(new_password)
-
         # Check if the student number exists
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute(
             "SELECT * FROM users WHERE student_number = ?", (student_number,)
         )
         user = cursor.fetchone()
-        conn.close()
 
         if user:
             # Update password with the hashed value
-            update_password(student_number, hashed_password)
+            update_password(student_number, passwords.hasher.hash(new_password))
             flash(
                 "Password reset successfully! You can now log in with your new password.",
                 "success",
@@ -251,14 +327,24 @@ def load_partial(section):
     """
     Dynamically loads partial content based on the section requested.
     """
-    if section == "student_info":
-        return render_template("partials/student_info.html")
-    elif section == "study_plan":
-        return render_template("partials/study_plan.html")
-    elif section == "generate_plan":
-        return render_template("partials/generate_plan.html")
-    else:
+    # student_info and study_plan have routes of their own
+    if section not in ("generate_plan",):
         return "<p>Section not found.</p>", 404
+    return catalog_fragment(f"partials/{section}.html")
+
+
+def catalog_fragment(template):
+    """
+    Serve a fragment that only depends on the catalog, rendered once per
+    catalog version.
+    """
+    catalog = get_catalog()
+    return conditional_fragment(
+        fragment_etag(template, catalog.version),
+        lambda: fragment_cache.get_or_render(
+            template, catalog.version, lambda: render_template(template)
+        ),
+    )
 
 
 @auth_routes.route("/load-partial/student_info", methods=["GET", "POST"])
@@ -276,7 +362,7 @@ def load_partial_student_info():
             403,
         )  # Return error if the user is not logged in
 
-    conn = sqlite3.connect("data/university_courses.db")
+    conn = get_db()
     cursor = conn.cursor()
 
     if request.method == "POST":
@@ -288,9 +374,6 @@ def load_partial_student_info():
         major = request.form.get("major")
         password = request.form.get("password")  # New password (if provided)
 
-        # Debugging: Log received data
-        print(f"Updating student info: {name}, {email}, {phone}, {address}, {major}")
-
         # Update the student_info table
         cursor.execute(
             """
@@ -301,291 +384,503 @@ def load_partial_student_info():
             (name, email, phone, address, major, student_number),
         )
 
-        # If a new password is provided, update it in the users table
+        # If a new password is provided, store its hash in the users table
         if password:
-            print(f"Updating password for student_number: {student_number}")
             cursor.execute(
                 """
                 UPDATE users
                 SET password = ?
                 WHERE student_number = ?
             """,
-                (password, student_number),
+                (passwords.hasher.hash(password), student_number),
             )
 
+        bump_student_version(cursor, student_number)
         conn.commit()
         flash("Your information has been updated successfully!", "success")
 
-    # Fetch the current data to display
-    cursor.execute(
-        "SELECT * FROM student_info WHERE student_number = ?", (student_number,)
-    )
-    student = cursor.fetchone()
-    conn.close()
+    def render():
+        # Fetch the current data to display
+        cursor.execute(
+            "SELECT * FROM student_info WHERE student_number = ?", (student_number,)
+        )
+        student = cursor.fetchone()
 
-    if not student:
-        return "<p>Student not found.</p>", 404
+        if not student:
+            return "<p>Student not found.</p>", 404
 
-    # Pass the updated student info to the template
-    return render_template("partials/student_info.html", student=student)
+        # Pass the updated student info to the template
+        return render_template("partials/student_info.html", student=student)
+
+    if request.method == "POST":
+        return render()
+    return conditional_fragment(
+        fragment_etag(
+            "student_info", student_number, read_student_version(cursor, student_number)
+        ),
+        render,
+    )
 
 
 @auth_routes.route("/load-partial/study_plan")
 def load_study_plan():
     student_number = session.get("student_number")
-    connection = sqlite3.connect("data/university_courses.db")
+    catalog = get_catalog()
+    connection = get_db()
     cursor = connection.cursor()
 
-    # Fetch all courses with a flag indicating if they are completed
-    cursor.execute(
-        """
-        SELECT c.course_code, c.course_name, c.category, c.credit_hours,
-        CASE WHEN cc.course_code IS NOT NULL THEN 1 ELSE 0 END AS completed
-        FROM courses c
-        LEFT JOIN completed_courses cc ON c.course_code = cc.course_code AND cc.student_number = ?
-    """,
-        (student_number,),
+    def render():
+        # All courses come from the catalog snapshot, flagged if completed
+        cursor.execute(
+            "SELECT course_code FROM completed_courses WHERE student_number = ?",
+            (student_number,),
+        )
+        completed_codes = {row[0] for row in cursor.fetchall()}
+        courses = [
+            (
+                course.code,
+                course.name,
+                course.category,
+                course.credit_hours,
+                1 if course.code in completed_codes else 0,
+            )
+            for course in catalog.courses.values()
+        ]
+        return render_template("partials/study_plan.html", courses=courses)
+
+    return conditional_fragment(
+        fragment_etag(
+            "study_plan",
+            student_number,
+            catalog.version,
+            read_student_version(cursor, student_number),
+        ),
+        render,
     )
-    courses = cursor.fetchall()
-    connection.close()
 
-    return render_template("partials/study_plan.html", courses=courses)
 
-
-@auth_routes.route("/save-study-plan", methods=["POST"])
+@auth_routes.route("/save-study-plan", methods=["POST", "PATCH"])
 def save_study_plan():
+    """
+    Save the student's completed courses.
+
+    POST sends the full set as {"completed_courses": [...]}; PATCH sends only
+    the change as {"add": [...], "remove": [...]}. Either way only the rows
+    that actually change are written.
+    """
     student_number = session.get("student_number")
     if not student_number:
         return {"error": "Not authenticated"}, 403
 
-    data = request.json
-    completed_courses = data.get("completed_courses", [])
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return {"error": "Expected a JSON object"}, 400
 
-    connection = sqlite3.connect("data/university_courses.db")
-    cursor = connection.cursor()
-
-    # Clear old completed courses for this student
-    cursor.execute(
-        "DELETE FROM completed_courses WHERE student_number = ?", (student_number,)
-    )
+    if request.method == "PATCH":
+        changes = {"add": data.get("add", []), "remove": data.get("remove", [])}
+    else:
+        changes = {"completed": data.get("completed_courses", [])}
+    if not all(is_code_list(codes) for codes in changes.values()):
+        return {"error": "Course codes must be sent as lists of strings"}, 400
 
-    # Insert new completed courses
-    for course_code in completed_courses:
-        cursor.execute(
-            "INSERT INTO completed_courses (student_number, course_code) VALUES (?, ?)",
-            (student_number, course_code),
+    try:
+        added, removed = save_completed_courses(
+            get_db(), get_catalog(), student_number, **changes
         )
+    except InvalidCourseCodes as e:
+        return {"error": "Unknown course codes", "invalid": e.codes}, 400
+    except sqlite3.Error as e:
+        print(f"Error saving study plan: {e}")
+        return {"error": "Could not save the study plan"}, 500
 
-    connection.commit()
-    connection.close()
-    return {"success": True}
+    return {"success": True, "added": added, "removed": removed}
 
 
-def parse_time_range(time_range):
-    """Convert a time range string (e.g., '10:00 AM-11:30 AM') into a tuple of start and end times in 24-hour format."""
-    import datetime
+@auth_routes.route("/generate-plan", methods=["GET", "POST"])
+def generate_plan():
+    # Fetch the desired credit hours and number of alternative plans from the form
+    try:
+        desired_credit_hours = int(request.form.get("credit_hours", ""))
+    except ValueError:
+        desired_credit_hours = None
+    if desired_credit_hours is None or not 1 <= desired_credit_hours <= MAX_CREDIT_HOURS:
+        return (
+            f"<p>Error: Credit hours must be a whole number from 1 to {MAX_CREDIT_HOURS}.</p>",
+            400,
+        )
+    alternatives = request.form.get("alternatives", type=int) or 1
+    student_number = session.get("student_number")
+    # Spread students across sections by capacity instead of the first section
+    balanced = bool(request.form.get("balanced"))
+
+    cached, job_id = find_schedules(
+        student_number,
+        desired_credit_hours,
+        alternatives,
+        balanced,
+        background=bool(request.form.get("background")),
+    )
+    if job_id is not None:
+        return {"job_id": job_id}, 202
+    return render_generated_plan(*cached)
 
-    start_time_str, end_time_str = time_range.split("-")
-    start_time = datetime.datetime.strptime(start_time_str.strip(), "%I:%M %p").time()
-    end_time = datetime.datetime.strptime(end_time_str.strip(), "%I:%M %p").time()
-    return start_time, end_time
 
+def render_generated_plan(candidates, result):
+    """
+    Render the eligible courses and planned schedules of a schedule search.
+    """
+    # Eligible courses (static order, one row per section)
+    eligible_courses = [
+        (
+            course.code,
+            course.name,
+            course.category,
+            course.credit_hours,
+            section.time,
+            section.days,
+        )
+        for course, sections in candidates
+        for section in sections
+    ]
+
+    # Each plan is sorted by days and then by start time
+    plans = [
+        [
+            (course.code, course.name, course.credit_hours, section.time, section.days)
+            for course, section in schedule.sections
+        ]
+        for schedule in result.schedules
+    ]
+
+    # Pass eligible courses (unsorted), the best plan and its alternatives to the template
+    return render_template(
+        "partials/generated_plan.html",
+        eligible_courses=eligible_courses,
+        plan=plans[0] if plans else [],
+        alternative_plans=plans[1:],
+        search_complete=result.complete,
+    )
 
-@auth_routes.route("/generate-plan", methods=["GET", "POST"])
-def generate_plan():
-    import random
-    from datetime import datetime
 
-    # Fetch the desired credit hours from the form
-    desired_credit_hours = int(request.form["credit_hours"])
+@auth_routes.route("/graduation-plan", methods=["POST"])
+def graduation_plan():
+    """
+    Plan every remaining semester up to graduation for the logged-in student.
+    """
     student_number = session.get("student_number")
+    if not student_number:
+        return "<p>Error: User not logged in.</p>", 403
 
-    conn = sqlite3.connect("data/university_courses.db")
-    cursor = conn.cursor()
+    try:
+        credit_cap = int(request.form.get("credit_cap") or DEFAULT_CREDIT_CAP)
+    except ValueError:
+        credit_cap = None
+    if credit_cap is None or not 1 <= credit_cap <= MAX_CREDIT_CAP:
+        return (
+            f"<p>Error: The credit cap must be a whole number from 1 to {MAX_CREDIT_CAP}.</p>",
+            400,
+        )
+    catalog = get_catalog()
 
-    # Fetch completed courses
+    conn = get_db()
+    cursor = conn.cursor()
     cursor.execute(
-        """
-        SELECT c.course_code, c.category, c.credit_hours
-        FROM completed_courses cc
-        JOIN courses c ON cc.course_code = c.course_code
-        WHERE cc.student_number = ?
-        """,
+        "SELECT course_code FROM completed_courses WHERE student_number = ?",
         (student_number,),
     )
-    completed_courses = cursor.fetchall()
+    completed_codes = {row[0] for row in cursor.fetchall()}
 
-    # Fetch uncompleted courses
-    cursor.execute(
-        """
-        SELECT c.course_code, c.course_name, c.category, c.credit_hours
-        FROM courses c
-        WHERE c.course_code NOT IN (
-            SELECT cc.course_code FROM completed_courses cc WHERE cc.student_number = ?
-        )
-        """,
-        (student_number,),
+    cache_key = plan_cache.make_key(
+        catalog, completed_codes, credit_cap, ("graduation",)
     )
-    uncompleted_courses = cursor.fetchall()
+    plan = plan_cache.get(cache_key)
+    if plan is None:
+        if request.form.get("background"):
+            job_id = jobs.job_queue.submit(
+                "graduation",
+                {"completed_codes": sorted(completed_codes), "credit_cap": credit_cap},
+                owner=student_number,
+                time_limit=current_app.config.get("JOB_TIME_LIMIT"),
+                on_success=lambda result: plan_cache.put(cache_key, result),
+            )
+            return {"job_id": job_id}, 202
+        plan = plan_graduation(catalog, completed_codes, credit_cap)
+        plan_cache.put(cache_key, plan)
+    return render_graduation_plan(plan, credit_cap)
 
-    # Fetch available courses
-    cursor.execute(
-        """
-        SELECT s.course_code, s.time, s.days
-        FROM course_of_study s
-        """
-    )
-    available_courses = {
-        row[0]: {"time": row[1], "days": row[2]} for row in cursor.fetchall()
-    }
 
-    # Fetch prerequisites
-    cursor.execute(
-        """
-        SELECT course_code, prerequisite_code
-        FROM course_prerequisites
-        """
+def render_graduation_plan(plan, credit_cap):
+    """
+    Render a GraduationPlan semester by semester.
+    """
+    return render_template(
+        "partials/graduation_plan.html",
+        plan=plan,
+        courses=get_catalog().courses,
+        credit_cap=credit_cap,
     )
-    prerequisites = cursor.fetchall()
-    prereq_dict = {}
-    for course_code, prerequisite_code in prerequisites:
-        prereq_dict.setdefault(course_code, set()).add(prerequisite_code)
-
-    # Calculate remaining hours
-    category_limits = {
-        "mandatory_university": 21,
-        "elective_university": 6,
-        "mandatory_college": 24,
-        "mandatory_specialization": 74,
-        "elective_specialization": 9,
-    }
-    remaining_hours = category_limits.copy()
-    for _, category, credit_hours in completed_courses:
-        remaining_hours[category] -= credit_hours
 
-    # Step 1: Store all eligible courses (static order)
-    eligible_courses = []
-    for course_code, course_name, category, credit_hours in uncompleted_courses:
-        if course_code not in available_courses:
-            continue
 
-        if course_code in prereq_dict and not prereq_dict[course_code].issubset(
-            {c[0] for c in completed_courses}
-        ):
-            continue
+@auth_routes.route("/plan-cache/stats", methods=["GET"])
+def plan_cache_stats():
+    """
+    Report plan cache hit/miss/eviction counters for this worker.
+    """
+    if not is_admin(session.get("student_number")):
+        return {"error": "Not authorized"}, 403
+    return plan_cache.stats()
 
-        if remaining_hours[category] < credit_hours:
-            continue
 
-        eligible_courses.append(
+@auth_routes.route("/metrics", methods=["GET"])
+def metrics_text():
+    """
+    Expose this worker's request metrics in the Prometheus text format.
+    """
+    pool_stats = database.pool.stats()
+    cache_stats = plan_cache.stats()
+    hash_stats = passwords.hasher.stats()
+    body = metrics.registry.render(
+        gauges=(
             (
-                course_code,
-                course_name,
-                category,
-                credit_hours,
-                available_courses[course_code]["time"],
-                available_courses[course_code]["days"],
-            )
-        )
-
-    # Step 2: Randomized course selection for generated plan
-    remaining_eligible_courses = eligible_courses.copy()
-    random.shuffle(remaining_eligible_courses)  # Randomize selection process
-    generated_plan = []
-    total_hours = 0
-    planned_times = []
-
-    for (
-        course_code,
-        course_name,
-        category,
-        course_credit_hours,
-        time,
-        days,
-    ) in remaining_eligible_courses:
-        # Stop if we've reached the desired credit hours
-        if total_hours >= desired_credit_hours:
-            break
-
-        # Check if adding this course exceeds the desired credit hours
-        if total_hours + course_credit_hours > desired_credit_hours:
-            continue
-
-        # Parse the course time into a start and end range
-        course_start, course_end = parse_time_range(time)
-
-        # Check for time conflicts
-        conflict = False
-        for planned in planned_times:
-            planned_start, planned_end = parse_time_range(planned["time"])
-            if set(days.split()).intersection(
-                set(planned["days"].split())
-            ) and (  # Days overlap
-                course_start < planned_end and course_end > planned_start
-            ):  # Times overlap
-                conflict = True
-                break
-
-        if conflict:
-            continue
-
-        # Add the course to the plan
-        generated_plan.append(
-            (course_code, course_name, course_credit_hours, time, days)
-        )
-        planned_times.append({"time": time, "days": days})
-        remaining_hours[category] -= course_credit_hours
-        total_hours += course_credit_hours
-
-    # Step 3: Sort the generated plan by days and then by time
-    generated_plan.sort(
-        key=lambda course: (
-            course[4],  # Days
-            datetime.strptime(
-                course[3].split("-")[0].strip(), "%I:%M %p"
-            ),  # Start time
+                "db_connections_opened",
+                "SQLite connections opened by the pool.",
+                pool_stats["connections_opened"],
+            ),
+            ("db_connections_idle", "Idle pooled SQLite connections.", pool_stats["idle"]),
+            (
+                "plan_cache_entries",
+                "Planner results held in the plan cache.",
+                cache_stats["entries"],
+            ),
+            (
+                "plan_cache_hit_rate",
+                "Share of plan cache lookups that hit.",
+                cache_stats["hit_rate"],
+            ),
+            ("catalog_version", "Version of the catalog snapshot in use.", get_catalog().version),
+            ("password_hash_active", "Password hashes being computed.", hash_stats["active"]),
+            (
+                "password_hash_queued",
+                "Password hashes waiting for a worker.",
+                hash_stats["queued"],
+            ),
+            (
+                "password_hash_rejected",
+                "Password checks turned away with 503 since startup.",
+                hash_stats["rejected"],
+            ),
         )
     )
+    response = make_response(body)
+    response.mimetype = "text/plain"
+    response.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+    return response
 
-    print("Final Generated Plan (Sorted):", generated_plan)
-    conn.close()
 
-    # Pass eligible courses (unsorted), the generated plan (sorted), and conflict courses to the template
-    return render_template(
-        "partials/generated_plan.html",
-        eligible_courses=eligible_courses,
-        plan=generated_plan,
-    )
+@auth_routes.route("/section-demand", methods=["GET"])
+def section_demand_report():
+    """
+    Report predicted demand and load per section, most loaded first.
+    """
+    if not is_admin(session.get("student_number")):
+        return {"error": "Not authorized"}, 403
+
+    catalog = get_catalog()
+    connection = get_db()
+    demand = get_course_demand(connection.cursor(), catalog)
+    connection.commit()
+    return {
+        "catalog_version": catalog.version,
+        "sections": [row._asdict() for row in section_demand(catalog, demand)],
+    }
+
+
+@auth_routes.route("/reports/eligibility", methods=["GET"])
+def eligibility_report_view():
+    """
+    Report, per course, how many students are eligible next term and how many
+    it blocks as their last missing prerequisite.
+    """
+    if not is_admin(session.get("student_number")):
+        return {"error": "Not authorized"}, 403
+
+    # Imported on first use: NumPy and SciPy take longer to load than the rest of the app
+    from models.reports import ReportsUnavailable, eligibility_report
+
+    catalog = get_catalog()
+    try:
+        report = eligibility_report(catalog, fetch_cohort(get_db().cursor()))
+    except ReportsUnavailable as e:
+        return {"error": str(e)}, 503
+    report["catalog_version"] = catalog.version
+    return report
+
+
+@auth_routes.route("/course/<code>/unlocks", methods=["GET"])
+def course_unlocks(code):
+    """
+    Serve a course's depth, unlock score and the courses it unlocks from the
+    catalog snapshot's precomputed index.
+    """
+    catalog = get_catalog()
+    entry = catalog.unlocks.get(code)
+    if entry is None:
+        return {"error": "Unknown course"}, 404
+    return {
+        "code": entry.code,
+        "name": catalog.courses[code].name,
+        "depth": entry.depth,
+        "score": entry.score,
+        "direct": list(entry.direct),
+        "downstream": list(entry.downstream),
+        "catalog_version": catalog.version,
+    }
+
+
+@auth_routes.route("/catalog/validation", methods=["GET"])
+def catalog_validation():
+    """
+    Report prerequisite cycles, unknown prerequisite codes and courses that
+    can never be taken in the current catalog.
+    """
+    catalog = get_catalog()
+    validation = catalog.validation
+    return {
+        "catalog_version": catalog.version,
+        "ok": validation.ok,
+        "cycles": validation.cycles,
+        "dangling": validation.dangling,
+        "unreachable": validation.unreachable,
+    }
 
 
 @auth_routes.route("/load-partial/guidance_plan", methods=["GET"])
 def load_guidance_plan():
-    return render_template("partials/guidance_plan.html")
+    return catalog_fragment("partials/guidance_plan.html")
+
+
+@auth_routes.route("/export-plan/<format_name>", methods=["POST"])
+def export_plan_file(format_name):
+    """
+    Export the plan rows shown on the page as Excel, CSV or iCalendar.
+    The file is built in memory and streamed back as an attachment.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return {"error": "Expected a JSON object"}, 400
+    plan_type = data.get("plan_type", "study_plan")
+    rows = data.get("plan", [])
+    if not isinstance(plan_type, str) or not is_plan_rows(rows):
+        return {"error": "plan must be a list of rows of text or numbers"}, 400
+    try:
+        content, export_format = export_plan(format_name, plan_type, rows)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    return send_file(
+        io.BytesIO(content),
+        mimetype=export_format.mimetype,
+        as_attachment=True,
+        download_name=f"{plan_type}.{export_format.extension}",
+    )
+
+
+@auth_routes.route("/export-plan/cohort", methods=["POST"])
+def export_cohort_plans():
+    """
+    Start a background job exporting a generated plan for every student into
+    one zip; poll /jobs/<job_id> and download it from /jobs/<job_id>/result.
+    """
+    if not is_admin(session.get("student_number")):
+        return {"error": "Not authorized"}, 403
+
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        return {"error": "Expected a JSON object"}, 400
+    format_name = data.get("format", "excel")
+    if not isinstance(format_name, str) or format_name not in EXPORT_FORMATS:
+        return {"error": f"Unknown export format: {format_name}"}, 400
+    credit_hours = data.get("credit_hours", 15)
+    if (
+        isinstance(credit_hours, bool)
+        or not isinstance(credit_hours, int)
+        or not 1 <= credit_hours <= MAX_CREDIT_HOURS
+    ):
+        return {"error": f"credit_hours must be a whole number from 1 to {MAX_CREDIT_HOURS}"}, 400
+    job_id = jobs.job_queue.submit(
+        "cohort_export",
+        {"credit_hours": credit_hours, "format_name": format_name},
+        owner=session["student_number"],
+        time_limit=current_app.config.get("COHORT_JOB_TIME_LIMIT", 3600),
+    )
+    return {"job_id": job_id}, 202
+
+
+@auth_routes.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """
+    Report a job's status and progress right away; while it is queued or
+    running, Retry-After tells the client when to ask again. (Under the ASGI
+    entry point, ?wait=N long-polls on the event loop before this answers.)
+    """
+    if not session.get("student_number"):
+        return {"error": "Not authenticated"}, 403
 
+    status = jobs.job_queue.status(job_id, owner=job_owner())
+    if status is None:
+        return {"error": "Unknown job"}, 404
+    if status["status"] in jobs.ACTIVE_STATES:
+        return status, 200, {"Retry-After": "1"}
+    return status
 
-import xlsxwriter
-from flask import send_file, jsonify
 
+@auth_routes.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    """
+    Return a finished job's result: the rendered plan, or the cohort archive.
+    """
+    if not session.get("student_number"):
+        return {"error": "Not authenticated"}, 403
 
-@auth_routes.route("/export-plan/excel", methods=["POST"])
-def export_plan_excel():
-    data = request.json.get("plan", [])
-    plan_type = request.json.get("plan_type", "study_plan")
-    file_path = f"{plan_type}_plan.xlsx"
+    finished = jobs.job_queue.result(job_id, owner=job_owner())
+    if finished is None:
+        return {"error": "Job is not finished"}, 404
+    task_name, params, result = finished
+
+    if task_name == "schedules":
+        return render_generated_plan(*result)
+    if task_name == "graduation":
+        return render_graduation_plan(result, params["credit_cap"])
+    export_format = EXPORT_FORMATS[params["format_name"]]
+    return send_file(
+        io.BytesIO(result),
+        mimetype="application/zip",
+        as_attachment=True,
+        download_name=f"cohort_plans_{export_format.extension}.zip",
+    )
 
-    workbook = xlsxwriter.Workbook(file_path)
-    worksheet = workbook.add_worksheet()
 
-    # Write headers
-    headers = ["Course Code", "Course Name", "Credit Hours", "Time", "Days"]
-    for col_num, header in enumerate(headers):
-        worksheet.write(0, col_num, header)
+@auth_routes.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    """
+    Cancel a queued or running job.
+    """
+    if not session.get("student_number"):
+        return {"error": "Not authenticated"}, 403
 
-    # Write data
-    for row_num, row in enumerate(data, 1):
-        for col_num, value in enumerate(row):
-            worksheet.write(row_num, col_num, value)
+    status = jobs.job_queue.cancel(job_id, owner=job_owner())
+    if status is None:
+        return {"error": "Unknown job"}, 404
+    return status
 
-    workbook.close()
 
-    return send_file(file_path, as_attachment=True)
+@auth_routes.route("/jobs/stats", methods=["GET"])
+def job_stats():
+    """
+    Report how many jobs are queued, running and finished across all workers.
+    """
+    if not is_admin(session.get("student_number")):
+        return {"error": "Not authorized"}, 403
+    return jobs.job_queue.stats()
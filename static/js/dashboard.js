@@ -30,19 +30,28 @@ function loadContent(endpoint) {
 
 // Function to save the study plan
 function saveStudyPlan() {
-    const checkboxes = document.querySelectorAll('input[name="completed_courses"]:checked');
-    const completedCourses = Array.from(checkboxes).map(cb => cb.value);
+    // Only send the checkboxes that changed since the page was loaded or last saved
+    const checkboxes = Array.from(document.querySelectorAll('input[name="completed_courses"]'));
+    const changed = checkboxes.filter(cb => cb.checked !== cb.defaultChecked);
+    const add = changed.filter(cb => cb.checked).map(cb => cb.value);
+    const remove = changed.filter(cb => !cb.checked).map(cb => cb.value);
+
+    if (changed.length === 0) {
+        alert('Study plan saved successfully!');
+        return;
+    }
 
     fetch('/save-study-plan', {
-        method: 'POST',
+        method: 'PATCH',
         headers: {
             'Content-Type': 'application/json'
         },
-        body: JSON.stringify({ completed_courses: completedCourses })
+        body: JSON.stringify({ add: add, remove: remove })
     })
     .then(response => response.json())
     .then(data => {
         if (data.success) {
+            changed.forEach(cb => { cb.defaultChecked = cb.checked; });
             alert('Study plan saved successfully!');
         } else {
             alert('Failed to save study plan.');
@@ -54,6 +63,159 @@ function saveStudyPlan() {
     });
 }
 
+// Poll a background job until it stops running (the ASGI server holds each
+// poll until the job finishes; otherwise wait as long as Retry-After says)
+function waitForJob(jobId) {
+    return fetch(`/jobs/${jobId}?wait=25`)
+        .then(response => {
+            if (!response.ok) throw new Error("Job not found");
+            const retryAfter = Number(response.headers.get("Retry-After")) || 0;
+            return response.json().then(job => ({ job, retryAfter }));
+        })
+        .then(({ job, retryAfter }) => {
+            if (job.status === "queued" || job.status === "running") {
+                return new Promise(resolve => setTimeout(resolve, retryAfter * 1000))
+                    .then(() => waitForJob(jobId));
+            }
+            if (job.status !== "finished") throw new Error(job.error || `Job ${job.status}`);
+            return job;
+        });
+}
+
+// Return the HTML of a planner response, waiting for its job if it was queued
+function jobResultText(response) {
+    if (response.status !== 202) return response.text();
+    return response.json()
+        .then(({ job_id }) => waitForJob(job_id))
+        .then(job => fetch(`/jobs/${job.job_id}/result`))
+        .then(response => {
+            if (!response.ok) throw new Error("Failed to fetch job result");
+            return response.text();
+        });
+}
+
+// Raised when a plan refers to another catalog than the one the server has now
+class CatalogChanged extends Error {}
+
+// Return the JSON of a plan API response, waiting for its job if it was queued
+function planResult(response) {
+    if (response.status !== 202) return response.json();
+    return response.json()
+        .then(({ job_id }) => waitForJob(job_id))
+        .then(job => fetch(`/api/v1/plan/${job.job_id}`))
+        .then(response => {
+            if (response.status === 409) throw new CatalogChanged("The catalog changed");
+            if (!response.ok) throw new Error("Failed to fetch job result");
+            return response.json();
+        });
+}
+
+// Return the catalog, fetching it only when the cached copy is not this version
+// (versions carry the server's build, so a recreated database never matches)
+const CATALOG_STORAGE_KEY = "uniroute-catalog";
+let cachedCatalog = null;
+
+function getCatalog(version) {
+    if (!cachedCatalog) {
+        try {
+            cachedCatalog = JSON.parse(localStorage.getItem(CATALOG_STORAGE_KEY));
+        } catch (error) {
+            cachedCatalog = null;
+        }
+    }
+    if (cachedCatalog && cachedCatalog.version === version) {
+        return Promise.resolve(cachedCatalog);
+    }
+    return fetch("/api/v1/catalog")
+        .then(response => {
+            if (!response.ok) throw new Error("Failed to load the catalog");
+            return response.json();
+        })
+        .then(catalog => {
+            cachedCatalog = catalog;
+            try {
+                localStorage.setItem(CATALOG_STORAGE_KEY, JSON.stringify(catalog));
+            } catch (error) {
+                console.warn("Could not cache the catalog:", error);
+            }
+            // The catalog changed after the plan was made; its codes may be gone
+            if (catalog.version !== version) throw new CatalogChanged("The catalog changed");
+            return catalog;
+        });
+}
+
+// Request a plan and the catalog it refers to, planning again (once) when
+// the catalog changes in between
+function requestPlan(body, retries = 1) {
+    return fetch("/api/v1/plan", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(body),
+    })
+        .then(response => {
+            if (!response.ok) throw new Error("Failed to generate plan");
+            return planResult(response);
+        })
+        .then(plan => getCatalog(plan.catalog_version).then(catalog => ({ plan, catalog })))
+        .catch(error => {
+            if (error instanceof CatalogChanged && retries > 0) {
+                return requestPlan(body, retries - 1);
+            }
+            throw error;
+        });
+}
+
+function escapeHtml(value) {
+    const div = document.createElement("div");
+    div.textContent = value === null || value === undefined ? "" : String(value);
+    return div.innerHTML;
+}
+
+function tableHtml(headers, rows, attributes) {
+    const head = headers.map(header => `<th>${escapeHtml(header)}</th>`).join("");
+    const body = rows
+        .map(row => `<tr>${row.map(cell => `<td>${escapeHtml(cell)}</td>`).join("")}</tr>`)
+        .join("");
+    return `<table border="1"${attributes || ""}><thead><tr>${head}</tr></thead><tbody>${body}</tbody></table>`;
+}
+
+// Render a plan API response with the course details from the catalog
+function renderPlan(plan, catalog) {
+    const section = (code, number) =>
+        catalog.sections[code].find(candidate => candidate[0] === number);
+
+    const eligibleRows = [];
+    plan.eligible.forEach(code => {
+        const [name, category, hours] = catalog.courses[code];
+        catalog.sections[code].forEach(([, time, days]) => {
+            eligibleRows.push([code, name, category, hours, time, days]);
+        });
+    });
+
+    const planRows = schedule => schedule.sections.map(([code, number]) => {
+        const [name, , hours] = catalog.courses[code];
+        const [, time, days] = section(code, number);
+        return [code, name, hours, time, days];
+    });
+    const planHeaders = ["Course Code", "Course Name", "Credit Hours", "Time", "Days"];
+
+    let html = "<h3>Eligible Courses</h3>";
+    html += tableHtml(
+        ["Course Code", "Course Name", "Category", "Credit Hours", "Time", "Days"],
+        eligibleRows
+    );
+    html += "<h3>Your Generated Study Plan</h3>";
+    if (!plan.complete) {
+        html += "<p>The search stopped at its time limit; this is the best plan found so far.</p>";
+    }
+    html += tableHtml(planHeaders, plan.plans.length ? planRows(plan.plans[0]) : [], ' id="generated-plan-table"');
+    plan.plans.slice(1).forEach((schedule, index) => {
+        html += `<h3>Alternative Plan ${index + 1}</h3>`;
+        html += tableHtml(planHeaders, planRows(schedule), ' class="alternative-plan-table"');
+    });
+    return html;
+}
+
 // Attach listeners to dynamically loaded forms
 function attachListeners() {
     // Handle Generate Plan form
@@ -63,25 +225,52 @@ function attachListeners() {
         generatePlanForm.addEventListener("submit", function (e) {
             e.preventDefault(); // Prevent default behavior
             const formData = new FormData(generatePlanForm);
+            const results = document.getElementById("generated-plan-results");
+            results.innerHTML = "<p>Generating plan...</p>";
+            requestPlan({
+                credit_hours: parseInt(formData.get("credit_hours"), 10),
+                alternatives: parseInt(formData.get("alternatives"), 10) || 1,
+                balanced: formData.get("balanced") !== null,
+                // The server only queues searches long enough to be worth a job
+                background: true,
+            })
+                .then(({ plan, catalog }) => { results.innerHTML = renderPlan(plan, catalog); })
+                .catch(error => {
+                    console.error("Error:", error);
+                    results.innerHTML = error instanceof CatalogChanged
+                        ? "<p>The course catalog changed while planning; please generate the plan again.</p>"
+                        : "<p>Error generating plan.</p>";
+                });
+        });
+    } else {
+        console.warn("generate-plan-form not found. No event listener attached.");
+    }
+
+    // Handle Graduation Plan form
+    const graduationPlanForm = document.getElementById("graduation-plan-form");
+    if (graduationPlanForm) {
+        graduationPlanForm.addEventListener("submit", function (e) {
+            e.preventDefault();
+            const formData = new FormData(graduationPlanForm);
+            formData.append("background", "1");
+            document.getElementById("graduation-plan-results").innerHTML = "<p>Planning...</p>";
 
-            fetch("/generate-plan", {
+            fetch("/graduation-plan", {
                 method: "POST",
                 body: formData,
             })
                 .then(response => {
-                    if (!response.ok) throw new Error("Failed to generate plan");
-                    return response.text();
+                    if (!response.ok) throw new Error("Failed to plan graduation");
+                    return jobResultText(response);
                 })
                 .then(html => {
-                    document.getElementById("generated-plan-results").innerHTML = html;
+                    document.getElementById("graduation-plan-results").innerHTML = html;
                 })
                 .catch(error => {
                     console.error("Error:", error);
-                    document.getElementById("generated-plan-results").innerHTML = "<p>Error generating plan.</p>";
+                    document.getElementById("graduation-plan-results").innerHTML = "<p>Error planning graduation.</p>";
                 });
         });
-    } else {
-        console.warn("generate-plan-form not found. No event listener attached.");
     }
 
     // Handle Update Form (if dynamically loaded)
@@ -162,6 +351,9 @@ function getStudyPlanData() {
     return data;
 }
 
+// File extension of each export format
+const EXPORT_EXTENSIONS = { excel: "xlsx", csv: "csv", ical: "ics" };
+
 // Function to export the study plan
 function exportStudyPlan(format) {
     console.log("Exporting study plan as:", format);
@@ -186,7 +378,7 @@ function exportStudyPlan(format) {
         const url = window.URL.createObjectURL(blob);
         const a = document.createElement("a");
         a.href = url;
-        a.download = `study_plan.${format}`;
+        a.download = `study_plan.${EXPORT_EXTENSIONS[format]}`;
         document.body.appendChild(a);
         a.click();
         document.body.removeChild(a);
@@ -196,7 +388,7 @@ function exportStudyPlan(format) {
 
 // Function to fetch the generated plan data
 function getGeneratedPlanData() {
-    const rows = document.querySelectorAll("#generated-plan-results table tbody tr");
+    const rows = document.querySelectorAll("#generated-plan-table tbody tr");
     const data = [];
 
     rows.forEach((row) => {
@@ -232,7 +424,7 @@ function exportGeneratedPlan(format) {
         const url = window.URL.createObjectURL(blob);
         const a = document.createElement("a");
         a.href = url;
-        a.download = `generated_plan.${format}`;
+        a.download = `generated_plan.${EXPORT_EXTENSIONS[format]}`;
         document.body.appendChild(a);
         a.click();
         document.body.removeChild(a);
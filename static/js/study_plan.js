@@ -18,19 +18,28 @@ document.querySelectorAll('.checkbox').forEach((checkbox) => {
 
 // Function to save the study plan
 function saveStudyPlan() {
-    const checkboxes = document.querySelectorAll('input[name="completed_courses"]:checked');
-    const completedCourses = Array.from(checkboxes).map(cb => cb.value);
+    // Only send the checkboxes that changed since the page was loaded or last saved
+    const checkboxes = Array.from(document.querySelectorAll('input[name="completed_courses"]'));
+    const changed = checkboxes.filter(cb => cb.checked !== cb.defaultChecked);
+    const add = changed.filter(cb => cb.checked).map(cb => cb.value);
+    const remove = changed.filter(cb => !cb.checked).map(cb => cb.value);
+
+    if (changed.length === 0) {
+        alert('Study plan saved successfully!');
+        return;
+    }
 
     fetch('/save-study-plan', {
-        method: 'POST',
+        method: 'PATCH',
         headers: {
             'Content-Type': 'application/json'
         },
-        body: JSON.stringify({ completed_courses: completedCourses })
+        body: JSON.stringify({ add: add, remove: remove })
     })
     .then(response => response.json())
     .then(data => {
         if (data.success) {
+            changed.forEach(cb => { cb.defaultChecked = cb.checked; });
             alert('Study plan saved successfully!');
         } else {
             alert('Failed to save study plan.');